@@ -1,133 +1,1470 @@
-from flask import Flask, request, jsonify
+import time
+_import_started = time.perf_counter()
+
+# pandas / sklearn / xgboost / joblib are imported where they are first needed,
+# so a fast-mode cold start only pays for Flask + NumPy
+from flask import Flask, Response, request, jsonify, stream_with_context
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
+from werkzeug.exceptions import BadRequest, UnsupportedMediaType
 import numpy as np
-import pandas as pd
-import joblib
+from native_model import NativeTreeEnsemble, checked_native_engine, read_artifact, write_artifact
+from lab_ranges import AGE_BANDS, REFERENCE_MARKERS, REFERENCE_RANGES
+import atexit
+import bisect
+import hashlib
+import hmac
+import itertools
+import json
+import logging
+import logging.handlers
+import math
 import os
-import traceback
+import queue
+import random
+import sqlite3
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+
+startup_timings = {'imports_seconds': round(time.perf_counter() - _import_started, 4)}
+
+# ------------------------------------------------------------
+# 📝 Logging (leveled, lazily formatted, written off the request thread)
+# ------------------------------------------------------------
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO').strip().upper()
+LOG_PAYLOAD_SAMPLE_RATE = float(os.environ.get('LOG_PAYLOAD_SAMPLE_RATE', 0))  # 0 = never dump request payloads
+LOG_QUEUE_SIZE = int(os.environ.get('LOG_QUEUE_SIZE', 10000))
+
+logger = logging.getLogger('arthrocare')
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """Queues records for the listener thread without formatting them; drops them if the queue is full"""
+
+    dropped = 0
+
+    def prepare(self, record):
+        # Formatting (and %-interpolation of args) happens on the listener thread
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            NonBlockingQueueHandler.dropped += 1
+
+_log_listener = None
+
+def start_logging():
+    """(Re)start the background log writer; forked WSGI workers call this again after fork"""
+    global _log_listener
+    log_queue = queue.Queue(LOG_QUEUE_SIZE)
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(logging.Formatter('%(asctime)s %(levelname)s [%(process)d] %(message)s'))
+
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+    logger.addHandler(NonBlockingQueueHandler(log_queue))
+    logger.setLevel(LOG_LEVEL)
+    logger.propagate = False
+
+    _log_listener = logging.handlers.QueueListener(log_queue, stream)
+    _log_listener.start()
+
+def stop_logging():
+    """Flush queued records and stop the writer thread"""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        _log_listener = None
+
+def log_payload(endpoint, data):
+    """Dump a request payload for a sampled fraction of requests (off unless LOG_PAYLOAD_SAMPLE_RATE > 0)"""
+    if LOG_PAYLOAD_SAMPLE_RATE > 0 and random.random() < LOG_PAYLOAD_SAMPLE_RATE:
+        logger.info("📥 %s payload: %s", endpoint, data)
+
+start_logging()
+atexit.register(stop_logging)
+
+# ------------------------------------------------------------
+# 📈 Metrics (request counts + per-stage latency histograms)
+# ------------------------------------------------------------
+METRICS_ENABLED = os.environ.get('METRICS_ENABLED', '1').strip() != '0'
+
+# Seconds; fine-grained at the low end where single-record stages live
+LATENCY_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+                   0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+class LatencyHistogram:
+    """Fixed-bucket histogram (seconds by default); observe() is one bisect and three increments"""
+
+    __slots__ = ('buckets', 'counts', 'total', 'count')
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.total += seconds
+        self.count += 1
+
+    def exposition(self, name, labels):
+        lines = []
+        cumulative = 0
+        for bound, n in zip(self.buckets + ('+Inf',), self.counts):
+            cumulative += n
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_sum{{{labels}}} {self.total:.9f}')
+        lines.append(f'{name}_count{{{labels}}} {self.count}')
+        return lines
+
+class Metrics:
+    """In-process request/stage metrics rendered in Prometheus text exposition format"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = {}          # (endpoint, status) -> count
+        self.request_latency = {}   # endpoint -> LatencyHistogram
+        self.stage_latency = {}     # (endpoint, stage) -> LatencyHistogram
+
+    def observe_stage(self, endpoint, stage, seconds):
+        with self._lock:
+            histogram = self.stage_latency.get((endpoint, stage))
+            if histogram is None:
+                histogram = self.stage_latency[(endpoint, stage)] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def observe_request(self, endpoint, status, seconds):
+        with self._lock:
+            self.requests[(endpoint, status)] = self.requests.get((endpoint, status), 0) + 1
+            histogram = self.request_latency.get(endpoint)
+            if histogram is None:
+                histogram = self.request_latency[endpoint] = LatencyHistogram()
+            histogram.observe(seconds)
+
+    def render(self, extra_lines=()):
+        with self._lock:
+            lines = [
+                '# HELP arthrocare_requests_total Requests handled, by endpoint and HTTP status.',
+                '# TYPE arthrocare_requests_total counter'
+            ]
+            for (endpoint, status), count in sorted(self.requests.items()):
+                lines.append(f'arthrocare_requests_total{{endpoint="{endpoint}",status="{status}"}} {count}')
+
+            lines += [
+                '# HELP arthrocare_request_duration_seconds Wall time from request start to response, by endpoint.',
+                '# TYPE arthrocare_request_duration_seconds histogram'
+            ]
+            for endpoint, histogram in sorted(self.request_latency.items()):
+                lines += histogram.exposition('arthrocare_request_duration_seconds', f'endpoint="{endpoint}"')
+
+            lines += [
+                '# HELP arthrocare_stage_duration_seconds Time spent in each request stage, by endpoint.',
+                '# TYPE arthrocare_stage_duration_seconds histogram'
+            ]
+            for (endpoint, stage), histogram in sorted(self.stage_latency.items()):
+                lines += histogram.exposition('arthrocare_stage_duration_seconds', f'endpoint="{endpoint}",stage="{stage}"')
+
+        lines += extra_lines
+        return '\n'.join(lines) + '\n'
+
+metrics = Metrics()
+_request_timing = threading.local()
+
+class RequestTimer:
+    __slots__ = ('endpoint', 'start', 'last')
+
+    def __init__(self, endpoint):
+        self.endpoint = endpoint
+        self.start = self.last = time.perf_counter()
+
+def mark_stage(stage):
+    """Charge the time since the previous mark of the current request to `stage` (no-op outside requests)"""
+    timer = getattr(_request_timing, 'timer', None)
+    if timer is None:
+        return
+    now = time.perf_counter()
+    metrics.observe_stage(timer.endpoint, stage, now - timer.last)
+    timer.last = now
 
 app = Flask(__name__)
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-print("🚀 Starting Combined Flask App with REAL ML Model & Recommendations...")
+@app.before_request
+def _start_request_timer():
+    if METRICS_ENABLED and not in_warm_up():
+        _request_timing.timer = RequestTimer(request.endpoint or 'unknown')
+
+@app.after_request
+def _record_request_metrics(response):
+    timer = getattr(_request_timing, 'timer', None)
+    if timer is not None:
+        mark_stage('serialize')
+        metrics.observe_request(timer.endpoint, response.status_code, time.perf_counter() - timer.start)
+        _request_timing.timer = None
+    return response
+
+@app.teardown_request
+def _clear_request_timer(exc):
+    _request_timing.timer = None
 
-# Load your actual trained model
-model = None
-scaler = None
+# ------------------------------------------------------------
+# 🧾 JSON Responses (pluggable encoder, NumPy-aware, compact)
+# ------------------------------------------------------------
+# auto (orjson when installed, else the standard library) | orjson | stdlib
+JSON_ENGINE = os.environ.get('JSON_ENGINE', 'auto').strip().lower()
+
+# Indented responses; off by default, also under the debug server
+JSON_PRETTY = os.environ.get('JSON_PRETTY', '0').strip() == '1'
+
+def _json_default(obj):
+    """NumPy scalars/arrays as plain JSON values; anything else as Flask handles it"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    return DefaultJSONProvider.default(obj)
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Flask's standard-library provider that also encodes NumPy types"""
+    default = staticmethod(_json_default)
+    compact = not JSON_PRETTY
+
+class OrjsonProvider(NumpyJSONProvider):
+    """orjson encoder: NumPy scalars and arrays serialized natively, keys sorted like jsonify.
+
+    Request bodies are still parsed by the standard library, so what the
+    API accepts does not change with the engine.
+    """
+
+    def __init__(self, app):
+        super().__init__(app)
+        import orjson
+        self._orjson = orjson
+        self._options = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            self._options |= orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj, **kwargs):
+        # Always compact: separators/indent are for the standard-library encoder
+        return self._orjson.dumps(obj, default=_json_default, option=self._options).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        options = self._options | self._orjson.OPT_APPEND_NEWLINE
+        if (self.compact is None and self._app.debug) or self.compact is False:
+            options |= self._orjson.OPT_INDENT_2
+        return self._app.response_class(self._orjson.dumps(obj, default=_json_default, option=options),
+                                        mimetype=self.mimetype)
+
+def json_provider_class(engine=JSON_ENGINE):
+    """The provider for JSON_ENGINE (orjson is optional; auto falls back to the standard library)"""
+    if engine in ('auto', 'orjson'):
+        try:
+            import orjson  # noqa: F401
+            return OrjsonProvider
+        except ImportError:
+            if engine == 'orjson':
+                logger.warning("⚠️ JSON_ENGINE=orjson but orjson is not installed - using the standard library")
+    return NumpyJSONProvider
+
+app.json_provider_class = json_provider_class()
+app.json = app.json_provider_class(app)
+
+logger.info("🚀 Starting Combined Flask App with REAL ML Model & Recommendations...")
+
+# compiled (default) | two-step (original scaler.transform path) | verify (run both, warn on mismatch)
+SCORER_MODE = os.environ.get('SCORER_MODE', 'compiled').strip().lower()
+
+# native (default, flat-array tree evaluator with automatic fallback) | model (always model.predict_proba)
+INFERENCE_ENGINE = os.environ.get('INFERENCE_ENGINE', 'native').strip().lower()
+
+# eager (default, unpickle model + scaler at startup) | fast (serve from the memory-mapped
+# artifact written by export_model_artifact.py; the pickles load in a background thread, large
+# batches score natively until they land, and /api/ready reports ready only after)
+STARTUP_MODE = os.environ.get('STARTUP_MODE', 'eager').strip().lower()
+MODEL_ARTIFACT_NAME = 'RA_model.mmap'
+# Default model locations are relative to this file, so tools run from any directory find them
+MODELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models')
+MODEL_ARTIFACT_PATH = os.environ.get('MODEL_ARTIFACT_PATH', os.path.join(MODELS_DIR, MODEL_ARTIFACT_NAME))  # for unversioned models
+
+# Versioned model registry: manifest.json + one directory per version (RA_model.pkl, scaler.pkl,
+# optional RA_model.mmap). Without a manifest the unversioned RA_model.pkl search is used.
+MODEL_REGISTRY_PATH = os.environ.get('MODEL_REGISTRY_PATH', os.path.join(MODELS_DIR, 'registry'))
+MODEL_REGISTRY_POLL_SECONDS = float(os.environ.get('MODEL_REGISTRY_POLL_SECONDS', 10))  # 0 = reload only on request
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN', '')  # admin endpoints are disabled without it
+
+model_threads = None    # XGBoost thread cap, applied to every bundle as it loads
+
+class ModelBundle:
+    """One model version and everything scoring derives from it.
+
+    Requests pin the active bundle when they start (current_bundle()); a
+    reload builds and warms a complete new bundle, then swaps a single
+    reference, so a request never mixes two versions.
+    """
+
+    def __init__(self, version, model_path=None, scaler_path=None, artifact_path=None, fingerprint=None):
+        self.version = version
+        self.model_files = (model_path, scaler_path) if model_path and scaler_path else None
+        self.artifact_path = artifact_path
+        self.fingerprint = fingerprint          # sha256 of model+scaler; cached predictions are only valid for it
+        self.model = None
+        self.scaler = None
+        self.classes = None                     # model.classes_, kept so labels never need the model object
+        self.compiled_scorer = None
+        self.native_model = None
+        self.decision_threshold = (0.5, False)  # (threshold, inclusive) - set by load_decision_threshold()
+        self.mode = 'eager'
+        self.load_seconds = None
+        self.full_model_load_seconds = None
+        self.full_model_error = None
+        self._full_model_loader = None
+        self.loaded_at = None
+        self.warmed_up = False
+        self.warmup_seconds = None
+        self.warmup_error = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_fallback(self):
+        return self.model_files is None
+
+    def available(self):
+        """True once requests can be scored (unpickled model, or the fast-start artifact)"""
+        return self.model is not None or self.native_model is not None
+
+    def full_model(self):
+        """The sklearn model object; a fast-mode bundle unpickles it here (background loader, preload or first use)"""
+        if self.model is None and self.model_files is not None:
+            with self._lock:
+                if self.model is None:
+                    import joblib
+                    started = time.perf_counter()
+                    self.scaler = joblib.load(self.model_files[1])
+                    loaded = joblib.load(self.model_files[0])
+                    _apply_model_threads(loaded)
+                    self.model = loaded
+                    self.full_model_load_seconds = round(time.perf_counter() - started, 4)
+                    logger.info("✅ Model %s unpickled from %s in %.2fs (deferred by fast startup)",
+                                self.version, self.model_files[0], self.full_model_load_seconds)
+        return self.model
+
+    def load_full_model_in_background(self):
+        """Unpickle (and warm) the full model off the startup path; requests meanwhile score natively"""
+        if self.model is not None or self.model_files is None:
+            return
+        self._full_model_loader = threading.Thread(target=self._load_full_model, name='full-model-loader', daemon=True)
+        self._full_model_loader.start()
+
+    def _load_full_model(self):
+        try:
+            # One prediction above NATIVE_ENGINE_MAX_ROWS so the first large batch isn't the cold call
+            self.full_model().predict_proba(np.zeros((NATIVE_ENGINE_MAX_ROWS + 1, len(MODEL_FEATURES))))
+        except Exception as e:
+            self.full_model_error = str(e)
+            logger.error("❌ Background load of model %s failed, large batches stay on the native engine: %s",
+                         self.version, e)
+
+    def wait_for_full_model(self):
+        """Block until the background loader (if any) finishes, then return the full model"""
+        if self._full_model_loader is not None:
+            self._full_model_loader.join()
+        return self.full_model()
+
+    def describe(self):
+        return {
+            'version': self.version,
+            'fingerprint': self.fingerprint,
+            'fallback': self.is_fallback,
+            'mode': self.mode,
+            'loaded_at': self.loaded_at,
+            'load_seconds': self.load_seconds,
+            'full_model_loaded': self.model is not None,
+            'full_model_load_seconds': self.full_model_load_seconds,
+            'full_model_error': self.full_model_error,
+            'warmed_up': self.warmed_up
+        }
+
+active_bundle = None
+_bundle_pin = threading.local()
+
+def current_bundle():
+    """The bundle this request (or warm-up) scores with; the active one outside requests"""
+    return getattr(_bundle_pin, 'bundle', None) or active_bundle
+
+@app.before_request
+def _pin_model_bundle():
+    if not in_warm_up():
+        _bundle_pin.bundle = active_bundle
+
+@app.after_request
+def _add_model_version(response):
+    bundle = current_bundle()
+    if bundle is not None:
+        response.headers['X-Model-Version'] = bundle.version
+    return response
+
+@app.teardown_request
+def _unpin_model_bundle(exc):
+    if not in_warm_up():
+        _bundle_pin.bundle = None
+
+def model_available():
+    return active_bundle is not None and current_bundle().available()
+
+def real_model_loaded():
+    """True when the trained model (not the random fallback) is serving"""
+    return model_available() and not current_bundle().is_fallback
+
+# Warm-up requests run on this thread-local flag: pinned to the bundle being warmed, no cache, no metrics
+_warm_up_thread = threading.local()
+
+def in_warm_up():
+    return getattr(_warm_up_thread, 'active', False)
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def model_fingerprint_of(model_path, scaler_path):
+    # Identifies this exact model+scaler pair
+    return hashlib.sha256(f"{_file_digest(model_path)}:{_file_digest(scaler_path)}".encode()).hexdigest()[:16]
+
+def read_registry():
+    """The registry manifest ({'active': version, 'versions': [...]}), or None without a registry"""
+    manifest_path = os.path.join(MODEL_REGISTRY_PATH, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        return None
+    with open(manifest_path) as f:
+        return json.load(f)
+
+def write_registry(registry):
+    """Replace the registry manifest atomically (workers polling it never see a partial file)"""
+    os.makedirs(MODEL_REGISTRY_PATH, exist_ok=True)
+    manifest_path = os.path.join(MODEL_REGISTRY_PATH, 'manifest.json')
+    staging = f"{manifest_path}.tmp-{os.getpid()}-{threading.get_ident()}"
+    with open(staging, 'w') as f:
+        json.dump(registry, f, indent=2)
+    os.replace(staging, manifest_path)
+
+def locate_model(version=None):
+    """Unloaded ModelBundle for `version` (default: the registry's active one, else the unversioned files)"""
+    registry = read_registry()
+    if registry is not None:
+        version = version or registry['active']
+        entry = next((v for v in registry['versions'] if v['version'] == version), None)
+        if entry is None:
+            raise ValueError(f"model version {version!r} is not in the registry")
+        model_path = os.path.join(MODEL_REGISTRY_PATH, entry['model'])
+        scaler_path = os.path.join(MODEL_REGISTRY_PATH, entry['scaler'])
+        fingerprint = model_fingerprint_of(model_path, scaler_path)
+        if entry.get('fingerprint') and entry['fingerprint'] != fingerprint:
+            raise ValueError(f"model version {version!r}: files do not match the registry fingerprint")
+        artifact_path = os.path.join(os.path.dirname(model_path), MODEL_ARTIFACT_NAME)
+        return ModelBundle(version, model_path, scaler_path, artifact_path, fingerprint)
+
+    if version is not None:
+        raise ValueError(f"no model registry at {MODEL_REGISTRY_PATH}; cannot load version {version!r}")
+
+    # Try multiple possible paths for your model files
+    possible_model_paths = [
+        os.path.join(MODELS_DIR, "RA_model.pkl"),
+        "RA_model.pkl", 
+        "../models/RA_model.pkl",
+        "/content/RA_model.pkl"  # Your Colab path
+    ]
+    
+    possible_scaler_paths = [
+        os.path.join(MODELS_DIR, "scaler.pkl"),
+        "scaler.pkl",
+        "../models/scaler.pkl",
+        "/content/scaler.pkl"  # Your Colab path
+    ]
+
+    model_path = next((path for path in possible_model_paths if os.path.exists(path)), None)
+    scaler_path = next((path for path in possible_scaler_paths if os.path.exists(path)), None)
+    if not (model_path and scaler_path):
+        return ModelBundle('fallback', fingerprint=f"fallback-{uuid.uuid4().hex[:12]}")
+    return ModelBundle('unversioned', model_path, scaler_path, MODEL_ARTIFACT_PATH,
+                       model_fingerprint_of(model_path, scaler_path))
+
+def load_bundle(bundle):
+    """Deserialize a located bundle and derive its compiled scorer, native engine and decision rule"""
+    started = time.perf_counter()
+    if bundle.is_fallback:
+        logger.error("❌ Could not load your actual model files")
+        logger.warning("🔄 Creating fallback model for testing...")
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import StandardScaler
+        model = RandomForestClassifier()
+        scaler = StandardScaler()
+        # Fit with dummy data
+        X_dummy = np.random.rand(10, 10)
+        y_dummy = np.random.randint(0, 2, 10)
+        model.fit(X_dummy, y_dummy)
+        scaler.fit(X_dummy)
+        bundle.model, bundle.scaler = model, scaler
+        logger.warning("✅ Fallback model created")
+    elif STARTUP_MODE == 'fast' and load_model_artifact(bundle):
+        bundle.mode = 'fast'
+    else:
+        import joblib
+        bundle.model = joblib.load(bundle.model_files[0])
+        logger.info("✅ Model loaded from: %s (version %s)", bundle.model_files[0], bundle.version)
+        bundle.scaler = joblib.load(bundle.model_files[1])
+        logger.info("✅ Scaler loaded from: %s", bundle.model_files[1])
+
+    if bundle.mode == 'eager':
+        _apply_model_threads(bundle.model)
+        compile_scorer(bundle)
+        export_native_model(bundle)
+        load_decision_threshold(bundle)
+
+    bundle.load_seconds = round(time.perf_counter() - started, 4)
+    bundle.loaded_at = time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+    return bundle
+
+def activate_bundle(bundle):
+    """Make `bundle` serve new requests; requests already running keep the bundle they pinned"""
+    global active_bundle
+    # Cache first: from here on, writes computed by the old bundle are rejected
+    prediction_cache.reset(bundle.fingerprint)
+    active_bundle = bundle
 
 def load_models():
     """Load your actual trained model and scaler"""
-    global model, scaler
+    started = time.perf_counter()
+    logger.info("🔄 Loading your trained RA model...")
     try:
-        print("🔄 Loading your trained RA model...")
-        
-        # Try multiple possible paths for your model files
-        possible_model_paths = [
-            "./models/RA_model.pkl",
-            "RA_model.pkl", 
-            "../models/RA_model.pkl",
-            "/content/RA_model.pkl"  # Your Colab path
-        ]
-        
-        possible_scaler_paths = [
-            "./models/scaler.pkl",
-            "scaler.pkl",
-            "../models/scaler.pkl",
-            "/content/scaler.pkl"  # Your Colab path
-        ]
-        
-        model_loaded = False
-        scaler_loaded = False
-        
-        # Load model
-        for model_path in possible_model_paths:
-            if os.path.exists(model_path):
-                model = joblib.load(model_path)
-                print(f"✅ Model loaded from: {model_path}")
-                model_loaded = True
-                break
-        
-        # Load scaler
-        for scaler_path in possible_scaler_paths:
-            if os.path.exists(scaler_path):
-                scaler = joblib.load(scaler_path)
-                print(f"✅ Scaler loaded from: {scaler_path}")
-                scaler_loaded = True
-                break
-                
-        if not model_loaded or not scaler_loaded:
-            print("❌ Could not load your actual model files")
-            print("🔄 Creating fallback model for testing...")
-            from sklearn.ensemble import RandomForestClassifier
-            from sklearn.preprocessing import StandardScaler
-            model = RandomForestClassifier()
-            scaler = StandardScaler()
-            # Fit with dummy data
-            X_dummy = np.random.rand(10, 10)
-            y_dummy = np.random.randint(0, 2, 10)
-            model.fit(X_dummy, y_dummy)
-            scaler.fit(X_dummy)
-            print("✅ Fallback model created")
-            
+        bundle = load_bundle(locate_model())
     except Exception as e:
-        print(f"❌ Error loading models: {e}")
-        traceback.print_exc()
+        logger.exception("❌ Error loading models: %s", e)
+        bundle = load_bundle(ModelBundle('fallback', fingerprint=f"fallback-{uuid.uuid4().hex[:12]}"))
+    activate_bundle(bundle)
+    if bundle.mode == 'fast':
+        bundle.load_full_model_in_background()
+    startup_timings['startup_mode'] = bundle.mode
+    startup_timings['model_load_seconds'] = round(time.perf_counter() - started, 4)
 
-# Load models when app starts
-load_models()
+# ------------------------------------------------------------
+# 🗃️ Prediction Cache (P(RA) memoized per canonical lab record)
+# ------------------------------------------------------------
+PREDICTION_CACHE_SIZE = int(os.environ.get('PREDICTION_CACHE_SIZE', 10000))        # 0 disables the cache
+PREDICTION_CACHE_TTL = float(os.environ.get('PREDICTION_CACHE_TTL', 3600))         # seconds
+PREDICTION_CACHE_PATH = os.environ.get('PREDICTION_CACHE_PATH')                    # SQLite file shared by workers
+# Larger batches (bulk binary uploads) skip the cache: per-record lookups would cost more than
+# they save, and one such batch would evict every hot single-record entry
+PREDICTION_CACHE_MAX_BATCH = int(os.environ.get('PREDICTION_CACHE_MAX_BATCH', 1000))
+
+class PredictionCache:
+    """Bounded LRU + TTL cache of P(RA) keyed on canonical (Age, Gender, ESR, CRP, RF, Anti-CCP).
+
+    Entries belong to one model fingerprint; reset() on a new model/scaler
+    drops them, and lookups or writes made with any other fingerprint (a
+    request still finishing on the previous model) miss or are discarded. With PREDICTION_CACHE_PATH set, an SQLite file behind the
+    in-process LRU lets every worker process reuse each other's results.
+    """
+
+    def __init__(self, max_entries, ttl, shared_path=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.shared_path = shared_path
+        self.fingerprint = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self._writes = 0
+        if shared_path:
+            try:
+                self._shared().execute("CREATE TABLE IF NOT EXISTS predictions ("
+                                       "fingerprint TEXT, record TEXT, probability REAL, expires REAL, "
+                                       "PRIMARY KEY (fingerprint, record))")
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Shared prediction cache disabled (%s): %s", shared_path, e)
+                self.shared_path = None
+
+    @property
+    def enabled(self):
+        return self.max_entries > 0
+
+    def _shared(self):
+        # One connection per thread; WAL lets readers and one writer work concurrently
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = sqlite3.connect(self.shared_path, timeout=5, isolation_level=None)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute("PRAGMA synchronous=NORMAL")
+            self._local.db = db
+        return db
+
+    def reset(self, fingerprint):
+        """Forget everything cached for a previous model/scaler"""
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                self._entries.clear()
+            self.fingerprint = fingerprint
+        if self.shared_path and self.enabled:
+            try:
+                self._shared().execute("DELETE FROM predictions WHERE fingerprint != ? OR expires < ?",
+                                       (fingerprint, time.time()))
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Shared prediction cache unavailable: %s", e)
+
+    def get_many(self, keys, fingerprint):
+        """Cached probability per key, None for misses"""
+        now = time.time()
+        found = [None] * len(keys)
+        missing = []
+        with self._lock:
+            if fingerprint != self.fingerprint:
+                self.misses += len(keys)
+                return found
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None and entry[1] > now:
+                    self._entries.move_to_end(key)
+                    found[i] = entry[0]
+                else:
+                    if entry is not None:
+                        del self._entries[key]
+                    missing.append(i)
+
+        shared_hits = 0
+        if missing and self.shared_path:
+            for i in list(missing):
+                try:
+                    row = self._shared().execute(
+                        "SELECT probability, expires FROM predictions WHERE fingerprint = ? AND record = ?",
+                        (fingerprint, repr(keys[i]))).fetchone()
+                except sqlite3.Error:
+                    break
+                if row is not None and row[1] > now:
+                    found[i] = row[0]
+                    missing.remove(i)
+                    shared_hits += 1
+                    self._remember(keys[i], row[0], row[1])
+
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+            self.shared_hits += shared_hits
+        return found
+
+    def put_many(self, keys, probabilities, fingerprint):
+        if fingerprint != self.fingerprint:
+            return
+        expires = time.time() + self.ttl
+        for key, prob in zip(keys, probabilities):
+            self._remember(key, prob, expires)
+        if self.shared_path:
+            try:
+                db = self._shared()
+                db.executemany(
+                    "INSERT OR REPLACE INTO predictions VALUES (?, ?, ?, ?)",
+                    [(fingerprint, repr(key), prob, expires) for key, prob in zip(keys, probabilities)])
+
+                # Expired rows are the only growth on disk; sweep them every max_entries writes
+                self._writes += len(keys)
+                if self._writes >= self.max_entries:
+                    self._writes = 0
+                    db.execute("DELETE FROM predictions WHERE expires < ?", (time.time(),))
+            except sqlite3.Error as e:
+                logger.warning("⚠️ Could not write shared prediction cache: %s", e)
+
+    def _remember(self, key, prob, expires):
+        with self._lock:
+            self._entries[key] = (prob, expires)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'enabled': self.enabled,
+            'shared': bool(self.shared_path),
+            'entries': len(self._entries),
+            'max_entries': self.max_entries,
+            'ttl_seconds': self.ttl,
+            'hits': self.hits,
+            'misses': self.misses,
+            'shared_hits': self.shared_hits,
+            'evictions': self.evictions,
+            'hit_rate': round(self.hits / lookups, 4) if lookups else None,
+            'model_fingerprint': self.fingerprint
+        }
+
+prediction_cache = PredictionCache(PREDICTION_CACHE_SIZE, PREDICTION_CACHE_TTL, PREDICTION_CACHE_PATH)
+
+# ------------------------------------------------------------
+# 📏 Reference Ranges (shared by the *_adj features and the biomarker flags)
+# ------------------------------------------------------------
+# AGE_BANDS, REFERENCE_RANGES and REFERENCE_MARKERS live in lab_ranges.py (the load generator reads them too)
+
+def _exclusive_bound(bound, inclusive):
+    """Upper bound for a `x < bound` test: an inclusive bound becomes the next float up (exact for float64)"""
+    return float(np.nextafter(bound, np.inf)) if inclusive else float(bound)
+
+class ReferenceRangeTable:
+    """REFERENCE_RANGES compiled into cutoff arrays indexed by (marker, age band, gender).
+
+    Every bound is stored as an exclusive upper edge (an inclusive bound
+    becomes the next float up), so an age band is np.searchsorted(edges,
+    age, side='right') and a marker level is the number of its two cutoffs
+    at or below the value. NaN sorts past every edge, which reproduces the
+    if/else ladders: NaN ages fall in the last band, NaN values are level 2.
+    """
+
+    GENDERS = ('female', 'male')    # index: 1 if Gender == 1 else 0
+
+    def __init__(self, age_bands, ranges, markers=REFERENCE_MARKERS):
+        self.markers = tuple(markers)
+        self.band_names = [name for name, _, _ in age_bands]
+        self.band_edges = np.array([_exclusive_bound(bound, inclusive) for _, bound, inclusive in age_bands[:-1]])
+        if not (np.diff(self.band_edges) > 0).all():
+            raise ValueError("age bands must be in increasing order")
+
+        # cutoffs[marker, band, gender] = (low, exclusive high)
+        self.cutoffs = np.full((len(self.markers), len(self.band_names), len(self.GENDERS), 2), np.nan)
+        for marker, band, gender, low, high, high_inclusive in ranges:
+            m = self.markers.index(marker)
+            bands = range(len(self.band_names)) if band is None else [self.band_names.index(band)]
+            genders = range(len(self.GENDERS)) if gender is None else [self.GENDERS.index(gender)]
+            for b in bands:
+                for g in genders:
+                    if not np.isnan(self.cutoffs[m, b, g]).all():
+                        raise ValueError(f"{marker}: more than one range for {self.band_names[b]}/{self.GENDERS[g]}")
+                    self.cutoffs[m, b, g] = (low, _exclusive_bound(high, high_inclusive))
+        if np.isnan(self.cutoffs).any():
+            raise ValueError("every marker needs a range for each age band and gender")
+        if not (self.cutoffs[..., 0] < self.cutoffs[..., 1]).all():
+            raise ValueError("each range needs low < high")
+
+        # (marker, band * 2 + gender) views for the vectorized lookup; [band][gender][marker] lists for single records
+        self._group_low = self.cutoffs[..., 0].reshape(len(self.markers), -1)
+        self._group_high = self.cutoffs[..., 1].reshape(len(self.markers), -1)
+        self._edge_list = self.band_edges.tolist()
+        self._row_cutoffs = self.cutoffs.transpose(1, 2, 0, 3).tolist()
+
+    def bands(self, age):
+        """Age band index for each age"""
+        return np.searchsorted(self.band_edges, age, side='right')
+
+    def levels(self, age, gender, *values):
+        """float64 columns for N records -> one 0/1/2 level array per marker"""
+        group = self.bands(age) * len(self.GENDERS) + (gender == 1)
+        levels = []
+        for m, x in enumerate(values):
+            level = np.full(x.shape, 2, dtype=np.intp)
+            level -= x < self._group_low[m][group]
+            level -= x < self._group_high[m][group]
+            levels.append(level)
+        return tuple(levels)
+
+    def level_row(self, age, gender, *values):
+        """One record -> tuple of 0/1/2 levels, same comparisons as levels() without NumPy overhead"""
+        cutoffs = self._row_cutoffs[bisect.bisect_right(self._edge_list, age)][1 if gender == 1 else 0]
+        return tuple([int(2 - (x < low) - (x < high)) for x, (low, high) in zip(values, cutoffs)])
+
+reference_ranges = ReferenceRangeTable(AGE_BANDS, REFERENCE_RANGES)
 
 # ------------------------------------------------------------
 # 🔍 Helper Functions (YOUR EXACT TRAINED CODE)
 # ------------------------------------------------------------
 def adjust_by_age_gender(row):
-    """YOUR EXACT feature engineering from training"""
-    age = row['Age']
-    gender = row['Gender']
-    ESR = row['ESR']
-    CRP = row['CRP']
-    RF = row['RF']
-    Anti_CCP = row['Anti-CCP']
-
-    # --- ESR Adjustment ---
-    if age < 18:
-        esr_adj = 0 if ESR < 10 else (1 if ESR <= 20 else 2)
-    elif age <= 60:
-        if gender == 1:  # Male
-            esr_adj = 0 if ESR < 15 else (1 if ESR <= 30 else 2)
-        else:            # Female
-            esr_adj = 0 if ESR < 20 else (1 if ESR <= 40 else 2)
-    else:
-        esr_adj = 0 if ESR < 30 else (1 if ESR <= 50 else 2)
+    """YOUR EXACT feature engineering from training (ladders now read from REFERENCE_RANGES)"""
+    levels = reference_ranges.level_row(row['Age'], row['Gender'], row['ESR'], row['CRP'], row['RF'], row['Anti-CCP'])
+    row['ESR_adj'], row['CRP_adj'], row['RF_adj'], row['AntiCCP_adj'] = levels
+    return row
 
-    # --- CRP Adjustment ---
-    if age < 18:
-        crp_adj = 0 if CRP < 5 else (1 if CRP <= 10 else 2)
-    elif age <= 60:
-        crp_adj = 0 if CRP < 6 else (1 if CRP <= 20 else 2)
-    else:
-        crp_adj = 0 if CRP < 10 else (1 if CRP <= 30 else 2)
+MODEL_FEATURES = ['Age', 'Gender', 'ESR', 'CRP', 'RF', 'Anti-CCP',
+                  'ESR_adj', 'CRP_adj', 'RF_adj', 'AntiCCP_adj']
+
+def _as_float_columns(*columns):
+    return [np.asarray(c, dtype=np.float64) for c in columns]
+
+# Decimals kept for lab values (and age) on every scoring path, so a patient gets the same
+# P(RA) whatever the entry point, batch size or cache state
+LAB_PRECISION = int(os.environ.get('LAB_PRECISION', os.environ.get('PREDICTION_CACHE_PRECISION', 2)))
+
+def lab_precision_value(value):
+    """One value rounded to LAB_PRECISION decimals, bit-identical to np.round (scale, round half to even, unscale)"""
+    scale = 10.0 ** LAB_PRECISION
+    scaled = value * scale
+    if not math.isfinite(scaled):
+        return scaled / scale
+    return math.copysign(round(scaled) / scale, scaled)   # round() drops the sign of -0.0
+
+def lab_precision_columns(age, gender, esr, crp, rf, anti_ccp):
+    """N raw records with every lab value rounded to LAB_PRECISION decimals (gender as given)"""
+    age, esr, crp, rf, anti_ccp = (np.round(c, LAB_PRECISION) for c in _as_float_columns(age, esr, crp, rf, anti_ccp))
+    return age, gender, esr, crp, rf, anti_ccp
+
+def feature_levels(age, gender, esr, crp, rf, anti_ccp):
+    """Vectorized adjust_by_age_gender ladders: the 0/1/2 ESR/CRP/RF/Anti-CCP levels for N records"""
+    return reference_ranges.levels(age, gender, esr, crp, rf, anti_ccp)
+
+def build_feature_matrix(age, gender, esr, crp, rf, anti_ccp):
+    """Vectorized adjust_by_age_gender: N raw records -> (N, 10) matrix in MODEL_FEATURES order"""
+    raw = _as_float_columns(age, gender, esr, crp, rf, anti_ccp)
+
+    X = np.empty((raw[0].shape[0], len(MODEL_FEATURES)), dtype=np.float64)
+    for j, values in enumerate(raw):
+        X[:, j] = values
+    for j, level in enumerate(feature_levels(*raw), start=len(raw)):
+        X[:, j] = level
+    return X
+
+def build_feature_row(age, gender, esr, crp, rf, anti_ccp):
+    """Single-record feature builder: validated floats -> contiguous (1, 10) float64 row, no pandas"""
+    levels = reference_ranges.level_row(age, gender, esr, crp, rf, anti_ccp)
+    return np.array([[age, gender, esr, crp, rf, anti_ccp, *levels]], dtype=np.float64)
+
+def _check_finite(X):
+    # StandardScaler.transform rejects infinity (NaN is allowed and handled by the model)
+    if np.isinf(X).any():
+        raise ValueError("Input X contains infinity or a value too large for dtype('float64').")
+
+def scale_features(X):
+    """StandardScaler.transform on a float64 array without DataFrame/feature-name validation"""
+    bundle = current_bundle()
+    if bundle.scaler is None:
+        bundle.full_model()     # fast-mode bundles unpickle the scaler on first use
+    scaler = bundle.scaler
+    if not (hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_')):
+        return scaler.transform(X)
+
+    # Same checks and in-place arithmetic as StandardScaler.transform
+    _check_finite(X)
+    X_scaled = np.array(X, dtype=np.float64, order='C')
+    if scaler.with_mean:
+        X_scaled -= scaler.mean_
+    if scaler.with_std:
+        X_scaled /= scaler.scale_
+    return X_scaled
 
-    # --- RF Adjustment ---
-    if age < 18:
-        rf_adj = 0 if RF < 10 else (1 if RF <= 20 else 2)
-    elif age <= 60:
-        rf_adj = 0 if RF < 14 else (1 if RF <= 30 else 2)
+# ------------------------------------------------------------
+# ⚙️ Compiled Scorer (scaler folded into the feature builder)
+# ------------------------------------------------------------
+class CompiledScorer:
+    """Raw lab values -> model-ready scaled features in a single pass.
+
+    Built once per model bundle. The StandardScaler's mean/scale are folded
+    into the feature builder: raw columns are scaled as they are written and
+    each 0/1/2 *_adj level becomes a lookup into pre-scaled constants, so no
+    unscaled feature matrix is ever materialized. Every value goes through
+    the same float64 (x - mean) / scale as scaler.transform, so the output
+    is bit-identical to the two-step path.
+    """
+
+    def __init__(self, mean, scale):
+        n_features = len(MODEL_FEATURES)
+        self.mean = np.array(mean, dtype=np.float64)
+        self.scale = np.array(scale, dtype=np.float64)
+        if self.mean.shape != (n_features,) or self.scale.shape != (n_features,):
+            raise ValueError(f"scaler expects {self.mean.shape[0]} features, model uses {n_features}")
+
+        # Scaled value of level 0/1/2 for each *_adj column: shape (4, 3)
+        n_raw = n_features - 4
+        levels = np.arange(3, dtype=np.float64)
+        self.level_values = (levels[None, :] - self.mean[n_raw:, None]) / self.scale[n_raw:, None]
+
+        self._mean_list = self.mean.tolist()
+        self._scale_list = self.scale.tolist()
+
+    def features(self, age, gender, esr, crp, rf, anti_ccp):
+        """N raw records -> (N, 10) scaled model input"""
+        raw = _as_float_columns(age, gender, esr, crp, rf, anti_ccp)
+        X_scaled = np.empty((raw[0].shape[0], len(MODEL_FEATURES)), dtype=np.float64)
+        for j, values in enumerate(raw):
+            np.subtract(values, self.mean[j], out=X_scaled[:, j])
+            X_scaled[:, j] /= self.scale[j]
+        for k, level in enumerate(feature_levels(*raw)):
+            X_scaled[:, len(raw) + k] = self.level_values[k][level]
+        _check_finite(X_scaled[:, :len(raw)])
+        return X_scaled
+
+    def feature_row(self, age, gender, esr, crp, rf, anti_ccp):
+        """One raw record -> (1, 10) scaled model input"""
+        raw = (age, gender, esr, crp, rf, anti_ccp)
+        values = raw + reference_ranges.level_row(*raw)
+        X_scaled = np.array([[(float(v) - m) / s for v, m, s in zip(values, self._mean_list, self._scale_list)]])
+        _check_finite(X_scaled)
+        return X_scaled
+
+def compile_scorer(bundle):
+    """Build the compiled scorer for the bundle's scaler (None -> two-step path only)"""
+    scaler = bundle.scaler
+    bundle.compiled_scorer = None
+    if not (hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_')):
+        logger.warning("⚠️ Scaler has no mean/scale - using two-step scoring")
+        return
+    n_features = len(MODEL_FEATURES)
+    try:
+        bundle.compiled_scorer = CompiledScorer(scaler.mean_ if scaler.with_mean else np.zeros(n_features),
+                                         scaler.scale_ if scaler.with_std else np.ones(n_features))
+        logger.info("✅ Compiled scorer ready (mode: %s)", SCORER_MODE)
+    except Exception as e:
+        logger.warning("⚠️ Could not compile scorer, using two-step scoring: %s", e)
+
+def _verify_scaled(X_compiled, X_two_step):
+    if not np.array_equal(X_compiled, X_two_step, equal_nan=True):
+        logger.warning("⚠️ VERIFY: compiled scorer input differs from two-step path")
+
+def model_inputs(age, gender, esr, crp, rf, anti_ccp):
+    """N raw records -> scaled model matrix (compiled scorer, or build + scaler for two-step)"""
+    age, gender, esr, crp, rf, anti_ccp = lab_precision_columns(age, gender, esr, crp, rf, anti_ccp)
+    compiled_scorer = current_bundle().compiled_scorer
+    if compiled_scorer is None or SCORER_MODE == 'two-step':
+        X_scaled = scale_features(build_feature_matrix(age, gender, esr, crp, rf, anti_ccp))
+    else:
+        X_scaled = compiled_scorer.features(age, gender, esr, crp, rf, anti_ccp)
+        if SCORER_MODE == 'verify':
+            _verify_scaled(X_scaled, scale_features(build_feature_matrix(age, gender, esr, crp, rf, anti_ccp)))
+    mark_stage('features')
+    return X_scaled
+
+def model_input_row(age, gender, esr, crp, rf, anti_ccp):
+    """Single-record model_inputs() without pandas or per-column arrays"""
+    age, esr, crp, rf, anti_ccp = (lab_precision_value(float(v)) for v in (age, esr, crp, rf, anti_ccp))
+    compiled_scorer = current_bundle().compiled_scorer
+    if compiled_scorer is None or SCORER_MODE == 'two-step':
+        X_scaled = scale_features(build_feature_row(age, gender, esr, crp, rf, anti_ccp))
     else:
-        rf_adj = 0 if RF < 20 else (1 if RF <= 40 else 2)
+        X_scaled = compiled_scorer.feature_row(age, gender, esr, crp, rf, anti_ccp)
+        if SCORER_MODE == 'verify':
+            _verify_scaled(X_scaled, scale_features(build_feature_row(age, gender, esr, crp, rf, anti_ccp)))
+    mark_stage('features')
+    return X_scaled
 
-    # --- Anti-CCP Adjustment (all ages) ---
-    anticcp_adj = 0 if Anti_CCP < 20 else (1 if Anti_CCP < 40 else 2)
+# ------------------------------------------------------------
+# 🌲 Native Tree Engine (native_model.NativeTreeEnsemble, used for small batches)
+# ------------------------------------------------------------
+# Above this many rows XGBoost's threaded C++ predictor beats NumPy traversal
+NATIVE_ENGINE_MAX_ROWS = int(os.environ.get('NATIVE_ENGINE_MAX_ROWS', 32))
+
+def export_native_model(bundle):
+    """Export the bundle's model to the native engine; keep model.predict_proba if anything fails"""
+    bundle.native_model = None
+    if INFERENCE_ENGINE != 'native':
+        logger.info("ℹ️ Inference engine: model.predict_proba (INFERENCE_ENGINE=%s)", INFERENCE_ENGINE)
+        return
+    try:
+        engine = checked_native_engine(bundle.model, len(MODEL_FEATURES))
+        bundle.native_model = engine
+        logger.info("✅ Native tree engine ready: %d trees, %d nodes, depth %d", engine.n_trees, engine.n_nodes, engine.max_depth)
+    except Exception as e:
+        logger.warning("⚠️ Native tree engine unavailable, using model.predict_proba: %s", e)
+
+def set_model_threads(n_threads):
+    """Cap XGBoost's thread pool for this process (each WSGI worker calls it after fork)"""
+    global model_threads
+    model_threads = n_threads
+    _apply_model_threads(active_bundle.model if active_bundle else None)
+
+def _apply_model_threads(model):
+    if model_threads is None or model is None:
+        return
+    estimators = [c.estimator for c in getattr(model, 'calibrated_classifiers_', [])] or [model]
+    for estimator in estimators:
+        if hasattr(estimator, 'get_booster'):
+            estimator.set_params(n_jobs=model_threads)
 
-    row['ESR_adj'] = esr_adj
-    row['CRP_adj'] = crp_adj
-    row['RF_adj'] = rf_adj
-    row['AntiCCP_adj'] = anticcp_adj
-    return row
+# ------------------------------------------------------------
+# 💾 Model Artifact (memory-mapped fast-start format, see native_model.py)
+# ------------------------------------------------------------
+# Scaler constants, the native engine's node arrays and the decision rule, mapped
+# without unpickling anything: no sklearn/xgboost import at startup, and preforked
+# workers share the pages.
+def export_model_artifact(bundle, path=None):
+    """Write the fast-start artifact for an eagerly loaded bundle (default: next to its pickles)"""
+    path = path or bundle.artifact_path
+    if bundle.is_fallback or bundle.model is None:
+        raise RuntimeError("no trained model loaded - run with STARTUP_MODE=eager and the model files present")
+    if bundle.compiled_scorer is None:
+        raise RuntimeError("scaler could not be compiled")
+
+    engine = bundle.native_model or checked_native_engine(bundle.model, len(MODEL_FEATURES))
+    arrays = {'scaler_mean': bundle.compiled_scorer.mean, 'scaler_scale': bundle.compiled_scorer.scale, **engine.to_arrays()}
+    return write_artifact(path, arrays, {
+        'model_version': bundle.version,
+        'model_fingerprint': bundle.fingerprint,
+        'model_files': list(bundle.model_files),
+        'features': MODEL_FEATURES,
+        'threshold': bundle.decision_threshold[0],
+        'threshold_inclusive': bundle.decision_threshold[1],
+        'classes': np.asarray(bundle.classes).tolist()
+    })
+
+def load_model_artifact(bundle):
+    """Fast-mode load: compiled scorer, native engine and decision rule from the artifact (False -> load pickles)"""
+    path = bundle.artifact_path
+    if SCORER_MODE != 'compiled' or INFERENCE_ENGINE != 'native':
+        logger.info("ℹ️ STARTUP_MODE=fast needs SCORER_MODE=compiled and INFERENCE_ENGINE=native, loading pickles")
+        return False
+    try:
+        manifest, arrays = read_artifact(path)
+        if manifest['model_fingerprint'] != bundle.fingerprint:
+            raise ValueError("artifact is stale (model files changed since it was exported)")
+        if manifest['features'] != MODEL_FEATURES:
+            raise ValueError("artifact was exported for different model features")
+
+        scorer = CompiledScorer(arrays['scaler_mean'], arrays['scaler_scale'])
+        engine = NativeTreeEnsemble.from_arrays(arrays)
+    except Exception as e:
+        logger.warning("⚠️ Model artifact %s unusable, loading pickles: %s", path, e)
+        return False
+
+    bundle.compiled_scorer, bundle.native_model = scorer, engine
+    bundle.decision_threshold = (float(manifest['threshold']), bool(manifest['threshold_inclusive']))
+    bundle.classes = np.asarray(manifest['classes'])
+    logger.info("✅ Model %s artifact mapped from %s: %d trees, %d nodes (pickles load in the background)",
+                bundle.version, path, engine.n_trees, engine.n_nodes)
+    return True
+
+# ------------------------------------------------------------
+# 🎯 Single-Evaluation Inference Contract
+# ------------------------------------------------------------
+def load_decision_threshold(bundle):
+    """Read the model's decision rule once so labels can be derived from P(RA)"""
+    model = bundle.model
+    bundle.classes = model.classes_
+    # Threshold-tuned sklearn wrappers predict positive when score >= threshold;
+    # plain classifiers predict argmax, i.e. positive only when P(RA) > 0.5
+    tuned = getattr(model, 'best_threshold_', None)
+    if tuned is None:
+        tuned = getattr(model, 'threshold', None)
+    if isinstance(tuned, (int, float)) and not isinstance(tuned, bool):
+        bundle.decision_threshold = (float(tuned), True)
+    else:
+        bundle.decision_threshold = (0.5, False)
+    logger.info("✅ Decision threshold: P(RA) %s %s", '>=' if bundle.decision_threshold[1] else '>', bundle.decision_threshold[0])
+
+def model_probabilities(X_scaled):
+    """P(RA) for every row of a scaled model matrix"""
+    bundle = current_bundle()
+    # A fast-mode bundle also scores large batches natively until its unpickled model lands
+    if bundle.native_model is not None and (X_scaled.shape[0] <= NATIVE_ENGINE_MAX_ROWS or bundle.model is None):
+        return bundle.native_model.predict_positive(X_scaled)
+    return bundle.full_model().predict_proba(X_scaled)[:, 1]
+
+def labels_from_probabilities(probs):
+    """Binary predictions from P(RA) using the threshold read at load time"""
+    bundle = current_bundle()
+    threshold, inclusive = bundle.decision_threshold
+    positive = probs >= threshold if inclusive else probs > threshold
+    return np.where(positive, bundle.classes[1], bundle.classes[0])
+
+def evaluate_model(X_scaled):
+    """The ONE model evaluation per scored matrix: (P(RA), binary labels derived from it)
+
+    Every endpoint scores through here; never call model.predict next to
+    predict_proba, that runs the whole ensemble a second time.
+    """
+    probs = model_probabilities(X_scaled)
+    labels = labels_from_probabilities(probs)
+    mark_stage('model')
+    return probs, labels
 
 def percent_change(old, new):
     """YOUR EXACT percentage change calculation"""
     return round(((new - old) / old) * 100, 2) if old != 0 else 0
 
+# ------------------------------------------------------------
+# 🧪 Cached Scoring (what the endpoints call)
+# ------------------------------------------------------------
+def canonical_lab_record(age, gender, esr, crp, rf, anti_ccp):
+    """Cache key: the values the model sees (lab values at LAB_PRECISION), gender as 0/1"""
+    return (lab_precision_value(float(age)), int(gender), lab_precision_value(float(esr)),
+            lab_precision_value(float(crp)), lab_precision_value(float(rf)), lab_precision_value(float(anti_ccp)))
+
+def _cacheable(record):
+    return prediction_cache.enabled and not in_warm_up() and all(np.isfinite(v) for v in record)
+
+def score_lab_records(age, gender, esr, crp, rf, anti_ccp):
+    """(P(RA), labels) for N raw records; only cache misses reach the model, in one evaluation.
+
+    Every path scores lab values at LAB_PRECISION (model_inputs rounds them),
+    so a cached and a fresh answer are always the same number. Batches above
+    PREDICTION_CACHE_MAX_BATCH skip the cache.
+    """
+    if not prediction_cache.enabled or len(age) > PREDICTION_CACHE_MAX_BATCH:
+        return evaluate_model(model_inputs(age, gender, esr, crp, rf, anti_ccp))
+
+    fingerprint = current_bundle().fingerprint
+    records = [canonical_lab_record(*values) for values in zip(age, gender, esr, crp, rf, anti_ccp)]
+    cacheable = [_cacheable(r) for r in records]
+    cached = prediction_cache.get_many([r for r, ok in zip(records, cacheable) if ok], fingerprint)
+    cached = iter(cached)
+    mark_stage('cache')
+
+    probs = np.empty(len(records), dtype=np.float64)
+    misses = []
+    for i, ok in enumerate(cacheable):
+        hit = next(cached) if ok else None
+        if hit is None:
+            misses.append(i)
+        else:
+            probs[i] = hit
+
+    if misses:
+        columns = list(zip(*[records[i] for i in misses]))
+        miss_probs, _ = evaluate_model(model_inputs(*columns))
+        probs[misses] = miss_probs
+        stored = [i for i in misses if cacheable[i]]
+        prediction_cache.put_many([records[i] for i in stored], probs[stored].tolist(), fingerprint)
+        mark_stage('cache')
+
+    return probs, labels_from_probabilities(probs)
+
+def score_lab_record(age, gender, esr, crp, rf, anti_ccp):
+    """Single-record score_lab_records() on the pandas-free row path: (P(RA), label)"""
+    if micro_batcher.enabled and not in_warm_up():
+        return micro_batcher.score(age, gender, esr, crp, rf, anti_ccp)
+    if not prediction_cache.enabled:
+        probs, labels = evaluate_model(model_input_row(age, gender, esr, crp, rf, anti_ccp))
+        return probs[0], labels[0]
+
+    fingerprint = current_bundle().fingerprint
+    record = canonical_lab_record(age, gender, esr, crp, rf, anti_ccp)
+    ok = _cacheable(record)
+    prob = prediction_cache.get_many([record], fingerprint)[0] if ok else None
+    mark_stage('cache')
+    if prob is None:
+        probs, _ = evaluate_model(model_input_row(*record))
+        prob = probs[0]
+        if ok:
+            prediction_cache.put_many([record], [float(prob)], fingerprint)
+            mark_stage('cache')
+    prob = np.float64(prob)
+    return prob, labels_from_probabilities(np.array([prob]))[0]
+
+# ------------------------------------------------------------
+# 🧺 Micro-Batching (concurrent single-record scores share one evaluation)
+# ------------------------------------------------------------
+MICRO_BATCH_WINDOW_MS = float(os.environ.get('MICRO_BATCH_WINDOW_MS', 0))   # 0 disables coalescing
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('MICRO_BATCH_MAX_SIZE', 32))
+
+# Records per batch / records queued when one joins
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256)
+
+class _BatchSlot:
+    __slots__ = ('record', 'done', 'prob', 'label', 'error')
+
+    def __init__(self, record):
+        self.record = record
+        self.done = threading.Event()
+        self.prob = self.label = self.error = None
+
+class MicroBatcher:
+    """Coalesces single-record scores from concurrent requests into one score_lab_records call.
+
+    The first record to arrive for a model bundle leads a batch: its thread
+    waits up to the window for others to join, then scores the whole batch
+    and hands each waiting thread its own row. The wait is adaptive: it ends
+    as soon as every request in flight in this process has joined (so a lone
+    request is scored immediately) or the batch is full.
+    """
+
+    def __init__(self, window_ms, max_size):
+        self.window = window_ms / 1000
+        self.max_size = max(1, max_size)
+        self.enabled = self.window > 0 and self.max_size > 1
+        self._cond = threading.Condition()
+        self._open = {}          # bundle -> slots of the batch still accepting records
+        self.in_flight = 0       # requests being handled by this process
+        self.queued = 0          # records waiting in open batches
+        self.batch_sizes = LatencyHistogram(BATCH_SIZE_BUCKETS)
+        self.queue_depths = LatencyHistogram(BATCH_SIZE_BUCKETS)
+        self.waits = LatencyHistogram()
+
+    def request_started(self):
+        with self._cond:
+            self.in_flight += 1
+
+    def request_finished(self):
+        with self._cond:
+            self.in_flight -= 1
+            self._cond.notify_all()
+
+    def score(self, age, gender, esr, crp, rf, anti_ccp):
+        """(P(RA), label) for one record, scored together with whatever arrives alongside it"""
+        started = time.perf_counter()
+        bundle = current_bundle()
+        slot = _BatchSlot((age, gender, esr, crp, rf, anti_ccp))
+        with self._cond:
+            batch = self._open.get(bundle)
+            leader = batch is None or len(batch) >= self.max_size
+            if leader:
+                batch = self._open[bundle] = []
+            batch.append(slot)
+            self.queued += 1
+            self.queue_depths.observe(self.queued)
+            self._cond.notify_all()
+
+            if leader:
+                deadline = started + self.window
+                while len(batch) < min(self.max_size, self.in_flight):
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if self._open.get(bundle) is batch:
+                    del self._open[bundle]
+                self.queued -= len(batch)
+                self.batch_sizes.observe(len(batch))
+
+        if leader:
+            mark_stage('batch_wait')
+            self._run(batch)
+        else:
+            slot.done.wait()
+            mark_stage('batch_wait')
+        with self._cond:
+            self.waits.observe(time.perf_counter() - started)
+        if slot.error is not None:
+            raise slot.error
+        return slot.prob, slot.label
+
+    def _run(self, batch):
+        try:
+            probs, labels = score_lab_records(*zip(*[slot.record for slot in batch]))
+            for slot, prob, label in zip(batch, probs, labels):
+                slot.prob, slot.label = prob, label
+        except Exception as e:
+            for slot in batch:
+                slot.error = e
+        for slot in batch:
+            slot.done.set()
+
+    def exposition(self):
+        with self._cond:
+            lines = [
+                '# HELP arthrocare_micro_batch_queue_depth Records waiting in open micro-batches.',
+                '# TYPE arthrocare_micro_batch_queue_depth gauge',
+                f'arthrocare_micro_batch_queue_depth {self.queued}',
+                '# HELP arthrocare_micro_batch_size Records scored per micro-batch.',
+                '# TYPE arthrocare_micro_batch_size histogram'
+            ]
+            lines += self.batch_sizes.exposition('arthrocare_micro_batch_size', f'window_ms="{MICRO_BATCH_WINDOW_MS:g}"')
+            lines += [
+                '# HELP arthrocare_micro_batch_queued_records Queue depth seen by each record as it joined a batch.',
+                '# TYPE arthrocare_micro_batch_queued_records histogram'
+            ]
+            lines += self.queue_depths.exposition('arthrocare_micro_batch_queued_records', f'window_ms="{MICRO_BATCH_WINDOW_MS:g}"')
+            lines += [
+                '# HELP arthrocare_micro_batch_wait_seconds Time from joining a batch to holding its result.',
+                '# TYPE arthrocare_micro_batch_wait_seconds histogram'
+            ]
+            lines += self.waits.exposition('arthrocare_micro_batch_wait_seconds', f'window_ms="{MICRO_BATCH_WINDOW_MS:g}"')
+            return lines
+
+micro_batcher = MicroBatcher(MICRO_BATCH_WINDOW_MS, MICRO_BATCH_MAX_SIZE)
+
+@app.before_request
+def _count_request_in_flight():
+    if micro_batcher.enabled and not in_warm_up():
+        micro_batcher.request_started()
+        request.environ['arthrocare.in_flight'] = True
+
+@app.teardown_request
+def _count_request_finished(exc):
+    if request.environ.pop('arthrocare.in_flight', False):
+        micro_batcher.request_finished()
+
+# Load models when app starts
+load_models()
+
+# ------------------------------------------------------------
+# 📋 Request Schemas (declarative, compiled once into validators)
+# ------------------------------------------------------------
+class ValidationError(ValueError):
+    """Rejected request fields; .errors is [{'field': ..., 'message': ...}]"""
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('Invalid request: ' + ', '.join(
+            f"{e['field']} {e['message']}" if e['field'] else e['message'] for e in errors))
+
+    def body(self):
+        return {'error': str(self), 'fields': self.errors}
+
+def validation_failed(e):
+    """Structured 400 for a ValidationError"""
+    return jsonify(e.body()), 400
+
+def request_json():
+    """The parsed JSON body; a malformed or non-JSON body raises ValidationError (a structured 400)"""
+    try:
+        return request.get_json()
+    except UnsupportedMediaType:
+        raise ValidationError([{'field': None, 'message': 'Content-Type must be application/json'}]) from None
+    except BadRequest:
+        raise ValidationError([{'field': None, 'message': 'Request body is not valid JSON'}]) from None
+
+def _number(value):
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ValueError('must be a number') from None
+    if not math.isfinite(number):
+        raise ValueError('must be finite')
+    return number
+
+def _integer(value):
+    # int() semantics, as the endpoints always used: 45.7 -> 45, "45" -> 45
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError('must be an integer') from None
+
+_FLAG_STRINGS = {'true': True, 'yes': True, 'y': True, '1': True,
+                 'false': False, 'no': False, 'n': False, '0': False, '': False}
+
+def _flag(value):
+    if isinstance(value, str):
+        try:
+            return _FLAG_STRINGS[value.strip().lower()]
+        except KeyError:
+            raise ValueError('must be true or false') from None
+    return bool(value)
+
+def _enum(values, fallback):
+    """Case-insensitive lookup in `values`; anything else maps to `fallback`"""
+    def coerce(value):
+        return values.get(str(value).strip().lower(), fallback)
+    return coerce
+
+COERCERS = {'number': _number, 'integer': _integer, 'flag': _flag}
+
+class Field:
+    """One request field: where it goes in the parsed record and how it is coerced.
+
+    Optional fields take `missing` when absent or falsy (the old `x or 0`);
+    enum fields map their normalized text through `values`, unknown text to
+    `fallback`.
+    """
+    __slots__ = ('name', 'key', 'coerce', 'required', 'missing')
+
+    def __init__(self, name, kind, key=None, required=True, missing=None, values=None, fallback=None):
+        self.name = name
+        self.key = key or name
+        self.coerce = _enum(values, fallback) if kind == 'enum' else COERCERS[kind]
+        self.required = required
+        self.missing = missing
+
+class RequestSchema:
+    """Fields compiled into a validator for single records and arrays of records"""
+
+    def __init__(self, fields):
+        self.fields = tuple(fields)
+        self.required_fields = [f.name for f in self.fields if f.required]
+        self._steps = tuple((f.name, f.key, f.coerce, f.required, f.missing) for f in self.fields)
+
+    def apply(self, data):
+        """(record, None) or (None, errors)"""
+        if not isinstance(data, dict):
+            return None, [{'field': None, 'message': 'Record must be a JSON object'}]
+        record = {}
+        errors = []
+        for name, key, coerce, required, missing in self._steps:
+            value = data.get(name)
+            if required:
+                if name not in data:
+                    errors.append({'field': name, 'message': 'is required'})
+                    continue
+            elif not value:
+                record[key] = missing
+                continue
+            try:
+                record[key] = coerce(value)
+            except ValueError as e:
+                errors.append({'field': name, 'message': str(e)})
+        return (None, errors) if errors else (record, None)
+
+    def validate(self, data):
+        """Parsed record, or raise ValidationError listing every bad field"""
+        record, errors = self.apply(data)
+        if errors:
+            raise ValidationError(errors)
+        return record
+
+    def validate_many(self, items):
+        """[(record, None) or (None, errors)] for an array of records"""
+        apply = self.apply
+        return [apply(item) for item in items]
+
+# 1 = male; anything else is scored as female. Each endpoint keeps the spellings it always accepted:
+# compare-ra-risk only ever read 'M' as male, and recommendations read '1' as female
+GENDER_VALUES = {'male': 1, 'm': 1, '1': 1}
+COMPARE_GENDER_VALUES = {'m': 1}
+RECOMMENDATION_GENDER_VALUES = {'male': 1, 'm': 1}
+SMOKING_VALUES = {'never': 0, 'former': 1, 'current': 2, 'no': 0, 'quit': 1, 'yes': 2}
+DRINKING_VALUES = {'never': 'Almost non-drinker', 'moderate': 'Occasional drinker', 'regular': 'Frequent drinker'}
+
+PREDICTION_SCHEMA = RequestSchema([
+    Field('age', 'number'),
+    Field('gender', 'enum', key='gender_num', values=GENDER_VALUES, fallback=0),
+    Field('rheumatoidFactor', 'number', key='rf'),
+    Field('antiCCP', 'number', key='anti_ccp'),
+    Field('cReactiveProtein', 'number', key='crp'),
+    Field('erythrocyteSedimentationRate', 'number', key='esr'),
+])
+
+COMPARE_SCHEMA = RequestSchema([
+    Field('monthsSinceLastTest', 'number', key='months'),
+    *[field
+      for visit in ('previous', 'current')
+      for field in (
+          Field(f'{visit}Age', 'number'),
+          Field(f'{visit}Gender', 'enum', values=COMPARE_GENDER_VALUES, fallback=0),
+          Field(f'{visit}ESR', 'number'),
+          Field(f'{visit}CRP', 'number'),
+          Field(f'{visit}RF', 'number'),
+          Field(f'{visit}AntiCCP', 'number'),
+      )]
+])
+
+# One visit of a trajectory; every visit after the first says how long after the previous one it was
+VISIT_FIELDS = [
+    Field('age', 'number'),
+    Field('gender', 'enum', values=GENDER_VALUES, fallback=0),
+    Field('ESR', 'number'),
+    Field('CRP', 'number'),
+    Field('RF', 'number'),
+    Field('AntiCCP', 'number'),
+]
+FIRST_VISIT_SCHEMA = RequestSchema(VISIT_FIELDS)
+VISIT_SCHEMA = RequestSchema([Field('monthsSincePrevious', 'number', key='months'), *VISIT_FIELDS])
+
+RECOMMENDATION_SCHEMA = RequestSchema([
+    Field('age', 'integer'),
+    Field('gender', 'enum', key='gender_num', values=RECOMMENDATION_GENDER_VALUES, fallback=0),
+    Field('smokingStatus', 'enum', key='smoke_num', values=SMOKING_VALUES, fallback=0),
+    Field('drinkingStatus', 'enum', key='drink_cat', values=DRINKING_VALUES, fallback='Almost non-drinker'),
+    Field('rheumatoidArthritis', 'integer', key='ra_flag'),
+    # Optional fields with defaults
+    Field('ESR', 'number', required=False, missing=0.0),
+    Field('CRP', 'number', required=False, missing=0.0),
+    Field('RF', 'number', required=False, missing=0.0),
+    Field('AntiCCP', 'number', key='Anti_CCP', required=False, missing=0.0),
+    Field('weight', 'number', key='weight_kg', required=False, missing=None),
+    Field('vegetarian', 'flag', required=False, missing=False),
+])
+
 # ------------------------------------------------------------
 # 🏠 Root Endpoint
 # ------------------------------------------------------------
@@ -138,12 +1475,18 @@ def home():
         "endpoints": {
             "health_check": "GET /api/health",
             "progress_tracking": "POST /api/compare-ra-risk", 
+            "risk_trajectory": "POST /api/ra-risk-trajectory",
             "single_prediction": "POST /api/predict-ra-risk",
+            "batch_prediction": "POST /api/predict-ra-risk/batch",
             "recommendations": "POST /api/generate-recommendations",
-            "recommendations_health": "GET /api/recommendations-health"
+            "bulk_recommendations": "POST /api/generate-recommendations/batch",
+            "recommendations_health": "GET /api/recommendations-health",
+            "metrics": "GET /api/metrics",
+            "readiness": "GET /api/ready",
+            "model_reload": "GET|POST /api/admin/reload"
         },
-        "model_loaded": model is not None,
-        "using_real_model": "RA_model.pkl" in str(type(model))
+        "model_loaded": model_available(),
+        "using_real_model": real_model_loaded()
     })
 
 # ------------------------------------------------------------
@@ -151,134 +1494,136 @@ def home():
 # ------------------------------------------------------------
 @app.route('/api/health', methods=['GET'])
 def health():
+    bundle = current_bundle()
     return jsonify({
         'status': 'healthy',
         'message': 'RA Prediction API with Real ML Model',
-        'model_loaded': model is not None,
-        'scaler_loaded': scaler is not None,
-        'model_type': 'Your Trained XGBoost' if model else 'Fallback'
+        'model_loaded': model_available(),
+        'scaler_loaded': bundle.scaler is not None or bundle.compiled_scorer is not None,
+        'model_type': 'Your Trained XGBoost' if real_model_loaded() else 'Fallback',
+        'model_version': bundle.version,
+        'model': bundle.describe(),
+        'inference_engine': 'native' if bundle.native_model is not None else 'model',
+        'prediction_cache': prediction_cache.stats(),
+        'startup': startup_timings,
+        'ready': is_ready()
     })
 
+# ------------------------------------------------------------
+# 📈 Metrics Endpoint (Prometheus text exposition format, per worker process)
+# ------------------------------------------------------------
+@app.route('/api/metrics', methods=['GET'])
+def metrics_endpoint():
+    cache = prediction_cache.stats()
+    cache_lines = []
+    for key in ('hits', 'misses', 'shared_hits', 'evictions'):
+        cache_lines += [
+            f'# TYPE arthrocare_prediction_cache_{key}_total counter',
+            f'arthrocare_prediction_cache_{key}_total {cache[key]}'
+        ]
+    if micro_batcher.enabled:
+        cache_lines += micro_batcher.exposition()
+    return Response(metrics.render(cache_lines), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # ------------------------------------------------------------
 # 🔄 Progress Tracking Comparison API Endpoint (YOUR EXACT CODE)
 # ------------------------------------------------------------
+def interval_interpretation(prev_prob, curr_prob, esr_prev, esr_now, crp_prev, crp_now):
+    """Clinical interpretation messages for the change between two visits"""
+    # YOUR EXACT CODE: Clinical Interpretation
+    clinical_interpretation = []
+    if curr_prob - prev_prob > 0.15:
+        clinical_interpretation.append("Your RA risk has significantly increased since your last visit. 🔴")
+        clinical_interpretation.append("This indicates possible disease progression.")
+    elif prev_prob - curr_prob > 0.15:
+        clinical_interpretation.append("Your RA risk has reduced noticeably. 🟢")
+        clinical_interpretation.append("This suggests improvement or good response to treatment.")
+    else:
+        clinical_interpretation.append("RA risk remains relatively stable with mild fluctuations. 🟡")
+
+    # YOUR EXACT CODE: Biomarker trends
+    if esr_now > esr_prev + 10 or crp_now > crp_prev + 5:
+        clinical_interpretation.append("Inflammation markers have increased — monitor closely. ⚠️")
+    elif esr_now < esr_prev - 10 or crp_now < crp_prev - 5:
+        clinical_interpretation.append("Inflammation markers have decreased — good progress. 🟢")
+    else:
+        clinical_interpretation.append("Inflammation remains stable. 🟡")
+    return clinical_interpretation
+
+def risk_trend(prev_prob, curr_prob):
+    # YOUR EXACT CODE: Final summary
+    return 'Improved' if curr_prob < prev_prob else 'Worsened' if curr_prob > prev_prob else 'Stable'
+
+TRACKED_BIOMARKERS = ('ESR', 'CRP', 'RF', 'Anti-CCP')
+
+def biomarker_changes(previous, current):
+    """biomarkerChanges entries for (ESR, CRP, RF, Anti-CCP) values at two visits"""
+    changes = []
+    for name, prev, now in zip(TRACKED_BIOMARKERS, previous, current):
+        change = percent_change(prev, now)
+        changes.append({'name': name, 'change': f"{prev} → {now} ({change}%)", 'percentChange': change})
+    return changes
+
 @app.route('/api/compare-ra-risk', methods=['POST', 'OPTIONS'])
 def compare_ra_risk():
-    print("🎯 PROGRESS TRACKING ENDPOINT CALLED!")
+    logger.debug("🎯 PROGRESS TRACKING ENDPOINT CALLED!")
     
     if request.method == 'OPTIONS':
         return '', 200
         
     try:
-        data = request.get_json()
-        print(f"📥 Received progress tracking data")
+        data = request_json()
+        log_payload('compare-ra-risk', data)
+        mark_stage('parse')
         
         if not data:
             return jsonify({'error': 'No data received'}), 400
 
-        # Validate required fields
-        required_fields = [
-            'monthsSinceLastTest',
-            'previousAge', 'previousGender', 'previousESR', 'previousCRP', 'previousRF', 'previousAntiCCP',
-            'currentAge', 'currentGender', 'currentESR', 'currentCRP', 'currentRF', 'currentAntiCCP'
-        ]
-        
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            return jsonify({'error': f'Missing required fields: {missing_fields}'}), 400
-
-        # Extract data - EXACTLY as in your trained code
-        months = float(data['monthsSinceLastTest'])
+        # Validate and extract data
+        try:
+            tests = COMPARE_SCHEMA.validate(data)
+        except ValidationError as e:
+            return validation_failed(e)
+        months = tests['months']
         
         # Previous test data
-        age_prev = float(data['previousAge'])
-        gender_prev = data['previousGender'].upper()
-        gender_prev_num = 1 if gender_prev == 'M' else 0
-        ESR_prev = float(data['previousESR'])
-        CRP_prev = float(data['previousCRP'])
-        RF_prev = float(data['previousRF'])
-        Anti_CCP_prev = float(data['previousAntiCCP'])
+        age_prev = tests['previousAge']
+        gender_prev_num = tests['previousGender']
+        ESR_prev = tests['previousESR']
+        CRP_prev = tests['previousCRP']
+        RF_prev = tests['previousRF']
+        Anti_CCP_prev = tests['previousAntiCCP']
         
         # Current test data  
-        age_now = float(data['currentAge'])
-        gender_now = data['currentGender'].upper()
-        gender_now_num = 1 if gender_now == 'M' else 0
-        ESR_now = float(data['currentESR'])
-        CRP_now = float(data['currentCRP'])
-        RF_now = float(data['currentRF'])
-        Anti_CCP_now = float(data['currentAntiCCP'])
-
-        print(f"🔍 Processing: {months} months between tests")
-        print(f"📊 Previous: Age={age_prev}, Gender={gender_prev}, ESR={ESR_prev}, CRP={CRP_prev}, RF={RF_prev}, Anti-CCP={Anti_CCP_prev}")
-        print(f"📊 Current: Age={age_now}, Gender={gender_now}, ESR={ESR_now}, CRP={CRP_now}, RF={RF_now}, Anti-CCP={Anti_CCP_now}")
-
-        # YOUR EXACT CODE: Process previous test data
-        prev_data = pd.DataFrame([{
-            'Age': age_prev,
-            'Gender': gender_prev_num,
-            'ESR': ESR_prev,
-            'CRP': CRP_prev,
-            'RF': RF_prev,
-            'Anti-CCP': Anti_CCP_prev
-        }])
-
-        prev_data = prev_data.apply(adjust_by_age_gender, axis=1)
-
-        features = ['Age','Gender','ESR','CRP','RF','Anti-CCP',
-                    'ESR_adj','CRP_adj','RF_adj','AntiCCP_adj']
-
-        prev_scaled = scaler.transform(prev_data[features])
-        prev_prob = model.predict_proba(prev_scaled)[0][1]
-
-        print(f"🎯 First Appointment Probability: {prev_prob*100:.2f}% ✅")
-
-        # YOUR EXACT CODE: Process current test data
-        curr_data = pd.DataFrame([{
-            'Age': age_now,
-            'Gender': gender_now_num,
-            'ESR': ESR_now,
-            'CRP': CRP_now,
-            'RF': RF_now,
-            'Anti-CCP': Anti_CCP_now
-        }])
-
-        curr_data = curr_data.apply(adjust_by_age_gender, axis=1)
-        curr_scaled = scaler.transform(curr_data[features])
-        curr_prob = model.predict_proba(curr_scaled)[0][1]
-
-        print(f"🎯 Current Appointment Probability: {curr_prob*100:.2f}% 🔥")
+        age_now = tests['currentAge']
+        gender_now_num = tests['currentGender']
+        ESR_now = tests['currentESR']
+        CRP_now = tests['currentCRP']
+        RF_now = tests['currentRF']
+        Anti_CCP_now = tests['currentAntiCCP']
+        mark_stage('validate')
+
+        logger.debug("🔍 Processing: %s months between tests", months)
+
+        # Score previous & current tests together (row 0 = previous, row 1 = current)
+        probs, _ = score_lab_records(
+            [age_prev, age_now],
+            [gender_prev_num, gender_now_num],
+            [ESR_prev, ESR_now],
+            [CRP_prev, CRP_now],
+            [RF_prev, RF_now],
+            [Anti_CCP_prev, Anti_CCP_now]
+        )
+        prev_prob, curr_prob = probs[0], probs[1]
+
+        logger.debug("🎯 Appointment probabilities - first: %.4f, current: %.4f", prev_prob, curr_prob)
 
         # YOUR EXACT CODE: Calculate changes
         probability_change = percent_change(prev_prob, curr_prob)
-        esr_change = percent_change(ESR_prev, ESR_now)
-        crp_change = percent_change(CRP_prev, CRP_now)
-        rf_change = percent_change(RF_prev, RF_now)
-        anti_ccp_change = percent_change(Anti_CCP_prev, Anti_CCP_now)
-
-        print(f"📊 Probability Change: {round(prev_prob*100,2)}% → {round(curr_prob*100,2)}%")
-        print(f"📊 Change: {probability_change}%")
-
-        # YOUR EXACT CODE: Clinical Interpretation
-        clinical_interpretation = []
-        if curr_prob - prev_prob > 0.15:
-            clinical_interpretation.append("Your RA risk has significantly increased since your last visit. 🔴")
-            clinical_interpretation.append("This indicates possible disease progression.")
-        elif prev_prob - curr_prob > 0.15:
-            clinical_interpretation.append("Your RA risk has reduced noticeably. 🟢")
-            clinical_interpretation.append("This suggests improvement or good response to treatment.")
-        else:
-            clinical_interpretation.append("RA risk remains relatively stable with mild fluctuations. 🟡")
-
-        # YOUR EXACT CODE: Biomarker trends
-        if ESR_now > ESR_prev + 10 or CRP_now > CRP_prev + 5:
-            clinical_interpretation.append("Inflammation markers have increased — monitor closely. ⚠️")
-        elif ESR_now < ESR_prev - 10 or CRP_now < CRP_prev - 5:
-            clinical_interpretation.append("Inflammation markers have decreased — good progress. 🟢")
-        else:
-            clinical_interpretation.append("Inflammation remains stable. 🟡")
+        logger.debug("📊 Probability change: %s%%", probability_change)
 
-        # YOUR EXACT CODE: Final summary
-        overall_trend = 'Improved' if curr_prob < prev_prob else 'Worsened' if curr_prob > prev_prob else 'Stable'
+        clinical_interpretation = interval_interpretation(prev_prob, curr_prob, ESR_prev, ESR_now, CRP_prev, CRP_now)
+        overall_trend = risk_trend(prev_prob, curr_prob)
 
         # Prepare response
         response = {
@@ -286,12 +1631,8 @@ def compare_ra_risk():
             'currentProbability': round(curr_prob * 100, 2),
             'probabilityChange': probability_change,
             'monthsBetweenTests': months,
-            'biomarkerChanges': [
-                {'name': 'ESR', 'change': f"{ESR_prev} → {ESR_now} ({esr_change}%)", 'percentChange': esr_change},
-                {'name': 'CRP', 'change': f"{CRP_prev} → {CRP_now} ({crp_change}%)", 'percentChange': crp_change},
-                {'name': 'RF', 'change': f"{RF_prev} → {RF_now} ({rf_change}%)", 'percentChange': rf_change},
-                {'name': 'Anti-CCP', 'change': f"{Anti_CCP_prev} → {Anti_CCP_now} ({anti_ccp_change}%)", 'percentChange': anti_ccp_change}
-            ],
+            'biomarkerChanges': biomarker_changes((ESR_prev, CRP_prev, RF_prev, Anti_CCP_prev),
+                                                  (ESR_now, CRP_now, RF_now, Anti_CCP_now)),
             'interpretation': " ".join(clinical_interpretation),
             'summary': f"First Appointment RA Probability: {round(prev_prob*100,2)}%\nCurrent Appointment RA Probability: {round(curr_prob*100,2)}%\nOverall Trend: {overall_trend}\nReport generation complete. ✔",
             'riskTrend': overall_trend,
@@ -316,222 +1657,450 @@ def compare_ra_risk():
                 }
             }
         }
+        response['model_version'] = current_bundle().version
+        mark_stage('respond')
 
-        print("✅ Progress tracking completed successfully!")
+        logger.debug("✅ Progress tracking completed successfully!")
         return jsonify(response)
 
+    except ValidationError as e:
+        return validation_failed(e)
     except Exception as e:
-        print(f"❌ Error in progress tracking: {e}")
-        traceback.print_exc()
+        logger.exception("❌ Error in progress tracking: %s", e)
         return jsonify({'error': f'Progress tracking failed: {str(e)}'}), 500
 
+# ------------------------------------------------------------
+# 📈 Risk Trajectory (N visits, one model evaluation)
+# ------------------------------------------------------------
+MAX_TRAJECTORY_VISITS = int(os.environ.get('MAX_TRAJECTORY_VISITS', 100))
+
+def parse_visits(data):
+    """Validated visits (oldest first) from a trajectory payload; raises ValidationError"""
+    visits = data.get('visits') if isinstance(data, dict) else None
+    if not isinstance(visits, list):
+        raise ValidationError([{'field': 'visits', 'message': 'must be a list of visits'}])
+    if not 2 <= len(visits) <= MAX_TRAJECTORY_VISITS:
+        raise ValidationError([{'field': 'visits', 'message': f'must hold 2 to {MAX_TRAJECTORY_VISITS} visits'}])
+
+    parsed, errors = [], []
+    for i, visit in enumerate(visits):
+        record, visit_errors = (VISIT_SCHEMA if i else FIRST_VISIT_SCHEMA).apply(visit)
+        if visit_errors:
+            errors += [{'field': f"visits[{i}].{e['field']}" if e['field'] else f'visits[{i}]', 'message': e['message']}
+                       for e in visit_errors]
+        else:
+            parsed.append(record)
+    if errors:
+        raise ValidationError(errors)
+    return parsed
+
+def trajectory_interval(visits, probs, start, end, months):
+    """Change between visits[start] and visits[end], shaped like a compare-ra-risk result"""
+    prev, curr = visits[start], visits[end]
+    prev_prob, curr_prob = probs[start], probs[end]
+    return {
+        'fromVisit': start + 1,
+        'toVisit': end + 1,
+        'months': months,
+        'previousProbability': round(prev_prob * 100, 2),
+        'currentProbability': round(curr_prob * 100, 2),
+        'probabilityChange': percent_change(prev_prob, curr_prob),
+        'biomarkerChanges': biomarker_changes((prev['ESR'], prev['CRP'], prev['RF'], prev['AntiCCP']),
+                                              (curr['ESR'], curr['CRP'], curr['RF'], curr['AntiCCP'])),
+        'interpretation': " ".join(interval_interpretation(prev_prob, curr_prob, prev['ESR'], curr['ESR'],
+                                                           prev['CRP'], curr['CRP'])),
+        'riskTrend': risk_trend(prev_prob, curr_prob)
+    }
+
+@app.route('/api/ra-risk-trajectory', methods=['POST', 'OPTIONS'])
+def ra_risk_trajectory():
+    """compare-ra-risk for an ordered list of visits: every interval, plus first -> latest"""
+    logger.debug("🎯 RISK TRAJECTORY ENDPOINT CALLED!")
+
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    try:
+        data = request_json()
+        log_payload('ra-risk-trajectory', data)
+        mark_stage('parse')
+
+        if not data:
+            return jsonify({'error': 'No data received'}), 400
+
+        try:
+            visits = parse_visits(data)
+        except ValidationError as e:
+            return validation_failed(e)
+        mark_stage('validate')
+
+        # Every visit scored in ONE model evaluation
+        probs, _ = score_lab_records(
+            [v['age'] for v in visits],
+            [v['gender'] for v in visits],
+            [v['ESR'] for v in visits],
+            [v['CRP'] for v in visits],
+            [v['RF'] for v in visits],
+            [v['AntiCCP'] for v in visits]
+        )
+        probs = probs.tolist()
+
+        timeline = []
+        months_from_first = 0.0
+        for i, (visit, prob) in enumerate(zip(visits, probs)):
+            if i:
+                months_from_first += visit['months']
+            timeline.append({
+                'visit': i + 1,
+                'monthsSincePrevious': visit['months'] if i else None,
+                'monthsSinceFirst': months_from_first,
+                'age': visit['age'],
+                'gender': 'Male' if visit['gender'] == 1 else 'Female',
+                'ESR': visit['ESR'],
+                'CRP': visit['CRP'],
+                'RF': visit['RF'],
+                'Anti-CCP': visit['AntiCCP'],
+                'probability': round(prob * 100, 2)
+            })
+
+        intervals = [trajectory_interval(visits, probs, i - 1, i, visits[i]['months']) for i in range(1, len(visits))]
+        overall = trajectory_interval(visits, probs, 0, len(visits) - 1, months_from_first)
+        response = {
+            'visits': timeline,
+            'intervals': intervals,
+            'overall': overall,
+            'riskTrend': overall['riskTrend'],
+            'summary': f"First Appointment RA Probability: {overall['previousProbability']}%\nLatest Appointment RA Probability: {overall['currentProbability']}%\nOverall Trend: {overall['riskTrend']} over {len(visits)} visits\nReport generation complete. ✔",
+            'model_version': current_bundle().version
+        }
+        mark_stage('respond')
+        return jsonify(response)
+
+    except ValidationError as e:
+        return validation_failed(e)
+    except Exception as e:
+        logger.exception("❌ Error in risk trajectory: %s", e)
+        return jsonify({'error': f'Risk trajectory failed: {str(e)}'}), 500
+
+# ------------------------------------------------------------
+# 🧮 Prediction Helpers (shared by single & batch endpoints)
+# ------------------------------------------------------------
+MAX_BATCH_SIZE = int(os.environ.get('MAX_BATCH_SIZE', 1000))
+
+def _with_gender_label(record):
+    record['gender_str'] = 'Male' if record['gender_num'] == 1 else 'Female'
+    return record
+
+def parse_prediction_record(data):
+    """Convert one prediction payload into model inputs (raises ValidationError on bad fields)"""
+    return _with_gender_label(PREDICTION_SCHEMA.validate(data))
+
+def score_prediction_records(records):
+    """Score parsed records with ONE feature pass + model evaluation"""
+    # Predict using YOUR model
+    return score_lab_records(
+        [r['age'] for r in records],
+        [r['gender_num'] for r in records],
+        [r['esr'] for r in records],
+        [r['crp'] for r in records],
+        [r['rf'] for r in records],
+        [r['anti_ccp'] for r in records]
+    )
+
+def score_prediction_record(record):
+    """Fast path for one record: floats -> scaled NumPy row -> model, no DataFrame"""
+    return score_lab_record(record['age'], record['gender_num'], record['esr'],
+                            record['crp'], record['rf'], record['anti_ccp'])
+
+# (P(RA) strictly above, level, color), highest first; anything lower is "Very Low"
+RISK_LEVELS = [(0.85, "High", "red"), (0.65, "Moderate", "orange"), (0.40, "Low", "yellow")]
+LOWEST_RISK_LEVEL = ("Very Low", "green")
+
+def risk_level_of(prob):
+    """(risk level, color) for one probability"""
+    for threshold, level, color in RISK_LEVELS:
+        if prob > threshold:
+            return level, color
+    return LOWEST_RISK_LEVEL
+
+def build_prediction_response(record, prob, prediction):
+    """Turn a model probability into the /api/predict-ra-risk response body"""
+    age = record['age']
+    esr = record['esr']
+    crp = record['crp']
+    rf = record['rf']
+    anti_ccp = record['anti_ccp']
+
+    # Generate interpretation messages (YOUR LOGIC)
+    messages = []
+    if prob > 0.95:
+        messages.append("🔴 RA Positive (clinical case) — advanced stage RA")
+    elif prob > 0.90:
+        messages.append("🔴 Severe — multiple high inflammatory markers detected.")
+    elif prob > 0.80:
+        messages.append("⚠️ Moderate risk — consistent with moderate RA activity")
+    elif prob > 0.65:
+        messages.append("⚠️ Borderline (possible early-stage RA)")
+    elif prob > 0.50:
+        messages.append("⚠️ Borderline — mild inflammation, early autoimmune signs")
+    else:
+        if (age < 18 and esr < 10 and rf < 10 and anti_ccp < 20) or \
+           (18 <= age <= 60 and rf < 14 and anti_ccp < 20 and crp < 6) or \
+           (age > 60 and rf < 20 and anti_ccp < 20 and crp < 10):
+            messages.append("✅ Normal — no indicators of rheumatoid activity.")
+        elif (esr > 20 or crp > 10) and prob < 0.45:
+            messages.append("✅ Normal — slightly elevated inflammation but low RA probability.")
+        else:
+            messages.append("✅ Normal — overall low inflammatory response detected.")
+
+    # Recommendation
+    if prob > 0.85:
+        messages.append("💡 Recommendation: Consult a rheumatologist for further diagnostic confirmation.")
+    elif 0.5 < prob <= 0.85:
+        messages.append("💡 Recommendation: Periodic monitoring and lifestyle adjustment advised.")
+    else:
+        messages.append("💡 Recommendation: Maintain healthy lifestyle; no immediate RA concerns.")
+
+    # Determine risk level
+    risk_level, color = risk_level_of(prob)
+
+    return {
+        'risk_level': risk_level,
+        'risk_score': round(prob * 100, 2),
+        'risk_probability': round(prob, 4),
+        'risk_color': color,
+        'binary_prediction': int(prediction),
+        'recommendations': messages,
+        'factors_analyzed': {
+            'age': age,
+            'gender': record['gender_str'],
+            'rheumatoid_factor': rf,
+            'anti_ccp': anti_ccp,
+            'c_reactive_protein': crp,
+            'esr': esr
+        },
+        'model_used': 'Your Trained XGBoost Model'
+    }
+
 # ------------------------------------------------------------
 # 🧮 Single Prediction Endpoint (Using Your Actual Model)
 # ------------------------------------------------------------
 @app.route('/api/predict-ra-risk', methods=['POST', 'OPTIONS'])
 def predict_ra_risk():
-    print("🎯 SINGLE PREDICTION ENDPOINT CALLED!")
+    logger.debug("🎯 SINGLE PREDICTION ENDPOINT CALLED!")
     
     if request.method == 'OPTIONS':
         return '', 200
         
     try:
-        data = request.get_json()
-        print(f"📥 Received prediction data: {data}")
+        data = request_json()
+        log_payload('predict-ra-risk', data)
+        mark_stage('parse')
         
         if not data:
             return jsonify({'error': 'No data received'}), 400
 
-        # Validate required fields
-        required_fields = ['age', 'gender', 'rheumatoidFactor', 'antiCCP', 'cReactiveProtein', 'erythrocyteSedimentationRate']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-
         # Extract and validate data
-        age = float(data['age'])
-        gender_input = str(data['gender']).strip().lower()
-        
-        # Convert gender to numeric
-        if gender_input in ['male', 'm', '1']:
-            gender_num = 1
-            gender_str = 'Male'
-        else:
-            gender_num = 0
-            gender_str = 'Female'
-            
-        rf = float(data['rheumatoidFactor'])
-        anti_ccp = float(data['antiCCP'])
-        crp = float(data['cReactiveProtein'])
-        esr = float(data['erythrocyteSedimentationRate'])
-
-        print(f"🔍 Processing: Age={age}, Gender={gender_str}, ESR={esr}, CRP={crp}, RF={rf}, Anti-CCP={anti_ccp}")
-
-        # Create input dataframe using YOUR model structure
-        new_data = pd.DataFrame([{
-            'Age': age,
-            'Gender': gender_num,
-            'ESR': esr,
-            'CRP': crp,
-            'RF': rf,
-            'Anti-CCP': anti_ccp
-        }])
-
-        # Apply YOUR feature engineering
-        new_data = new_data.apply(adjust_by_age_gender, axis=1)
-
-        features = ['Age', 'Gender', 'ESR', 'CRP', 'RF', 'Anti-CCP',
-                    'ESR_adj', 'CRP_adj', 'RF_adj', 'AntiCCP_adj']
-
-        print(f"🔧 Features after engineering: {new_data[features].to_dict('records')[0]}")
-
-        # Scale and predict using YOUR model
-        X_scaled = scaler.transform(new_data[features])
-        prob = model.predict_proba(X_scaled)[0][1]
-        prediction = model.predict(X_scaled)[0]
-
-        print(f"🎯 Model prediction - Probability: {prob:.4f}, Binary: {prediction}")
-
-        # Generate interpretation messages (YOUR LOGIC)
-        messages = []
-        if prob > 0.95:
-            messages.append("🔴 RA Positive (clinical case) — advanced stage RA")
-        elif prob > 0.90:
-            messages.append("🔴 Severe — multiple high inflammatory markers detected.")
-        elif prob > 0.80:
-            messages.append("⚠️ Moderate risk — consistent with moderate RA activity")
-        elif prob > 0.65:
-            messages.append("⚠️ Borderline (possible early-stage RA)")
-        elif prob > 0.50:
-            messages.append("⚠️ Borderline — mild inflammation, early autoimmune signs")
-        else:
-            if (age < 18 and esr < 10 and rf < 10 and anti_ccp < 20) or \
-               (18 <= age <= 60 and rf < 14 and anti_ccp < 20 and crp < 6) or \
-               (age > 60 and rf < 20 and anti_ccp < 20 and crp < 10):
-                messages.append("✅ Normal — no indicators of rheumatoid activity.")
-            elif (esr > 20 or crp > 10) and prob < 0.45:
-                messages.append("✅ Normal — slightly elevated inflammation but low RA probability.")
-            else:
-                messages.append("✅ Normal — overall low inflammatory response detected.")
+        try:
+            record = parse_prediction_record(data)
+        except ValidationError as e:
+            return validation_failed(e)
+        mark_stage('validate')
 
-        # Recommendation
-        if prob > 0.85:
-            messages.append("💡 Recommendation: Consult a rheumatologist for further diagnostic confirmation.")
-        elif 0.5 < prob <= 0.85:
-            messages.append("💡 Recommendation: Periodic monitoring and lifestyle adjustment advised.")
-        else:
-            messages.append("💡 Recommendation: Maintain healthy lifestyle; no immediate RA concerns.")
-
-        # Determine risk level
-        if prob > 0.85:
-            risk_level, color = "High", "red"
-        elif prob > 0.65:
-            risk_level, color = "Moderate", "orange"
-        elif prob > 0.40:
-            risk_level, color = "Low", "yellow"
-        else:
-            risk_level, color = "Very Low", "green"
+        prob, prediction = score_prediction_record(record)
 
-        # Prepare response
-        response = {
-            'risk_level': risk_level,
-            'risk_score': round(prob * 100, 2),
-            'risk_probability': round(prob, 4),
-            'risk_color': color,
-            'binary_prediction': int(prediction),
-            'recommendations': messages,
-            'factors_analyzed': {
-                'age': age,
-                'gender': gender_str,
-                'rheumatoid_factor': rf,
-                'anti_ccp': anti_ccp,
-                'c_reactive_protein': crp,
-                'esr': esr
-            },
-            'model_used': 'Your Trained XGBoost Model'
-        }
+        logger.debug("🎯 Model prediction - Probability: %.4f, Binary: %s", prob, prediction)
+
+        response = build_prediction_response(record, prob, prediction)
+        response['model_version'] = current_bundle().version
+        mark_stage('respond')
 
-        print(f"✅ Final prediction - Risk: {risk_level}, Score: {prob*100:.2f}%")
+        logger.debug("✅ Final prediction - Risk: %s", response['risk_level'])
         return jsonify(response)
 
+    except ValidationError as e:
+        return validation_failed(e)
     except Exception as e:
-        print(f"❌ Prediction error: {e}")
-        traceback.print_exc()
+        logger.exception("❌ Prediction error: %s", e)
         return jsonify({'error': f'Prediction failed: {str(e)}'}), 500
 
+# ------------------------------------------------------------
+# 🧱 Columnar Binary Wire Format (batch scoring, negotiated by Content-Type / Accept)
+# ------------------------------------------------------------
+# Request body: N little-endian float64 values per column, columns back to back in LAB_COLUMNS order
+# (gender 1 = male, 0 = female). Response (Accept: same type): N float64 per RESULT_COLUMNS column.
+LAB_COLUMNS_MEDIA_TYPE = 'application/vnd.arthrocare.lab-columns'
+LAB_COLUMNS = ('age', 'gender', 'esr', 'crp', 'rf', 'anti_ccp')
+RESULT_COLUMNS = ('probability', 'prediction')
+WIRE_DTYPE = np.dtype('<f8')
+
+# Binary bodies skip per-record JSON parsing, so they get a higher ceiling than MAX_BATCH_SIZE
+MAX_BINARY_BATCH_SIZE = int(os.environ.get('MAX_BINARY_BATCH_SIZE', 100_000))
+
+def encode_lab_columns(age, gender, esr, crp, rf, anti_ccp):
+    """N raw records -> columnar request body"""
+    return np.ascontiguousarray([age, gender, esr, crp, rf, anti_ccp], dtype=WIRE_DTYPE).tobytes()
+
+def decode_lab_columns(body):
+    """Columnar request body -> (6, N) float64 view over the bytes (no copy); raises ValueError"""
+    row_bytes = len(LAB_COLUMNS) * WIRE_DTYPE.itemsize
+    if not body:
+        raise ValueError('No records received')
+    if len(body) % row_bytes:
+        raise ValueError(f'Body is {len(body)} bytes, not a whole number of {row_bytes}-byte records')
+    n = len(body) // row_bytes
+    if n > MAX_BINARY_BATCH_SIZE:
+        raise ValueError(f'Batch too large: {n} records (max {MAX_BINARY_BATCH_SIZE})')
+
+    columns = np.frombuffer(body, dtype=WIRE_DTYPE).reshape(len(LAB_COLUMNS), n)
+    bad_gender = np.flatnonzero((columns[1] != 0) & (columns[1] != 1))
+    if bad_gender.size:
+        raise ValueError(f'gender must be 0 or 1 (records {bad_gender[:10].tolist()})')
+    bad_values = np.flatnonzero(np.isinf(columns).any(axis=0))
+    if bad_values.size:
+        raise ValueError(f'Values must not be infinite (records {bad_values[:10].tolist()})')
+    return columns
+
+def encode_prediction_columns(probs, labels):
+    """Probabilities and 0/1 labels -> columnar response body"""
+    return np.ascontiguousarray([probs, labels], dtype=WIRE_DTYPE).tobytes()
+
+def decode_prediction_columns(body):
+    """Columnar response body -> {column: float64 array}"""
+    values = np.frombuffer(body, dtype=WIRE_DTYPE).reshape(len(RESULT_COLUMNS), -1)
+    return dict(zip(RESULT_COLUMNS, values))
+
+def predict_lab_columns():
+    """The batch endpoint for a columnar binary body; answers in binary when the client Accepts it"""
+    try:
+        columns = decode_lab_columns(request.get_data(cache=False))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    mark_stage('validate')
+    logger.debug("📥 Received %d binary records for batch prediction", columns.shape[1])
+
+    probs, labels = score_lab_records(*columns)
+
+    if request.accept_mimetypes.best_match(['application/json', LAB_COLUMNS_MEDIA_TYPE]) == LAB_COLUMNS_MEDIA_TYPE:
+        body = encode_prediction_columns(probs, labels)
+        mark_stage('respond')
+        return Response(body, content_type=LAB_COLUMNS_MEDIA_TYPE,
+                        headers={'X-Record-Count': str(columns.shape[1]), 'X-Result-Columns': ','.join(RESULT_COLUMNS)})
+
+    results = []
+    for (age, gender, esr, crp, rf, anti_ccp), prob, prediction in zip(zip(*columns.tolist()), probs, labels):
+        record = {'age': age, 'gender_str': 'Male' if gender == 1 else 'Female',
+                  'esr': esr, 'crp': crp, 'rf': rf, 'anti_ccp': anti_ccp}
+        results.append(build_prediction_response(record, prob, prediction))
+    mark_stage('respond')
+    return jsonify({
+        'results': results,
+        'total': len(results),
+        'succeeded': len(results),
+        'failed': 0,
+        'model_version': current_bundle().version
+    })
+
+# ------------------------------------------------------------
+# 📦 Batch Prediction Endpoint (one model call for N lab records)
+# ------------------------------------------------------------
+@app.route('/api/predict-ra-risk/batch', methods=['POST', 'OPTIONS'])
+def predict_ra_risk_batch():
+    logger.debug("🎯 BATCH PREDICTION ENDPOINT CALLED!")
+
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    try:
+        # JSON is the default; lab-system feeds can send the columnar binary format instead
+        if request.mimetype == LAB_COLUMNS_MEDIA_TYPE:
+            return predict_lab_columns()
+
+        data = request_json()
+        log_payload('predict-ra-risk/batch', data)
+        mark_stage('parse')
+
+        # Accept either a bare array or {"records": [...]}
+        records_in = data.get('records') if isinstance(data, dict) else data
+
+        if not records_in:
+            return jsonify({'error': 'No records received'}), 400
+        if not isinstance(records_in, list):
+            return jsonify({'error': 'records must be an array of lab records'}), 400
+        if len(records_in) > MAX_BATCH_SIZE:
+            return jsonify({'error': f'Batch too large: {len(records_in)} records (max {MAX_BATCH_SIZE})'}), 400
+
+        logger.debug("📥 Received %d records for batch prediction", len(records_in))
+
+        # Validate every record up front; bad ones get their own error entry
+        results = [None] * len(records_in)
+        valid_positions = []
+        valid_records = []
+        for i, (record, errors) in enumerate(PREDICTION_SCHEMA.validate_many(records_in)):
+            if errors:
+                results[i] = ValidationError(errors).body()
+            else:
+                valid_records.append(_with_gender_label(record))
+                valid_positions.append(i)
+        mark_stage('validate')
+
+        # Score all valid records in one matrix call
+        if valid_records:
+            probs, predictions = score_prediction_records(valid_records)
+            for pos, record, prob, prediction in zip(valid_positions, valid_records, probs, predictions):
+                results[pos] = build_prediction_response(record, prob, prediction)
+            mark_stage('respond')
+
+        logger.debug("✅ Batch prediction complete - %d/%d records scored", len(valid_records), len(records_in))
+        return jsonify({
+            'results': results,
+            'total': len(records_in),
+            'succeeded': len(valid_records),
+            'failed': len(records_in) - len(valid_records),
+            'model_version': current_bundle().version
+        })
+
+    except ValidationError as e:
+        return validation_failed(e)
+    except Exception as e:
+        logger.exception("❌ Batch prediction error: %s", e)
+        return jsonify({'error': f'Batch prediction failed: {str(e)}'}), 500
+
 # ============================================================
 # 🎯 RECOMMENDATIONS API (YOUR EXACT CODE FROM recommendations.py)
 # ============================================================
 
 # Helper functions for recommendations (YOUR EXACT CODE)
+BIOMARKER_FLAGS = ('ESR_flag', 'CRP_flag', 'RF_flag', 'AntiCCP_flag')
+
 def biomarker_flag(age, gender_num, ESR, CRP, RF, Anti_CCP):
     """Calculate biomarker flags"""
-    # ESR
-    if age < 18:
-        esr_flag = 0 if ESR < 10 else (1 if ESR <= 20 else 2)
-    elif age <= 60:
-        if gender_num == 1:  # male
-            esr_flag = 0 if ESR < 15 else (1 if ESR <= 30 else 2)
-        else:
-            esr_flag = 0 if ESR < 20 else (1 if ESR <= 40 else 2)
-    else:
-        esr_flag = 0 if ESR < 30 else (1 if ESR <= 50 else 2)
-
-    # CRP
-    if age < 18:
-        crp_flag = 0 if CRP < 5 else (1 if CRP <= 10 else 2)
-    elif age <= 60:
-        crp_flag = 0 if CRP < 6 else (1 if CRP <= 20 else 2)
-    else:
-        crp_flag = 0 if CRP < 10 else (1 if CRP <= 30 else 2)
-
-    # RF
-    if age < 18:
-        rf_flag = 0 if RF < 10 else (1 if RF <= 20 else 2)
-    elif age <= 60:
-        rf_flag = 0 if RF < 14 else (1 if RF <= 30 else 2)
-    else:
-        rf_flag = 0 if RF < 20 else (1 if RF <= 40 else 2)
-
-    # Anti-CCP
-    accp_flag = 0 if Anti_CCP < 20 else (1 if Anti_CCP < 40 else 2)
-
-    return {'ESR_flag': esr_flag, 'CRP_flag': crp_flag, 'RF_flag': rf_flag, 'AntiCCP_flag': accp_flag}
-
-def compute_risk_score(row):
-    """Calculate risk score using your exact logic"""
-    age = int(row.get('Age', 30))
-    gender = int(row.get('Gender', 0))
-    ESR = float(row.get('ESR', 0) or 0)
-    CRP = float(row.get('CRP', 0) or 0)
-    RF = float(row.get('RF', 0) or 0)
-    Anti_CCP = float(row.get('Anti-CCP', 0) or 0)
-    smoke = int(row.get('SmokingStatus', 0))
-    drink_cat = str(row.get('DrinkingStatus', 'Almost non-drinker'))
-
-    flags = biomarker_flag(age, gender, ESR, CRP, RF, Anti_CCP)
+    return dict(zip(BIOMARKER_FLAGS, reference_ranges.level_row(age, gender_num, ESR, CRP, RF, Anti_CCP)))
+
+def biomarker_flags(age, gender, esr, crp, rf, anti_ccp):
+    """Vectorized biomarker_flag: {flag name: 0/1/2 array} for N records"""
+    return dict(zip(BIOMARKER_FLAGS, reference_ranges.levels(*_as_float_columns(age, gender, esr, crp, rf, anti_ccp))))
+
+def _risk_inputs(row):
+    """compute_risk_score row -> (age, gender, ESR, CRP, RF, Anti_CCP, smoke, drink_cat, ra_flag)"""
+    return (int(row.get('Age', 30)), int(row.get('Gender', 0)),
+            float(row.get('ESR', 0) or 0), float(row.get('CRP', 0) or 0),
+            float(row.get('RF', 0) or 0), float(row.get('Anti-CCP', 0) or 0),
+            int(row.get('SmokingStatus', 0)), str(row.get('DrinkingStatus', 'Almost non-drinker')),
+            1 if int(row.get('RheumatoidArthritis', 0)) == 1 else 0)
+
+def _risk_score_result(age, flags, smoke, drink_cat, ra_flag, model_prob):
+    """Rule score from flags and lifestyle, blended with the model probability when there is one"""
     inflammation_points = flags['ESR_flag'] + flags['CRP_flag'] + flags['RF_flag'] + flags['AntiCCP_flag']
 
     smoke_points = {0: 0, 1: 1, 2: 2}.get(smoke, 0)
     drink_points = 0 if drink_cat == 'Almost non-drinker' else (1 if drink_cat == 'Occasional drinker' else 2)
     age_points = 2 if age > 60 else (1 if age >= 45 else 0)
-    ra_flag = 1 if int(row.get('RheumatoidArthritis', 0)) == 1 else 0
 
     base = inflammation_points * 3 + smoke_points * 2 + drink_points * 1 + age_points * 2 + ra_flag * 4
     denom = (8 * 3 + 2 * 2 + 2 + 4)
     rule_score = min(100, round((base / denom) * 100, 2))
 
-    model_prob = None
-    if model is not None and scaler is not None:
-        try:
-            tmp = pd.DataFrame([{'Age': age, 'Gender': gender, 'ESR': ESR, 'CRP': CRP, 'RF': RF, 'Anti-CCP': Anti_CCP}])
-            tmp = tmp.apply(adjust_by_age_gender, axis=1)
-            features = ['Age', 'Gender', 'ESR', 'CRP', 'RF', 'Anti-CCP', 'ESR_adj', 'CRP_adj', 'RF_adj', 'AntiCCP_adj']
-            Xs = scaler.transform(tmp[features])
-            model_prob = float(model.predict_proba(Xs)[0][1])
-        except Exception:
-            model_prob = None
-
     if model_prob is not None:
         combined = round((0.55 * (rule_score / 100) + 0.45 * model_prob) * 100, 2)
     else:
@@ -539,6 +2108,41 @@ def compute_risk_score(row):
 
     return {'rule_score': rule_score, 'model_prob': model_prob, 'combined_score': combined, 'flags': flags}
 
+def compute_risk_score(row):
+    """Calculate risk score using your exact logic"""
+    age, gender, ESR, CRP, RF, Anti_CCP, smoke, drink_cat, ra_flag = _risk_inputs(row)
+    flags = biomarker_flag(age, gender, ESR, CRP, RF, Anti_CCP)
+
+    model_prob = None
+    if model_available():
+        try:
+            model_prob, _ = score_lab_record(age, gender, ESR, CRP, RF, Anti_CCP)
+        except Exception:
+            model_prob = None
+
+    return _risk_score_result(age, flags, smoke, drink_cat, ra_flag, model_prob)
+
+def compute_risk_scores(rows):
+    """compute_risk_score for N rows: flags in one vectorized pass, probabilities in one model evaluation"""
+    inputs = [_risk_inputs(row) for row in rows]
+    if not inputs:
+        return []
+    labs = list(zip(*[values[:6] for values in inputs]))
+    flag_columns = biomarker_flags(*labs)
+    flag_rows = zip(*[flag_columns[name].tolist() for name in BIOMARKER_FLAGS])
+
+    model_probs = [None] * len(inputs)
+    if model_available():
+        try:
+            model_probs, _ = score_lab_records(*labs)
+        except Exception:
+            pass
+
+    return [
+        _risk_score_result(values[0], dict(zip(BIOMARKER_FLAGS, flags)), *values[6:], model_prob)
+        for values, flags, model_prob in zip(inputs, flag_rows, model_probs)
+    ]
+
 # Recommendation functions (YOUR EXACT CODE)
 def get_diet_recommendations(age, gender, flags, smoke, drink_cat, ra_flag, vegetarian):
     """Generate personalized diet recommendations"""
@@ -641,6 +2245,11 @@ def get_exercise_recommendations(age, severity, flags, smoke):
     
     return recommendations
 
+def hydration_goal_item(weight_kg):
+    """Weight-based daily water target (35 ml/kg)"""
+    water_need = round((35 * weight_kg) / 1000, 1)
+    return f"Daily hydration goal: {water_need}L based on your weight"
+
 def get_lifestyle_recommendations(age, severity, smoke, drink_cat, weight_kg):
     """Generate lifestyle recommendations"""
     recommendations = {
@@ -668,8 +2277,7 @@ def get_lifestyle_recommendations(age, severity, smoke, drink_cat, weight_kg):
     }
     
     if weight_kg:
-        water_need = round((35 * weight_kg) / 1000, 1)
-        hydration["items"].append(f"Daily hydration goal: {water_need}L based on your weight")
+        hydration["items"].append(hydration_goal_item(weight_kg))
     else:
         hydration["items"].append("Daily hydration: 2-3L of water")
     
@@ -725,106 +2333,332 @@ def get_mental_wellness_recommendations(severity, age):
     
     return recommendations
 
+# ------------------------------------------------------------
+# 🧩 Recommendation Templates (every plan variant built and serialized once)
+# ------------------------------------------------------------
+SEVERITY_LEVELS = ('Severe - Urgent', 'Severe', 'Moderate', 'Borderline', 'Low/Normal')
+
+KEY_MESSAGES = [
+    "These recommendations are personalized based on your health profile",
+    "Consult with healthcare providers before making significant changes",
+    "Regular monitoring and follow-up are essential for RA management"
+]
+
+def compact_json(obj):
+    """app.json.dumps with jsonify's compact separators"""
+    return app.json.dumps(obj, separators=(',', ':'))
+
+def json_is_compact():
+    """False when jsonify pretty-prints (JSON_PRETTY), so spliced compact JSON would differ"""
+    return not (app.json.compact is False or (app.json.compact is None and app.debug))
+
+class RecommendationTemplates:
+    """Every variant of the four recommendation plans, precomputed from the get_*_recommendations functions.
+
+    The plans depend on the patient only through the severity, the
+    inflammation and RA marker flags, smoking, drinking, vegetarian, the
+    under-30 age band and whether a weight was given - 640 combinations -
+    so each variant is built once at startup and kept both as a shared dict
+    and as a serialized JSON fragment. The weight-based hydration goal is
+    the one free-text item; it is spliced in per request.
+    """
+
+    # Placeholder for the hydration goal in the variants that have a weight
+    HYDRATION_SLOT = '\0hydration goal\0'
+
+    def __init__(self):
+        # Each plan only branches on part of the key, so build its variants separately...
+        flags = lambda inflamed, ra_markers: {'ESR_flag': int(inflamed), 'CRP_flag': 0,
+                                              'RF_flag': int(ra_markers), 'AntiCCP_flag': 0}
+        smoke = lambda smoker: 1 if smoker else 0
+        drink_cat = lambda drinker: 'Frequent drinker' if drinker else 'Almost non-drinker'
+        age = lambda young: 29 if young else 30
+        both = (False, True)
+
+        diet = {(inflamed, ra_markers, young, smoker, vegetarian): get_diet_recommendations(
+                    age(young), 0, flags(inflamed, ra_markers), smoke(smoker), 'Almost non-drinker', 0, vegetarian)
+                for inflamed, ra_markers, young, smoker, vegetarian in itertools.product(both, repeat=5)}
+        exercise = {severity: get_exercise_recommendations(30, severity, flags(False, False), 0)
+                    for severity in SEVERITY_LEVELS}
+        lifestyle = {}
+        for smoker, drinker, weighted in itertools.product(both, repeat=3):
+            plan = get_lifestyle_recommendations(30, 'Low/Normal', smoke(smoker), drink_cat(drinker), 1 if weighted else None)
+            if weighted:
+                plan = self._with_hydration(plan, hydration_goal_item(1), self.HYDRATION_SLOT)
+            lifestyle[smoker, drinker, weighted] = plan
+        mental = {(severity, young): get_mental_wellness_recommendations(severity, age(young))
+                  for severity, young in itertools.product(SEVERITY_LEVELS, both)}
+
+        # ...then assemble all 640 combinations from shared parts and their serialized fragments
+        serialized = {id(plan): compact_json(plan)
+                      for plans in (diet, exercise, lifestyle, mental) for plan in plans.values()}
+        slot_json = compact_json(self.HYDRATION_SLOT)
+        self.plans = {}
+        self.fragments = {}
+        for key in itertools.product(SEVERITY_LEVELS, *[both] * 7):
+            severity, inflamed, ra_markers, young, smoker, drinker, vegetarian, weighted = key
+            plans = {
+                'diet': diet[inflamed, ra_markers, young, smoker, vegetarian],
+                'exercise': exercise[severity],
+                'lifestyle': lifestyle[smoker, drinker, weighted],
+                'mentalWellness': mental[severity, young]
+            }
+            self.plans[key] = plans
+
+            # Same bytes as compact_json(plans): keys are already in sorted order
+            fragment = '{' + ','.join(f'{compact_json(name)}:{serialized[id(plan)]}' for name, plan in plans.items()) + '}'
+            if weighted:
+                fragment = tuple(fragment.split(slot_json))
+                if len(fragment) != 2:
+                    raise ValueError("hydration goal must appear exactly once in the lifestyle plan")
+            self.fragments[key] = fragment
+
+    @staticmethod
+    def _with_hydration(lifestyle, old_item, new_item):
+        return {**lifestyle, 'sections': [
+            {**section, 'items': [new_item if item == old_item else item for item in section['items']]}
+            for section in lifestyle['sections']
+        ]}
+
+    @staticmethod
+    def key(age, severity, flags, smoke, drink_cat, vegetarian, weight_kg):
+        """Template key: exactly the conditions the get_*_recommendations functions branch on"""
+        return (severity,
+                flags['ESR_flag'] >= 1 or flags['CRP_flag'] >= 1,
+                flags['RF_flag'] >= 1 or flags['AntiCCP_flag'] >= 1,
+                age < 30, smoke > 0, drink_cat != 'Almost non-drinker', bool(vegetarian), bool(weight_kg))
+
+    def plans_for(self, key, weight_kg):
+        """The four plans as dicts (shared, do not mutate)"""
+        plans = self.plans[key]
+        if key[-1]:
+            plans = {**plans, 'lifestyle': self._with_hydration(plans['lifestyle'], self.HYDRATION_SLOT,
+                                                                 hydration_goal_item(weight_kg))}
+        return plans
+
+    def fragment_for(self, key, weight_kg):
+        """The four plans as compact JSON"""
+        fragment = self.fragments[key]
+        if key[-1]:
+            before, after = fragment
+            return before + compact_json(hydration_goal_item(weight_kg)) + after
+        return fragment
+
+recommendation_templates = RecommendationTemplates()
+
+# Patients scored per model call by the bulk endpoint (memory stays bounded by one chunk)
+RECOMMENDATIONS_CHUNK_SIZE = int(os.environ.get('RECOMMENDATIONS_CHUNK_SIZE', 500))
+
+def parse_recommendation_request(data):
+    """Convert one recommendations payload into a patient profile (raises ValidationError on bad fields)"""
+    return _with_gender_label(RECOMMENDATION_SCHEMA.validate(data))
+
+def recommendation_risk_row(patient):
+    """compute_risk_score input for a parsed patient"""
+    return {
+        'Age': patient['age'], 'Gender': patient['gender_num'], 'ESR': patient['ESR'], 'CRP': patient['CRP'],
+        'RF': patient['RF'], 'Anti-CCP': patient['Anti_CCP'], 'SmokingStatus': patient['smoke_num'],
+        'DrinkingStatus': patient['drink_cat'], 'RheumatoidArthritis': patient['ra_flag']
+    }
+
+def risk_severity(combined_score):
+    """Severity band for a combined risk score"""
+    if combined_score >= 85:
+        return 'Severe - Urgent'
+    elif combined_score >= 70:
+        return 'Severe'
+    elif combined_score >= 55:
+        return 'Moderate'
+    elif combined_score >= 35:
+        return 'Borderline'
+    else:
+        return 'Low/Normal'
+
+def _recommendation_parts(patient, risk_result):
+    """(template key, response without the plans) for one scored patient"""
+    age = patient['age']
+    combined_score = risk_result['combined_score']
+    flags = risk_result['flags']
+    severity = risk_severity(combined_score)
+
+    key = recommendation_templates.key(age, severity, flags, patient['smoke_num'], patient['drink_cat'],
+                                       patient['vegetarian'], patient['weight_kg'])
+    response = {
+        'patientSummary': {
+            'age': age,
+            'gender': patient['gender_str'],
+            'severity': severity,
+            'riskScore': combined_score,
+            'modelProbability': risk_result['model_prob'],
+            'inflammatoryMarkers': flags
+        },
+        'keyMessages': KEY_MESSAGES
+    }
+    return key, response
+
+def build_recommendation_response(patient, risk_result):
+    """Patient summary + the four recommendation plans for one scored patient"""
+    key, response = _recommendation_parts(patient, risk_result)
+    response['recommendations'] = recommendation_templates.plans_for(key, patient['weight_kg'])
+    return response
+
+def recommendation_response_json(patient, risk_result, **extra):
+    """Compact JSON of build_recommendation_response() plus `extra`, with the plans spliced in
+    pre-serialized ('recommendations' sorts after every other key, so the bytes match jsonify)"""
+    key, response = _recommendation_parts(patient, risk_result)
+    response.update(extra)
+    head = compact_json(response)
+    return f'{head[:-1]},"recommendations":{recommendation_templates.fragment_for(key, patient["weight_kg"])}}}'
+
 @app.route('/api/generate-recommendations', methods=['POST', 'OPTIONS'])
 def generate_recommendations():
-    print("🎯 RECOMMENDATIONS ENDPOINT CALLED!")
+    logger.debug("🎯 RECOMMENDATIONS ENDPOINT CALLED!")
     
     if request.method == 'OPTIONS':
         return '', 200
         
     try:
-        data = request.get_json()
-        print(f"📥 Received data for recommendations: {data}")
+        data = request_json()
+        log_payload('generate-recommendations', data)
+        mark_stage('parse')
         
         if not data:
             return jsonify({'error': 'No data received'}), 400
 
         # Extract and validate data
-        required_fields = ['age', 'gender', 'smokingStatus', 'drinkingStatus', 'rheumatoidArthritis']
-        missing_fields = [field for field in required_fields if field not in data]
-        if missing_fields:
-            return jsonify({'error': f'Missing required fields: {missing_fields}'}), 400
-
-        age = int(data['age'])
-        gender_input = str(data['gender']).strip().upper()
-        gender_num = 1 if gender_input in ['M', 'MALE'] else 0
-        gender_str = 'Male' if gender_num == 1 else 'Female'
-        
-        smoke_input = str(data['smokingStatus']).strip().title()
-        smoke_map = {'Never': 0, 'Former': 1, 'Current': 2, 'No': 0, 'Quit': 1, 'Yes': 2}
-        smoke_num = smoke_map.get(smoke_input, 0)
-        
-        drink_input = str(data['drinkingStatus']).strip().title()
-        drink_map = {'Never': 'Almost non-drinker', 'Moderate': 'Occasional drinker', 'Regular': 'Frequent drinker'}
-        drink_cat = drink_map.get(drink_input, 'Almost non-drinker')
-        
-        ra_flag = int(data['rheumatoidArthritis'])
-        
-        # Optional fields with defaults
-        ESR = float(data.get('ESR', 0) or 0)
-        CRP = float(data.get('CRP', 0) or 0)
-        RF = float(data.get('RF', 0) or 0)
-        Anti_CCP = float(data.get('AntiCCP', 0) or 0)
-        weight_kg = data.get('weight')
-        vegetarian = bool(data.get('vegetarian', False))
-
-        # Compute risk score
-        risk_data = {
-            'Age': age, 'Gender': gender_num, 'ESR': ESR, 'CRP': CRP, 'RF': RF, 'Anti-CCP': Anti_CCP,
-            'SmokingStatus': smoke_num, 'DrinkingStatus': drink_cat, 'RheumatoidArthritis': ra_flag
-        }
-        
-        risk_result = compute_risk_score(risk_data)
-        combined_score = risk_result['combined_score']
-        flags = risk_result['flags']
-
-        # Determine severity
-        if combined_score >= 85:
-            severity = 'Severe - Urgent'
-        elif combined_score >= 70:
-            severity = 'Severe'
-        elif combined_score >= 55:
-            severity = 'Moderate'
-        elif combined_score >= 35:
-            severity = 'Borderline'
-        else:
-            severity = 'Low/Normal'
+        try:
+            patient = parse_recommendation_request(data)
+        except ValidationError as e:
+            return validation_failed(e)
+        mark_stage('validate')
+
+        # Compute risk score, then compile the final response
+        risk_result = compute_risk_score(recommendation_risk_row(patient))
+        if not json_is_compact():
+            response = build_recommendation_response(patient, risk_result)
+            response['model_version'] = current_bundle().version
+            return jsonify(response)
+
+        body = recommendation_response_json(patient, risk_result, model_version=current_bundle().version)
+        mark_stage('recommendations')
+
+        logger.debug("✅ Recommendations generated successfully!")
+        return app.response_class(body + '\n', mimetype=app.json.mimetype)
+
+    except ValidationError as e:
+        return validation_failed(e)
+    except Exception as e:
+        logger.exception("❌ Error generating recommendations: %s", e)
+        return jsonify({'error': f'Failed to generate recommendations: {str(e)}'}), 500
 
-        # Generate all recommendations
-        diet_rec = get_diet_recommendations(age, gender_num, flags, smoke_num, drink_cat, ra_flag, vegetarian)
-        exercise_rec = get_exercise_recommendations(age, severity, flags, smoke_num)
-        lifestyle_rec = get_lifestyle_recommendations(age, severity, smoke_num, drink_cat, weight_kg)
-        mental_rec = get_mental_wellness_recommendations(severity, age)
+# ------------------------------------------------------------
+# 📦 Bulk Recommendations (whole rosters, streamed as NDJSON)
+# ------------------------------------------------------------
+def _ndjson_patients(stream):
+    """Yield (index, payload or None, error) for each non-blank line of an NDJSON body"""
+    index = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        try:
+            yield index, json.loads(line), None
+        except ValueError as e:
+            yield index, None, f'Invalid JSON: {str(e)}'
+        index += 1
+
+def _listed_patients(patients):
+    for index, item in enumerate(patients):
+        yield index, item, None
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def recommendation_lines(patients, bundle):
+    """NDJSON lines for (index, payload, error) items: one per patient, then a summary line.
+
+    Patients are parsed, scored (one model evaluation per chunk) and
+    serialized RECOMMENDATIONS_CHUNK_SIZE at a time, so memory stays flat
+    however long the roster is.
+    """
+    # The body is generated after the request hooks ran; score on the bundle the request was pinned to
+    previous_pin = getattr(_bundle_pin, 'bundle', None)
+    _bundle_pin.bundle = bundle
+    total = succeeded = 0
+    try:
+        for chunk in _chunks(patients, max(1, RECOMMENDATIONS_CHUNK_SIZE)):
+            results = {}
+            parsed = []
+            for index, data, error in chunk:
+                if error is not None:
+                    results[index] = compact_json({'index': index, 'error': error})
+                    continue
+                patient, errors = RECOMMENDATION_SCHEMA.apply(data)
+                if errors:
+                    results[index] = compact_json({'index': index, **ValidationError(errors).body()})
+                else:
+                    parsed.append((index, _with_gender_label(patient)))
+
+            risk_results = compute_risk_scores([recommendation_risk_row(patient) for _, patient in parsed])
+            for (index, patient), risk_result in zip(parsed, risk_results):
+                results[index] = recommendation_response_json(patient, risk_result, index=index)
+
+            total += len(chunk)
+            succeeded += len(parsed)
+            yield ''.join(results[index] + '\n' for index, _, _ in chunk)
+
+        yield compact_json({'summary': {
+            'total': total,
+            'succeeded': succeeded,
+            'failed': total - succeeded,
+            'model_version': bundle.version
+        }}) + '\n'
 
-        # Compile final response
-        response = {
-            'patientSummary': {
-                'age': age,
-                'gender': gender_str,
-                'severity': severity,
-                'riskScore': combined_score,
-                'modelProbability': risk_result['model_prob'],
-                'inflammatoryMarkers': flags
-            },
-            'recommendations': {
-                'diet': diet_rec,
-                'exercise': exercise_rec,
-                'lifestyle': lifestyle_rec,
-                'mentalWellness': mental_rec
-            },
-            'keyMessages': [
-                "These recommendations are personalized based on your health profile",
-                "Consult with healthcare providers before making significant changes",
-                "Regular monitoring and follow-up are essential for RA management"
-            ]
-        }
+    except Exception as e:
+        # Headers are already sent; end the stream with an error line the client can detect
+        logger.exception("❌ Bulk recommendations failed after %d patients: %s", total, e)
+        yield compact_json({'error': f'Failed to generate recommendations: {str(e)}', 'processed': total}) + '\n'
+    finally:
+        _bundle_pin.bundle = previous_pin
 
-        print("✅ Recommendations generated successfully!")
-        return jsonify(response)
+@app.route('/api/generate-recommendations/batch', methods=['POST', 'OPTIONS'])
+def generate_recommendations_batch():
+    logger.debug("🎯 BULK RECOMMENDATIONS ENDPOINT CALLED!")
 
+    if request.method == 'OPTIONS':
+        return '', 200
+
+    try:
+        if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+            # One patient per line, read as the stream is consumed (no size limit)
+            patients = _ndjson_patients(request.stream)
+        else:
+            # Accept either a bare array or {"patients": [...]}
+            data = request_json()
+            patients_in = data.get('patients') if isinstance(data, dict) else data
+            if not patients_in:
+                return jsonify({'error': 'No patients received'}), 400
+            if not isinstance(patients_in, list):
+                return jsonify({'error': 'patients must be an array of patient records'}), 400
+            if len(patients_in) > MAX_BATCH_SIZE:
+                return jsonify({'error': f'Batch too large: {len(patients_in)} patients (max {MAX_BATCH_SIZE}); '
+                                         'send larger rosters as application/x-ndjson'}), 400
+            patients = _listed_patients(patients_in)
+        mark_stage('parse')
+
+        lines = recommendation_lines(patients, current_bundle())
+        return Response(stream_with_context(lines), content_type='application/x-ndjson; charset=utf-8')
+
+    except ValidationError as e:
+        return validation_failed(e)
     except Exception as e:
-        print(f"❌ Error generating recommendations: {e}")
-        traceback.print_exc()
+        logger.exception("❌ Bulk recommendations error: %s", e)
         return jsonify({'error': f'Failed to generate recommendations: {str(e)}'}), 500
 
 @app.route('/api/recommendations-health', methods=['GET'])
@@ -832,10 +2666,265 @@ def recommendations_health():
     return jsonify({
         'status': 'healthy',
         'message': 'Recommendations API is running',
-        'model_loaded': model is not None,
-        'endpoints': ['POST /api/generate-recommendations']
+        'model_loaded': model_available(),
+        'endpoints': ['POST /api/generate-recommendations', 'POST /api/generate-recommendations/batch']
     })
 
+# ------------------------------------------------------------
+# 🔥 Warm-up & Readiness
+# ------------------------------------------------------------
+WARMUP_ENABLED = os.environ.get('WARMUP_ENABLED', '1').strip() != '0'
+
+# Fixed synthetic patients: age, gender, ESR, CRP, RF, Anti-CCP (spans the age bands and marker cutoffs)
+WARMUP_LAB_RECORDS = [
+    (16, 'M', 21.0, 9.5, 11.0, 19.0),
+    (35, 'F', 12.0, 3.1, 8.0, 5.0),
+    (52, 'M', 34.0, 14.2, 28.5, 41.0),
+    (67, 'F', 48.0, 31.0, 44.0, 62.0)
+]
+
+def _warmup_prediction_payload(age, gender, esr, crp, rf, anti_ccp):
+    return {'age': age, 'gender': gender, 'erythrocyteSedimentationRate': esr, 'cReactiveProtein': crp,
+            'rheumatoidFactor': rf, 'antiCCP': anti_ccp}
+
+def warmup_requests():
+    """(path, JSON body) for every scoring endpoint, built from WARMUP_LAB_RECORDS"""
+    predictions = [_warmup_prediction_payload(*lab) for lab in WARMUP_LAB_RECORDS]
+    calls = [('/api/predict-ra-risk', body) for body in predictions]
+    calls.append(('/api/predict-ra-risk/batch', {'records': predictions}))
+    # Also warm model.predict_proba, which serves batches above NATIVE_ENGINE_MAX_ROWS
+    big_batch = (predictions * (NATIVE_ENGINE_MAX_ROWS // len(predictions) + 1))[:NATIVE_ENGINE_MAX_ROWS + 1]
+    calls.append(('/api/predict-ra-risk/batch', {'records': big_batch}))
+
+    for (age_p, gender_p, *labs_p), (age_c, gender_c, *labs_c) in zip(WARMUP_LAB_RECORDS, WARMUP_LAB_RECORDS[1:]):
+        body = {'monthsSinceLastTest': 6, 'previousAge': age_p, 'previousGender': gender_p,
+                'currentAge': age_c, 'currentGender': gender_c}
+        for field, prev, curr in zip(('ESR', 'CRP', 'RF', 'AntiCCP'), labs_p, labs_c):
+            body[f'previous{field}'] = prev
+            body[f'current{field}'] = curr
+        calls.append(('/api/compare-ra-risk', body))
+    calls.append(('/api/ra-risk-trajectory', {'visits': [
+        {'monthsSincePrevious': 6, 'age': age, 'gender': gender, 'ESR': esr, 'CRP': crp, 'RF': rf, 'AntiCCP': anti_ccp}
+        for age, gender, esr, crp, rf, anti_ccp in WARMUP_LAB_RECORDS
+    ]}))
+
+    patients = [{
+        'age': age, 'gender': gender, 'smokingStatus': ('Never', 'Former', 'Current')[i % 3],
+        'drinkingStatus': ('Never', 'Moderate', 'Regular')[i % 3], 'rheumatoidArthritis': i % 2,
+        'ESR': esr, 'CRP': crp, 'RF': rf, 'AntiCCP': anti_ccp, 'weight': 70, 'vegetarian': bool(i % 2)
+    } for i, (age, gender, esr, crp, rf, anti_ccp) in enumerate(WARMUP_LAB_RECORDS)]
+    calls += [('/api/generate-recommendations', body) for body in patients]
+    calls.append(('/api/generate-recommendations/batch', {'patients': patients}))
+    return calls
+
+def warm_up(bundle=None):
+    """Run the synthetic requests through the real endpoints on `bundle` (default: the active one),
+    bypassing cache and metrics; a reload only swaps in a bundle that passed"""
+    bundle = bundle or active_bundle
+    bundle.warmed_up, bundle.warmup_seconds, bundle.warmup_error = False, None, None
+    if not WARMUP_ENABLED:
+        bundle.warmed_up = True
+        return True
+
+    started = time.perf_counter()
+    client = app.test_client()
+    _warm_up_thread.active = True
+    _bundle_pin.bundle = bundle
+    try:
+        for path, body in warmup_requests():
+            response = client.post(path, json=body)
+            # Reading the body also runs streamed (NDJSON) responses to completion
+            text = response.get_data(as_text=True)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path} returned {response.status_code}: {text[:200]}")
+            if response.mimetype == 'application/x-ndjson':
+                summary = json.loads(text.splitlines()[-1]).get('summary')
+                if not summary or summary['failed']:
+                    raise RuntimeError(f"{path} stream did not complete cleanly: {text[-200:]}")
+    except Exception as e:
+        bundle.warmup_error = str(e)
+        logger.error("❌ Warm-up of model %s failed: %s", bundle.version, e)
+        return False
+    finally:
+        _warm_up_thread.active = False
+        _bundle_pin.bundle = None
+
+    bundle.warmed_up, bundle.warmup_seconds = True, round(time.perf_counter() - started, 4)
+    logger.info("🔥 Warm-up of model %s complete in %.3fs", bundle.version, bundle.warmup_seconds)
+    return True
+
+def is_ready():
+    return real_model_loaded() and active_bundle.warmed_up and active_bundle.model is not None
+
+@app.route('/api/ready', methods=['GET'])
+def ready():
+    """Readiness probe: 200 only with the trained model loaded and warm-up finished, else 503"""
+    bundle = current_bundle()
+    reasons = []
+    if not real_model_loaded():
+        reasons.append('trained model not loaded' + (' (serving fallback model)' if model_available() else ''))
+    if not bundle.warmed_up:
+        reasons.append(f"warm-up failed: {bundle.warmup_error}" if bundle.warmup_error else 'warm-up not finished')
+    if bundle.model is None and not bundle.is_fallback:
+        reasons.append(f"full model failed to load: {bundle.full_model_error}" if bundle.full_model_error
+                       else 'full model still loading (fast startup)')
+
+    body = {
+        'ready': not reasons,
+        'model_version': bundle.version,
+        'model_fingerprint': bundle.fingerprint,
+        'startup_mode': bundle.mode,
+        'warmup_seconds': bundle.warmup_seconds
+    }
+    if reasons:
+        body['reasons'] = reasons
+        return jsonify(body), 503
+    return jsonify(body)
+
+# ------------------------------------------------------------
+# ♻️ Hot Model Reload (load + warm off the request path, then swap)
+# ------------------------------------------------------------
+reload_state = {'state': 'idle', 'version': None, 'error': None, 'started_at': None, 'seconds': None}
+_reload_lock = threading.Lock()
+
+def reload_model(version=None, wait=False, activate=False):
+    """Load, warm and activate a model version in a background thread; False if a reload is already running.
+
+    With activate=True the registry is pointed at `version` too, but only once
+    that version has loaded and warmed here: a rejected or failed reload never
+    moves the other workers' watchers. Raises ValueError (nothing started) for
+    an unknown version.
+    """
+    if not _reload_lock.acquire(blocking=False):
+        return False
+    if activate:
+        try:
+            registry_with_active(version)   # validate now, write after the load succeeds
+        except Exception:
+            _reload_lock.release()
+            raise
+    reload_state.update(state='loading', version=version, error=None,
+                        started_at=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()), seconds=None)
+    worker = threading.Thread(target=_reload, args=(version, activate), name='model-reload', daemon=True)
+    worker.start()
+    if wait:
+        worker.join()
+    return True
+
+def _reload(version, activate=False):
+    started = time.perf_counter()
+    try:
+        bundle = load_bundle(locate_model(version))
+        if bundle.is_fallback:
+            raise RuntimeError("model files not found")
+        bundle.full_model()     # a reload is already off the request path: no need to defer the pickles
+        if not warm_up(bundle):
+            raise RuntimeError(f"warm-up failed: {bundle.warmup_error}")
+        if activate:
+            set_active_version(bundle.version)
+        previous = active_bundle.version
+        activate_bundle(bundle)
+        reload_state.update(state='succeeded', version=bundle.version, seconds=round(time.perf_counter() - started, 4))
+        logger.info("♻️ Model %s is now serving (was %s), loaded and warmed in %.2fs",
+                    bundle.version, previous, reload_state['seconds'])
+    except Exception as e:
+        reload_state.update(state='failed', error=str(e), seconds=round(time.perf_counter() - started, 4))
+        logger.error("❌ Model reload failed, still serving %s: %s", active_bundle.version, e)
+    finally:
+        _reload_lock.release()
+
+def registry_with_active(version):
+    """The registry manifest with `version` active (not written); ValueError for a missing registry or version"""
+    registry = read_registry()
+    if registry is None:
+        raise ValueError(f"no model registry at {MODEL_REGISTRY_PATH}")
+    if not any(v['version'] == version for v in registry['versions']):
+        raise ValueError(f"model version {version!r} is not in the registry")
+    registry['active'] = version
+    return registry
+
+def set_active_version(version):
+    """Point the registry at `version` (every worker's watcher follows)"""
+    write_registry(registry_with_active(version))
+
+_registry_watcher = None
+
+def _watch_registry():
+    """Reload when the registry's active version changes, so every worker process follows an activation"""
+    manifest_path = os.path.join(MODEL_REGISTRY_PATH, 'manifest.json')
+    seen = os.path.getmtime(manifest_path) if os.path.exists(manifest_path) else None
+    while True:
+        time.sleep(MODEL_REGISTRY_POLL_SECONDS)
+        try:
+            mtime = os.path.getmtime(manifest_path) if os.path.exists(manifest_path) else None
+            if mtime == seen:
+                continue
+            registry = read_registry()
+            in_progress = reload_state['state'] == 'loading' and reload_state['version'] == (registry or {}).get('active')
+            if registry and registry['active'] != active_bundle.version and not in_progress:
+                logger.info("♻️ Registry now points at model %s, reloading", registry['active'])
+                if not reload_model(registry['active'], wait=True):
+                    continue    # another reload holds the lock: leave `seen` alone and retry on the next poll
+            seen = mtime
+        except Exception as e:
+            logger.warning("⚠️ Model registry check failed: %s", e)
+
+def start_registry_watcher():
+    """Start this process's registry poller; called by serving processes only (gunicorn post_fork,
+    the ASGI lifespan, the dev server), never at import, so a preloading master doesn't reload models"""
+    global _registry_watcher
+    if MODEL_REGISTRY_POLL_SECONDS <= 0:
+        return
+    # A thread started before fork is not alive in the child, so each worker gets exactly one
+    if _registry_watcher is not None and _registry_watcher.is_alive():
+        return
+    _registry_watcher = threading.Thread(target=_watch_registry, name='model-registry-watcher', daemon=True)
+    _registry_watcher.start()
+
+def _admin_authorized():
+    supplied = request.headers.get('X-Admin-Token', '')
+    if not supplied and request.headers.get('Authorization', '').startswith('Bearer '):
+        supplied = request.headers['Authorization'][len('Bearer '):]
+    return bool(ADMIN_TOKEN) and hmac.compare_digest(supplied.strip().encode(), ADMIN_TOKEN.encode())
+
+@app.route('/api/admin/reload', methods=['GET', 'POST'])
+def admin_reload():
+    """POST {"version": "..."} activates and loads a registry version (no body: reload the active one); GET reports status"""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin endpoints are disabled (set ADMIN_TOKEN)'}), 403
+    if not _admin_authorized():
+        return jsonify({'error': 'Invalid admin token'}), 401
+
+    if request.method == 'GET':
+        registry = read_registry()
+        return jsonify({
+            'reload': reload_state,
+            'serving': active_bundle.describe(),
+            'registry': registry
+        })
+
+    try:
+        data = request_json() if request.get_data() else {}
+        if not isinstance(data, dict):
+            raise ValidationError([{'field': None, 'message': 'Request body must be a JSON object'}])
+    except ValidationError as e:
+        # A malformed body is rejected, not read as "reload the active version"
+        return validation_failed(e)
+    version = data.get('version')
+    version = None if version is None else str(version)
+    try:
+        accepted = reload_model(version, activate=version is not None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    if not accepted:
+        return jsonify({'error': 'A model reload is already in progress', 'reload': reload_state}), 409
+    logger.info("♻️ Model reload requested (version: %s)", version or 'registry active')
+    return jsonify({'status': 'reloading', 'version': version, 'serving': active_bundle.version}), 202
+
+# Warm up once every route exists (gunicorn workers warm up again after fork)
+warm_up()
+
 # ------------------------------------------------------------
 # 🚀 Run the Combined App
 # ------------------------------------------------------------
@@ -843,12 +2932,21 @@ if __name__ == '__main__':
     print("🔥 COMBINED RA Prediction & Recommendations API")
     print("📍 Available endpoints:")
     print("   POST /api/compare-ra-risk        - Progress Tracking")
+    print("   POST /api/ra-risk-trajectory     - Risk Trajectory (N visits)")
     print("   POST /api/predict-ra-risk        - Single Prediction") 
+    print("   POST /api/predict-ra-risk/batch  - Batch Prediction")
     print("   POST /api/generate-recommendations - Personalized Recommendations")
+    print("   POST /api/generate-recommendations/batch - Bulk Recommendations (NDJSON stream)")
     print("   GET  /api/health                 - Health Check")
     print("   GET  /api/recommendations-health - Recommendations Health")
+    print("   GET  /api/metrics                - Latency Metrics")
+    print("   GET  /api/ready                  - Readiness Probe")
+    print("   POST /api/admin/reload           - Hot Model Reload (needs ADMIN_TOKEN)")
     print("   GET  /                           - Root")
-    print("\n🎯 Using:", "YOUR ACTUAL TRAINED MODEL" if model else "FALLBACK MODEL")
+    print("\n🎯 Using:", "YOUR ACTUAL TRAINED MODEL" if real_model_loaded() else "FALLBACK MODEL")
     print("🚀 Starting on http://localhost:5000")
-    
+
+    # Under the debug reloader only the child process (WERKZEUG_RUN_MAIN) serves requests
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        start_registry_watcher()
     app.run(host='0.0.0.0', port=5000, debug=True)
\ No newline at end of file
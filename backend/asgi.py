@@ -0,0 +1,231 @@
+"""
+ASGI entry point for async serving:  SERVER_MODE=async gunicorn -c gunicorn.conf.py asgi:app
+(or a single process:  uvicorn asgi:app --port 5000)
+
+The Flask app is served unchanged, so every endpoint keeps its exact
+request/response contract. This adapter runs it behind an asyncio event
+loop: request bodies are read and responses written by the loop, so a
+client on a slow connection costs a coroutine instead of a worker thread.
+Flask itself (validation, inference, serialization) runs on a bounded
+thread pool only once the whole body has arrived.
+
+Each request runs start to finish on one pool thread, because Flask's
+request context and the app's thread-locals (pinned model bundle, stage
+timer) belong to the thread that started it. Streamed responses (bulk
+recommendations) are generated on that thread too and handed to the loop
+chunk by chunk; a reader that falls STREAM_QUEUE_CHUNKS behind pauses the
+generator rather than buffering the rest.
+
+Environment:
+    ASGI_THREADS          inference threads per worker (default GUNICORN_THREADS, else 2)
+    ASGI_MAX_BODY_BYTES   largest request body accepted, 0 = unlimited (default 64 MiB)
+"""
+import asyncio
+import io
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from app import app as flask_app, logger, start_registry_watcher
+
+ASGI_THREADS = int(os.environ.get('ASGI_THREADS', os.environ.get('GUNICORN_THREADS', 2)))
+ASGI_MAX_BODY_BYTES = int(os.environ.get('ASGI_MAX_BODY_BYTES', 64 * 1024 * 1024))
+# Chunks of a streamed response queued ahead of the client before the generator waits
+STREAM_QUEUE_CHUNKS = 8
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def read_body(receive, limit):
+    """The complete request body, or None if the client went away first"""
+    chunks, size = [], 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        body = message.get('body', b'')
+        size += len(body)
+        if limit and size > limit:
+            raise BodyTooLarge()
+        chunks.append(body)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+def wsgi_environ(scope, body):
+    """WSGI environ for an ASGI HTTP scope whose body has been read in full"""
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1] or 80),
+        'SERVER_PROTOCOL': f"HTTP/{scope['http_version']}",
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.input_terminated': True,
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False
+    }
+    for name, value in scope['headers']:
+        key = name.decode('latin-1').upper().replace('-', '_')
+        value = value.decode('latin-1')
+        if key in ('CONTENT_LENGTH', 'TRANSFER_ENCODING'):
+            continue
+        if key != 'CONTENT_TYPE':
+            key = 'HTTP_' + key
+        environ[key] = f"{environ[key]},{value}" if key in environ else value
+    # The body is already buffered, whatever framing the client used to send it
+    environ['CONTENT_LENGTH'] = str(len(body))
+    return environ
+
+
+class WsgiCall:
+    """One Flask request, run on a pool thread and reported back to the event loop.
+
+    The thread posts (chunk, more_body) tuples to `events`, or the exception
+    that escaped Flask; `room` bounds how far a streamed body runs ahead of
+    the client.
+    """
+
+    def __init__(self, environ, loop):
+        self.environ = environ
+        self.loop = loop
+        self.status = None
+        self.headers = None
+        self.events = asyncio.Queue()
+        self.room = threading.Semaphore(STREAM_QUEUE_CHUNKS)
+        self.abandoned = False
+
+    def start_response(self, status, headers, exc_info=None):
+        if exc_info and self.status is not None:
+            raise exc_info[1].with_traceback(exc_info[2])
+        self.status = int(status.split(' ', 1)[0])
+        self.headers = [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+        return self._write
+
+    def _write(self, data):
+        # Flask always returns its body; only legacy imperative WSGI apps push bytes through write()
+        raise RuntimeError("the WSGI write() callable is not supported by the ASGI adapter; "
+                           "return the response body from the application instead")
+
+    def _post(self, event):
+        self.loop.call_soon_threadsafe(self.events.put_nowait, event)
+
+    def run(self):
+        try:
+            iterable = flask_app(self.environ, self.start_response)
+            try:
+                if any(name == b'content-length' for name, _ in self.headers):
+                    self._post((b''.join(iterable), False))
+                    return
+                for chunk in iterable:
+                    if not chunk:
+                        continue
+                    self.room.acquire()
+                    if self.abandoned:
+                        return
+                    self._post((chunk, True))
+                self._post((b'', False))
+            finally:
+                if hasattr(iterable, 'close'):
+                    iterable.close()
+        except BaseException as e:
+            self._post(e)
+
+    def abandon(self):
+        """Stop a streamed body whose client is gone"""
+        self.abandoned = True
+        self.room.release()
+
+
+class AsgiApp:
+    """ASGI application serving the Flask app with reads and writes on the event loop"""
+
+    def __init__(self, threads=ASGI_THREADS, max_body_bytes=ASGI_MAX_BODY_BYTES):
+        self.threads = max(1, threads)
+        self.max_body_bytes = max_body_bytes
+        self._executor = None
+
+    @property
+    def executor(self):
+        # Created in the serving process on first use: pool threads don't survive a fork
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.threads, thread_name_prefix='asgi-inference')
+        return self._executor
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self.lifespan(receive, send)
+        elif scope['type'] == 'http':
+            await self.http(scope, receive, send)
+        else:
+            raise RuntimeError(f"Unsupported ASGI scope type: {scope['type']}")
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                # Serving process only (a no-op under gunicorn, where post_fork already started it)
+                start_registry_watcher()
+                logger.info("🚀 ASGI worker ready (%d inference thread(s))", self.threads)
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self._executor is not None:
+                    self._executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def http(self, scope, receive, send):
+        try:
+            body = await read_body(receive, self.max_body_bytes)
+        except BodyTooLarge:
+            await self.error(send, 413, f'Request body exceeds {self.max_body_bytes} bytes')
+            return
+        if body is None:
+            return
+
+        loop = asyncio.get_running_loop()
+        call = WsgiCall(wsgi_environ(scope, body), loop)
+        loop.run_in_executor(self.executor, call.run)
+        finished = False
+        try:
+            started = False
+            while not finished:
+                event = await call.events.get()
+                if isinstance(event, BaseException):
+                    raise event
+                chunk, more_body = event
+                if not started:
+                    await send({'type': 'http.response.start', 'status': call.status, 'headers': call.headers})
+                    started = True
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': more_body})
+                if more_body:
+                    call.room.release()
+                finished = not more_body
+        finally:
+            if not finished:
+                call.abandon()
+
+    async def error(self, send, status, message):
+        body = json.dumps({'error': message}).encode()
+        await send({'type': 'http.response.start', 'status': status, 'headers': [
+            (b'content-type', b'application/json'),
+            (b'content-length', str(len(body)).encode())
+        ]})
+        await send({'type': 'http.response.body', 'body': body})
+
+
+app = AsgiApp()
@@ -0,0 +1,90 @@
+"""
+Single-record inference microbenchmark.
+
+Compares the original DataFrame path (pd.DataFrame -> apply(adjust_by_age_gender)
+-> scaler.transform(DataFrame) -> predict_proba) against the pandas-free fast
+path in app.py (honours SCORER_MODE) and reports p50/p99 latency for each:
+
+    python bench_inference.py
+    python bench_inference.py --iterations 5000
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import app
+
+SAMPLE_RECORDS = [
+    # age, gender, ESR, CRP, RF, Anti-CCP
+    (35.0, 0, 12.0, 3.1, 8.0, 5.0),
+    (52.0, 1, 34.0, 14.2, 28.5, 41.0),
+    (67.0, 0, 48.0, 31.0, 44.0, 62.0),
+    (16.0, 1, 21.0, 9.5, 11.0, 19.0),
+]
+
+
+def dataframe_features(age, gender, esr, crp, rf, anti_ccp):
+    """The original per-request feature path"""
+    data = pd.DataFrame([{'Age': age, 'Gender': gender, 'ESR': esr, 'CRP': crp, 'RF': rf, 'Anti-CCP': anti_ccp}])
+    data = data.apply(app.adjust_by_age_gender, axis=1)
+    return app.active_bundle.scaler.transform(data[app.MODEL_FEATURES])
+
+
+def dataframe_probability(*record):
+    return app.active_bundle.full_model().predict_proba(dataframe_features(*record))[0][1]
+
+
+def fast_features(*record):
+    return app.model_input_row(*record)
+
+
+def fast_probability(*record):
+    return app.model_probabilities(app.model_input_row(*record))[0]
+
+
+def measure(fn, iterations, warmup):
+    """Per-call latencies in microseconds"""
+    for i in range(warmup):
+        fn(*SAMPLE_RECORDS[i % len(SAMPLE_RECORDS)])
+
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        record = SAMPLE_RECORDS[i % len(SAMPLE_RECORDS)]
+        start = time.perf_counter_ns()
+        fn(*record)
+        timings[i] = (time.perf_counter_ns() - start) / 1000
+    return timings
+
+
+def report(label, timings):
+    p50, p99 = np.percentile(timings, [50, 99])
+    print(f"  {label:<22} p50 {p50:9.1f} µs   p99 {p99:9.1f} µs   mean {timings.mean():9.1f} µs")
+    return p50, p99
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--warmup', type=int, default=100)
+    args = parser.parse_args()
+
+    # The DataFrame path needs the unpickled model and scaler, even after a fast-mode start
+    app.active_bundle.full_model()
+
+    # Both paths must agree before their timings mean anything
+    for record in SAMPLE_RECORDS:
+        assert np.array_equal(dataframe_features(*record), fast_features(*record)), record
+        assert dataframe_probability(*record) == fast_probability(*record), record
+
+    for stage, slow, fast in [('features + scaling', dataframe_features, fast_features),
+                              ('end-to-end probability', dataframe_probability, fast_probability)]:
+        print(f"\n📊 {stage} ({args.iterations} calls)")
+        slow_p50, slow_p99 = report('DataFrame path', measure(slow, args.iterations, args.warmup))
+        fast_p50, fast_p99 = report('NumPy fast path', measure(fast, args.iterations, args.warmup))
+        print(f"  speed-up               p50 {slow_p50 / fast_p50:8.1f}x     p99 {slow_p99 / fast_p99:8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
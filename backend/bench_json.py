@@ -0,0 +1,114 @@
+"""
+Response encoding microbenchmark.
+
+Captures the payload each endpoint hands to jsonify (warm-up requests, plus
+a 100-record batch) and times encoding it with every JSON provider: the
+standard library as the debug server used to run it (indent=2), the
+standard library compact, and orjson. Recommendations are also timed on
+the pre-serialized template path the endpoint actually uses:
+
+    python bench_json.py
+    python bench_json.py --iterations 5000
+"""
+import argparse
+import time
+
+import numpy as np
+
+import app
+
+
+def capture_payloads():
+    """{label: object passed to jsonify} for the scoring endpoints"""
+    captured = {}
+    real_response = app.app.json.response
+
+    def capture(*args, **kwargs):
+        captured['last'] = app.app.json._prepare_response_obj(args, kwargs)
+        return real_response(*args, **kwargs)
+
+    client = app.app.test_client()
+    app.app.json.response = capture
+    try:
+        calls = {path: body for path, body in reversed(app.warmup_requests())}
+        predictions = calls['/api/predict-ra-risk/batch']['records']
+        requests = [
+            ('GET /api/health', 'get', '/api/health', None),
+            ('predict-ra-risk', 'post', '/api/predict-ra-risk', calls['/api/predict-ra-risk']),
+            ('predict-ra-risk/batch x100', 'post', '/api/predict-ra-risk/batch',
+             {'records': (predictions * 25)[:100]}),
+            ('compare-ra-risk', 'post', '/api/compare-ra-risk', calls['/api/compare-ra-risk']),
+        ]
+        payloads = {}
+        for label, method, path, body in requests:
+            response = getattr(client, method)(path, json=body)
+            assert response.status_code == 200, (path, response.status_code)
+            payloads[label] = captured.pop('last')
+    finally:
+        del app.app.json.response
+    return payloads
+
+
+def recommendation_inputs():
+    body = next(body for path, body in app.warmup_requests()
+                if path == '/api/generate-recommendations')
+    patient = app.parse_recommendation_request(body)
+    return patient, app.compute_risk_score(app.recommendation_risk_row(patient))
+
+
+def measure(fn, iterations):
+    """Median and p99 per-call time in microseconds"""
+    for _ in range(min(iterations, 200)):
+        fn()
+    timings = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter_ns()
+        fn()
+        timings[i] = (time.perf_counter_ns() - start) / 1000
+    return np.percentile(timings, [50, 99])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+
+    pretty = app.NumpyJSONProvider(app.app)
+    pretty.compact = False
+    providers = [('stdlib indent=2', pretty), ('stdlib', app.NumpyJSONProvider(app.app))]
+    try:
+        providers.append(('orjson', app.OrjsonProvider(app.app)))
+    except ImportError:
+        print("⚠️ orjson is not installed - timing the standard library only")
+
+    payloads = capture_payloads()
+    patient, risk_result = recommendation_inputs()
+    version = app.active_bundle.version
+
+    def recommendations_dict():
+        response = app.build_recommendation_response(patient, risk_result)
+        response['model_version'] = version
+        return response
+
+    payloads['generate-recommendations'] = recommendations_dict()
+
+    print(f"📊 Encode time per response, p50 / p99 µs ({args.iterations} calls, JSON_ENGINE={app.JSON_ENGINE})")
+    print(f"  {'endpoint':<28} {'bytes':>7}" + ''.join(f"  {name:>20}" for name, _ in providers))
+    with app.app.app_context():
+        for label, payload in payloads.items():
+            size = len(providers[-1][1].response(payload).get_data())
+            cells = [measure(lambda: provider.response(payload), args.iterations) for _, provider in providers]
+            print(f"  {label:<28} {size:>7}" + ''.join(f"  {p50:9.1f} / {p99:8.1f}" for p50, p99 in cells))
+
+        # Build + encode: dict path through each provider vs the spliced template fragments
+        print(f"\n📊 generate-recommendations build + encode, p50 / p99 µs")
+        for name, provider in providers:
+            p50, p99 = measure(lambda: provider.response(recommendations_dict()), args.iterations)
+            print(f"  {'dict + ' + name:<28} {p50:9.1f} / {p99:8.1f}")
+        p50, p99 = measure(lambda: app.recommendation_response_json(patient, risk_result, model_version=version),
+                           args.iterations)
+        print(f"  {'template fragments':<28} {p50:9.1f} / {p99:8.1f}")
+
+
+if __name__ == '__main__':
+    main()
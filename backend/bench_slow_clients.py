@@ -0,0 +1,125 @@
+"""
+Sync vs async serving under slow clients.
+
+Starts `gunicorn -c gunicorn.conf.py` once per SERVER_MODE (sync: wsgi:app
+on gthread workers, async: asgi:app on uvicorn workers) with the same
+worker and thread counts. Many slow clients trickle lab uploads to
+/api/predict-ra-risk, like phones on a poor connection, while a few fast
+keep-alive clients measure the latency and throughput everyone else gets:
+
+    python bench_slow_clients.py
+    python bench_slow_clients.py --slow-clients 200 --upload-seconds 5 --duration 30
+
+The prediction cache is disabled for the run so every request reaches the model.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+from bench_wsgi_scaling import HERE, client, free_port, wait_ready
+
+MODES = {'sync': 'wsgi:app', 'async': 'asgi:app'}
+
+
+def slow_client(port, deadline, upload_seconds, pieces, seed, results):
+    """Post one lab record at a time, spreading each body over `upload_seconds`"""
+    rng = random.Random(seed)
+    completed = errors = 0
+    while time.time() < deadline:
+        body = json.dumps({
+            'age': rng.randint(10, 85),
+            'gender': rng.choice(['male', 'female']),
+            'rheumatoidFactor': round(rng.uniform(0, 60), 1),
+            'antiCCP': round(rng.uniform(0, 60), 1),
+            'cReactiveProtein': round(rng.uniform(0, 40), 1),
+            'erythrocyteSedimentationRate': rng.randint(0, 80)
+        }).encode()
+        head = (f"POST /api/predict-ra-risk HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                f"Connection: close\r\n\r\n").encode()
+        step = max(1, -(-len(body) // pieces))
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=upload_seconds + 30) as sock:
+                sock.sendall(head)
+                for i in range(0, len(body), step):
+                    time.sleep(upload_seconds / pieces)
+                    sock.sendall(body[i:i + step])
+                response = b''
+                while chunk := sock.recv(65536):
+                    response += chunk
+            if response.startswith(b'HTTP/1.1 200'):
+                completed += 1
+            else:
+                errors += 1
+        except OSError:
+            errors += 1
+    results.append((completed, errors))
+
+
+def run(mode, workers, threads, fast_clients, slow_clients, upload_seconds, duration):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), SERVER_MODE=mode, WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(threads), PREDICTION_CACHE_SIZE='0', GUNICORN_LOG_LEVEL='warning',
+               LOG_LEVEL='WARNING')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', MODES[mode]],
+                              cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        # Slow uploads get going (and, in sync mode, hold their threads) before timing starts
+        slow_results = []
+        deadline = time.time() + upload_seconds + duration
+        slow = [threading.Thread(target=slow_client, args=(port, deadline, upload_seconds, 10, seed, slow_results))
+                for seed in range(slow_clients)]
+        for thread in slow:
+            thread.start()
+        time.sleep(upload_seconds / 2)
+
+        with multiprocessing.Pool(fast_clients) as pool:
+            results = pool.starmap(client, [(port, duration, seed) for seed in range(fast_clients)])
+        for thread in slow:
+            thread.join()
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    errors = sum(e for _, e in results)
+    slow_completed = sum(c for c, _ in slow_results)
+    slow_errors = sum(e for _, e in slow_results)
+    if not latencies:
+        return 0.0, float('nan'), float('nan'), errors, slow_completed, slow_errors
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return len(latencies) / duration, p50, p99, errors, slow_completed, slow_errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modes', nargs='+', choices=list(MODES), default=list(MODES))
+    parser.add_argument('--workers', type=int, default=1, help='worker processes')
+    parser.add_argument('--threads', type=int, default=4, help='threads per worker (inference threads in async mode)')
+    parser.add_argument('--fast-clients', type=int, default=4, help='keep-alive client processes being timed')
+    parser.add_argument('--slow-clients', type=int, default=64, help='concurrent slow uploaders')
+    parser.add_argument('--upload-seconds', type=float, default=2.0, help='time each slow client takes to send a body')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds of timed fast-client traffic per mode')
+    args = parser.parse_args()
+
+    print(f"🐢 {args.slow_clients} slow clients ({args.upload_seconds:.1f}s per upload), "
+          f"{args.fast_clients} fast clients, {args.workers} worker(s) x {args.threads} thread(s), "
+          f"{args.duration:.0f}s per mode")
+    print(f"{'mode':>6} {'fast req/s':>11} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'slow done':>10} {'slow err':>9}")
+    for mode in args.modes:
+        rps, p50, p99, errors, slow_done, slow_errors = run(
+            mode, args.workers, args.threads, args.fast_clients, args.slow_clients, args.upload_seconds, args.duration)
+        print(f"{mode:>6} {rps:>11.1f} {p50:>9.2f} {p99:>9.2f} {errors:>7} {slow_done:>10} {slow_errors:>9}")
+
+
+if __name__ == '__main__':
+    main()
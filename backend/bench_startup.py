@@ -0,0 +1,78 @@
+"""
+Cold-start benchmark: time from launching a fresh Python process to the first
+successful /api/predict-ra-risk response, for each STARTUP_MODE.
+
+Each run is a new interpreter (nothing warm in sys.modules), so the numbers
+include the interpreter, every import and the model load. Fast mode needs
+the artifact (python export_model_artifact.py); it is exported first if missing.
+Fast mode unpickles the model in a background thread, so the first response
+does not wait for it (/api/ready does):
+
+    python bench_startup.py
+    python bench_startup.py --runs 10 --modes fast
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Runs in the child: import the app, score one record, report app.startup_timings
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app
+client = app.app.test_client()
+response = client.post('/api/predict-ra-risk', json={
+    'age': 52, 'gender': 'F', 'rheumatoidFactor': 28.5, 'antiCCP': 41,
+    'cReactiveProtein': 14.2, 'erythrocyteSedimentationRate': 34
+})
+assert response.status_code == 200, response.get_data(as_text=True)
+print(json.dumps({
+    'in_process_seconds': time.perf_counter() - started,
+    'timings': app.startup_timings,
+    'heavy_modules': sorted(m for m in ('pandas', 'sklearn', 'xgboost', 'scipy', 'joblib') if m in sys.modules)
+}))
+"""
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def first_response(mode):
+    env = dict(os.environ, STARTUP_MODE=mode, LOG_LEVEL='WARNING', PREDICTION_CACHE_SIZE='0')
+    started = time.perf_counter()
+    out = subprocess.run([sys.executable, '-c', CHILD], cwd=HERE, env=env, capture_output=True, text=True, check=True)
+    wall = time.perf_counter() - started
+    return wall, json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--modes', nargs='+', default=['eager', 'fast'], choices=['eager', 'fast'])
+    args = parser.parse_args()
+
+    if 'fast' in args.modes and not os.path.exists(os.path.join(HERE, 'models', 'RA_model.mmap', 'manifest.json')):
+        subprocess.run([sys.executable, 'export_model_artifact.py'], cwd=HERE, check=True)
+
+    medians = {}
+    for mode in args.modes:
+        walls, reports = zip(*(first_response(mode) for _ in range(args.runs)))
+        report = reports[-1]
+        if report['timings'].get('startup_mode') != mode:
+            print(f"⚠️ {mode}: app started in {report['timings'].get('startup_mode')} mode")
+        medians[mode] = float(np.median(walls))
+        print(f"\n🚀 STARTUP_MODE={mode} ({args.runs} cold starts)")
+        print(f"  time to first response   median {medians[mode]:.3f}s   min {min(walls):.3f}s   max {max(walls):.3f}s")
+        print(f"  app imports {report['timings']['imports_seconds']:.3f}s   model load {report['timings']['model_load_seconds']:.3f}s")
+        print(f"  heavy modules imported: {', '.join(report['heavy_modules']) or 'none'}")
+
+    if len(medians) == 2:
+        print(f"\n  speed-up (median)        {medians['eager'] / medians['fast']:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+"""
+Benchmark suite for the scoring hot path, with stored JSON baselines.
+
+Times the feature code (adjust_by_age_gender, biomarker_flag), the risk
+score, feature scaling + model inference at batch sizes 1 / 10 / 1k / 100k,
+each recommendation builder and full round trips through the Flask test
+client for the three POST endpoints. Save a run as a baseline, then compare
+later runs against it; compare exits non-zero when any case got slower than
+the threshold allows:
+
+    python bench_suite.py --save baseline.json
+    python bench_suite.py --compare baseline.json              # flag > 10% slower
+    python bench_suite.py --compare baseline.json --threshold 25 --filter inference
+
+Each case is calibrated to about --min-time seconds per repeat and reported
+as the median per-call time over --repeats repeats. Baselines only compare
+meaningfully on the same machine and settings (recorded under "environment").
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+# Every request must reach the model; no registry polling during the run
+os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+os.environ.setdefault('MODEL_REGISTRY_POLL_SECONDS', '0')
+os.environ.setdefault('LOG_LEVEL', 'WARNING')
+
+import app
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+INFERENCE_BATCH_SIZES = (1, 10, 1_000, 100_000)
+
+
+def random_lab_columns(n, seed=0):
+    """N plausible raw records as (age, gender, esr, crp, rf, anti_ccp) arrays"""
+    rng = np.random.default_rng(seed)
+    return (rng.uniform(10, 90, n).round(), rng.integers(0, 2, n).astype(np.float64),
+            rng.uniform(0, 80, n).round(1), rng.uniform(0, 40, n).round(1),
+            rng.uniform(0, 60, n).round(1), rng.uniform(0, 60, n).round(1))
+
+
+def build_cases():
+    """{case name: zero-argument callable}, inputs prepared up front"""
+    cases = {}
+    calls = app.warmup_requests()
+    bodies = {path: body for path, body in reversed(calls)}
+
+    # Feature engineering and flags, one record
+    row = {'Age': 52.0, 'Gender': 1, 'ESR': 34.0, 'CRP': 14.2, 'RF': 28.5, 'Anti-CCP': 41.0}
+    cases['features/adjust_by_age_gender'] = lambda: app.adjust_by_age_gender(dict(row))
+    cases['features/biomarker_flag'] = lambda: app.biomarker_flag(52, 1, 34.0, 14.2, 28.5, 41.0)
+
+    patient = app.parse_recommendation_request(bodies['/api/generate-recommendations'])
+    risk_row = app.recommendation_risk_row(patient)
+    cases['risk/compute_risk_score'] = lambda: app.compute_risk_score(risk_row)
+
+    # Scaling + model: the single-record row path, then matrices of every batch size
+    record = (52.0, 1, 34.0, 14.2, 28.5, 41.0)
+    cases['inference/row'] = lambda: app.evaluate_model(app.model_input_row(*record))
+    for n in INFERENCE_BATCH_SIZES:
+        columns = random_lab_columns(n)
+        cases[f'inference/batch_{n}'] = lambda columns=columns: app.evaluate_model(app.model_inputs(*columns))
+
+    # Recommendation builders for one patient
+    risk_result = app.compute_risk_score(risk_row)
+    age, flags = patient['age'], risk_result['flags']
+    severity = app.risk_severity(risk_result['combined_score'])
+    cases['recommendations/diet'] = lambda: app.get_diet_recommendations(
+        age, patient['gender_num'], flags, patient['smoke_num'], patient['drink_cat'], patient['ra_flag'],
+        patient['vegetarian'])
+    cases['recommendations/exercise'] = lambda: app.get_exercise_recommendations(
+        age, severity, flags, patient['smoke_num'])
+    cases['recommendations/lifestyle'] = lambda: app.get_lifestyle_recommendations(
+        age, severity, patient['smoke_num'], patient['drink_cat'], patient['weight_kg'])
+    cases['recommendations/mental_wellness'] = lambda: app.get_mental_wellness_recommendations(severity, age)
+    cases['recommendations/response_dict'] = lambda: app.build_recommendation_response(patient, risk_result)
+    cases['recommendations/response_json'] = lambda: app.recommendation_response_json(patient, risk_result)
+
+    # Full requests through routing, validation, scoring, serialization and the request hooks
+    client = app.app.test_client()
+    for path in ('/api/predict-ra-risk', '/api/compare-ra-risk', '/api/generate-recommendations'):
+        body = bodies[path]
+        response = client.post(path, json=body)
+        assert response.status_code == 200, (path, response.status_code, response.get_data(as_text=True))
+        cases[f'request{path}'] = lambda path=path, body=body: client.post(path, json=body).get_data()
+
+    return cases
+
+
+def measure(fn, repeats, min_time):
+    """Per-call seconds for each repeat, with the loop count calibrated to ~min_time per repeat"""
+    fn()
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1_000_000:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.1))
+
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        timings.append((time.perf_counter() - start) / number)
+    return number, timings
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    import sklearn
+    import xgboost
+    return {
+        'commit': commit,
+        'recorded_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'machine': platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'scikit-learn': sklearn.__version__,
+        'xgboost': xgboost.__version__,
+        'model_version': app.active_bundle.version,
+        'model_fingerprint': app.active_bundle.fingerprint,
+        'settings': {name: os.environ.get(name) for name in (
+            'STARTUP_MODE', 'SCORER_MODE', 'INFERENCE_ENGINE', 'JSON_ENGINE', 'NATIVE_ENGINE_MAX_ROWS',
+            'MICRO_BATCH_WINDOW_MS', 'METRICS_ENABLED', 'MODEL_THREADS') if os.environ.get(name) is not None}
+    }
+
+
+def run(cases, repeats, min_time):
+    results = {}
+    print(f"{'case':<40} {'median µs':>12} {'min µs':>12} {'spread':>8} {'calls':>8}")
+    for name, fn in cases.items():
+        number, timings = measure(fn, repeats, min_time)
+        q1, median, q3 = np.percentile(timings, [25, 50, 75])
+        results[name] = {
+            'median_us': median * 1e6,
+            'min_us': min(timings) * 1e6,
+            'iqr_us': (q3 - q1) * 1e6,
+            'calls_per_repeat': number,
+            'repeats': repeats
+        }
+        spread = (q3 - q1) / median if median else 0.0
+        print(f"{name:<40} {median * 1e6:>12.2f} {min(timings) * 1e6:>12.2f} {spread:>7.1%} {number:>8}")
+    return results
+
+
+def compare(baseline, results, threshold):
+    """Print current vs baseline medians; returns the names of regressed cases"""
+    regressions = []
+    print(f"\n📊 vs baseline {baseline['environment'].get('commit') or ''} "
+          f"({baseline['environment'].get('recorded_at', '?')}), threshold {threshold:.0%}")
+    print(f"{'case':<40} {'baseline µs':>12} {'current µs':>12} {'change':>9}")
+    for name, current in results.items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<40} {'-':>12} {current['median_us']:>12.2f} {'new':>9}")
+            continue
+        change = current['median_us'] / base['median_us'] - 1
+        if change > threshold:
+            status = '❌ slower'
+            regressions.append(name)
+        elif change < -threshold:
+            status = '🚀 faster'
+        else:
+            status = '✅'
+        print(f"{name:<40} {base['median_us']:>12.2f} {current['median_us']:>12.2f} {change:>+8.1%}  {status}")
+    missing = [name for name in baseline['results'] if name not in results]
+    if missing:
+        print(f"(not run this time: {', '.join(missing)})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--save', metavar='PATH', help='write this run as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='compare this run against a saved baseline')
+    parser.add_argument('--threshold', type=float, default=10.0, help='percent slowdown counted as a regression')
+    parser.add_argument('--filter', action='append', default=[], help='only cases containing this text (repeatable)')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--min-time', type=float, default=0.2, help='seconds per repeat')
+    parser.add_argument('--list', action='store_true', help='list the cases and exit')
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    cases = build_cases()
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if any(text in name for text in args.filter)}
+    if args.list:
+        print('\n'.join(cases))
+        return 0
+    if not cases:
+        parser.error('no cases match --filter')
+
+    print(f"⏱️  {len(cases)} cases, {args.repeats} repeats of ~{args.min_time}s, model {app.active_bundle.version}")
+    results = run(cases, args.repeats, args.min_time)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({'environment': environment(), 'results': results}, f, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n💾 Baseline saved to {args.save}")
+
+    if baseline is not None:
+        regressions = compare(baseline, results, args.threshold / 100)
+        if regressions:
+            print(f"\n❌ {len(regressions)} regression(s) over {args.threshold:g}%: {', '.join(regressions)}")
+            return 1
+        print("\n✅ No regressions")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,119 @@
+"""
+Throughput scaling of the production WSGI mode across worker counts.
+
+Starts `gunicorn -c gunicorn.conf.py wsgi:app` once per worker count, drives
+/api/predict-ra-risk from several client processes for a fixed duration and
+reports requests/sec and latency per configuration:
+
+    python bench_wsgi_scaling.py                      # 1, 2, 4 ... up to CPU count
+    python bench_wsgi_scaling.py --workers 1 2 4 8 --duration 20
+
+The prediction cache is disabled for the run so every request reaches the model.
+"""
+import argparse
+import http.client
+import json
+import multiprocessing
+import os
+import random
+import socket
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=2)
+            conn.request('GET', '/api/health')
+            if conn.getresponse().status == 200:
+                return
+        except OSError:
+            time.sleep(0.25)
+    raise RuntimeError(f"server on port {port} did not become ready")
+
+
+def client(port, duration, seed):
+    """One keep-alive client posting random lab records until the deadline"""
+    rng = random.Random(seed)
+    conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+    latencies, errors = [], 0
+    deadline = time.time() + duration
+    while time.time() < deadline:
+        body = json.dumps({
+            'age': rng.randint(10, 85),
+            'gender': rng.choice(['male', 'female']),
+            'rheumatoidFactor': round(rng.uniform(0, 60), 1),
+            'antiCCP': round(rng.uniform(0, 60), 1),
+            'cReactiveProtein': round(rng.uniform(0, 40), 1),
+            'erythrocyteSedimentationRate': rng.randint(0, 80)
+        })
+        start = time.perf_counter()
+        try:
+            conn.request('POST', '/api/predict-ra-risk', body, {'Content-Type': 'application/json'})
+            response = conn.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+        except OSError:
+            errors += 1
+            conn = http.client.HTTPConnection('127.0.0.1', port, timeout=30)
+            continue
+        latencies.append(time.perf_counter() - start)
+    return latencies, errors
+
+
+def run(workers, threads, clients, duration):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), WEB_CONCURRENCY=str(workers),
+               GUNICORN_THREADS=str(threads), PREDICTION_CACHE_SIZE='0', GUNICORN_LOG_LEVEL='warning')
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'wsgi:app'],
+                              cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        with multiprocessing.Pool(clients) as pool:
+            results = pool.starmap(client, [(port, duration, seed) for seed in range(clients)])
+    finally:
+        server.terminate()
+        server.wait(30)
+
+    latencies = sorted(l for lat, _ in results for l in lat)
+    errors = sum(e for _, e in results)
+    if not latencies:
+        return 0.0, float('nan'), float('nan'), errors
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000
+    return len(latencies) / duration, p50, p99, errors
+
+
+def main():
+    cores = multiprocessing.cpu_count()
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, nargs='+',
+                        default=sorted({1, *[2 ** i for i in range(1, cores.bit_length()) if 2 ** i <= cores], cores}))
+    parser.add_argument('--threads', type=int, default=2, help='threads per worker')
+    parser.add_argument('--clients', type=int, default=max(4, 2 * cores), help='concurrent client processes')
+    parser.add_argument('--duration', type=float, default=10.0, help='seconds per configuration')
+    args = parser.parse_args()
+
+    print(f"🖥️  {cores} CPU core(s), {args.clients} clients, {args.duration:.0f}s per run")
+    print(f"{'workers':>8} {'req/s':>10} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7} {'scaling':>8}")
+    baseline = None
+    for workers in args.workers:
+        rps, p50, p99, errors = run(workers, args.threads, args.clients, args.duration)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.1f} {p50:>9.2f} {p99:>9.2f} {errors:>7} {rps / baseline if baseline else 0:>7.2f}x")
+
+
+if __name__ == '__main__':
+    main()
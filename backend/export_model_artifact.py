@@ -0,0 +1,52 @@
+"""
+Write the memory-mapped model artifact used by STARTUP_MODE=fast.
+
+Loads a model's RA_model.pkl / scaler.pkl the normal way, exports the scaler
+constants, native tree arrays and decision rule, then re-opens the artifact
+and checks it against the unpickled model before reporting success. Registry
+versions get their artifact next to their pickles:
+
+    python export_model_artifact.py                  # the model the app would serve
+    python export_model_artifact.py --version v2     # a registry version
+    python export_model_artifact.py --output ./models/RA_model.mmap
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+# The export itself needs the unpickled model
+os.environ['STARTUP_MODE'] = 'eager'
+
+import app
+import native_model
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--version', help='registry version (default: the active model)')
+    parser.add_argument('--output', help='artifact directory (default: next to the model)')
+    args = parser.parse_args()
+
+    bundle = app.load_bundle(app.locate_model(args.version)) if args.version else app.active_bundle
+    output = args.output or bundle.artifact_path
+    manifest = app.export_model_artifact(bundle, output)
+
+    # Round trip: the mapped engine must score exactly like the in-memory one
+    _, arrays = native_model.read_artifact(output)
+    mapped = native_model.NativeTreeEnsemble.from_arrays(arrays)
+    rng = np.random.default_rng(1)
+    X_scaled = rng.normal(0.0, 1.5, size=(2048, len(app.MODEL_FEATURES)))
+    expected = bundle.model.predict_proba(X_scaled)[:, 1]
+    diff = float(np.max(np.abs(mapped.predict_positive(X_scaled) - expected)))
+
+    size = sum(os.path.getsize(os.path.join(output, f)) for f in os.listdir(output))
+    print(f"💾 {output}: model {bundle.version}, {len(manifest['arrays'])} arrays, {size / 1024:.0f} KiB, "
+          f"{mapped.n_trees} trees, fingerprint {manifest['model_fingerprint']}")
+    print(f"{'✅' if diff <= native_model.NATIVE_PARITY_TOLERANCE else '❌'} mapped engine vs model.predict_proba: max |diff| {diff:.2e}")
+    return 0 if diff <= native_model.NATIVE_PARITY_TOLERANCE else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,62 @@
+"""
+Production serving config:  gunicorn -c gunicorn.conf.py wsgi:app
+Async mode (uvicorn workers):  SERVER_MODE=async gunicorn -c gunicorn.conf.py asgi:app
+
+The app (and with it RA_model.pkl / scaler.pkl) is imported once in the
+master process before forking, so every worker shares the loaded model
+pages copy-on-write instead of holding its own copy.
+
+Environment:
+    PORT                 listen port (default 5000, set by Render)
+    WEB_CONCURRENCY      worker processes (default: CPU count)
+    SERVER_MODE          sync (gthread workers, default) | async (uvicorn
+                         workers; slow clients are handled on the event loop,
+                         see asgi.py)
+    GUNICORN_THREADS     threads per worker (default 2); in async mode the
+                         inference pool size unless ASGI_THREADS is set
+    MODEL_THREADS        XGBoost threads per worker (default 1, avoids
+                         workers x cores oversubscription)
+    GUNICORN_TIMEOUT     worker timeout in seconds (default 60)
+"""
+import gc
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 2))
+SERVER_MODE = os.environ.get('SERVER_MODE', 'sync').strip().lower()
+worker_class = 'uvicorn.workers.UvicornWorker' if SERVER_MODE == 'async' else 'gthread'
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+keepalive = 5
+
+# Load the model in the master, share it with the workers
+preload_app = True
+
+accesslog = None
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        import app
+        # STARTUP_MODE=fast unpickles the model in a background thread; wait for it here,
+        # before fork, so the workers share one copy and no loader thread is lost in the fork
+        app.active_bundle.wait_for_full_model()
+    # Move everything allocated while loading into the permanent GC generation,
+    # so collections in the workers never touch (and un-share) those pages
+    gc.freeze()
+    server.log.info("🚀 Model preloaded; forking %s %s worker(s) x %s thread(s)", workers, SERVER_MODE, threads)
+
+
+def post_fork(server, worker):
+    import app
+    # The master's log writer thread does not survive fork; give each worker its own
+    app.start_logging()
+    app.set_model_threads(int(os.environ.get('MODEL_THREADS', 1)))
+    # Thread pools and lazy allocations don't carry over from the master either,
+    # so each worker warms up again before it accepts connections
+    app.warm_up()
+    # Follow registry activations (POST /api/admin/reload only reaches one worker); the master never polls
+    app.start_registry_watcher()
@@ -0,0 +1,33 @@
+"""
+Reference ranges for the four lab markers, by age band and gender.
+
+Plain data with no imports, so tools that only need the ranges (the
+load_test.py patient generator) can read them without starting the app.
+app.py compiles them into its ReferenceRangeTable, which drives both the
+*_adj model features and the biomarker flags.
+"""
+
+# Age bands in order: (name, upper bound, bound inclusive). Ages past every bound - and NaN ages - land in the last band
+AGE_BANDS = [
+    ('child', 18, False),
+    ('adult', 60, True),
+    ('senior', None, None),
+]
+
+# Level 0 below `low`, 1 up to `high`, 2 above (NaN values are level 2). Age band / gender None = all
+REFERENCE_RANGES = [
+    # marker     age band  gender    low  high  high inclusive
+    ('ESR',      'child',  None,     10,  20,   True),
+    ('ESR',      'adult',  'male',   15,  30,   True),
+    ('ESR',      'adult',  'female', 20,  40,   True),
+    ('ESR',      'senior', None,     30,  50,   True),
+    ('CRP',      'child',  None,      5,  10,   True),
+    ('CRP',      'adult',  None,      6,  20,   True),
+    ('CRP',      'senior', None,     10,  30,   True),
+    ('RF',       'child',  None,     10,  20,   True),
+    ('RF',       'adult',  None,     14,  30,   True),
+    ('RF',       'senior', None,     20,  40,   True),
+    ('Anti-CCP', None,     None,     20,  40,   False),
+]
+
+REFERENCE_MARKERS = ('ESR', 'CRP', 'RF', 'Anti-CCP')
@@ -0,0 +1,339 @@
+"""
+Reproducible load test against a locally started server.
+
+Generates a seeded synthetic workload: patients drawn from every
+adjust_by_age_gender age band (<18, 18-60, >60) and both genders, with each
+biomarker placed below, inside or above its reference range (sometimes
+exactly on a cutoff). The calls are a weighted mix of predict / compare /
+recommendation requests (optionally trajectory and batch). They are
+replayed open-loop at a target rate, and the run reports throughput,
+latency percentiles and error rates per endpoint:
+
+    python load_test.py                                      # 50 req/s for 30s, sync server
+    python load_test.py --rate 200 --duration 60 --mode async --workers 2 --threads 4
+    python load_test.py --mix predict=5,compare=1,recommend=3,trajectory=1 --seed 7 --json run.json
+    python load_test.py --url http://localhost:5000          # an already running server
+
+The same --seed, --rate, --duration and --mix always produce the same
+requests at the same offsets (the report prints a digest of the workload), so
+runs on different builds are comparable. Latency is measured from each
+request's scheduled send time, so time spent queued behind a slow server
+counts against it.
+"""
+import argparse
+import hashlib
+import http.client
+import json
+import multiprocessing
+import os
+import queue
+import random
+import subprocess
+import sys
+import threading
+import time
+from urllib.parse import urlsplit
+
+import lab_ranges
+from bench_wsgi_scaling import HERE, free_port, wait_ready
+
+ENDPOINTS = {
+    'predict': '/api/predict-ra-risk',
+    'compare': '/api/compare-ra-risk',
+    'recommend': '/api/generate-recommendations',
+    'trajectory': '/api/ra-risk-trajectory',
+    'batch': '/api/predict-ra-risk/batch',
+}
+DEFAULT_MIX = 'predict=6,compare=2,recommend=2'
+SERVER_APPS = {'sync': 'wsgi:app', 'async': 'asgi:app'}
+
+# Ages drawn per adjust_by_age_gender band, with the band edges themselves over-sampled
+AGE_SPANS = {'child': (2, 17), 'adult': (18, 60), 'senior': (61, 90)}
+AGE_EDGES = (17, 18, 60, 61)
+CUTOFF_SHARE = 0.1
+
+
+# ------------------------------------------------------------
+# 🧬 Synthetic patients
+# ------------------------------------------------------------
+def reference_range(marker, band, gender):
+    """(low, high) for a marker from lab_ranges.REFERENCE_RANGES"""
+    for name, row_band, row_gender, low, high, _ in lab_ranges.REFERENCE_RANGES:
+        if name == marker and row_band in (None, band) and row_gender in (None, gender):
+            return low, high
+    raise KeyError((marker, band, gender))
+
+
+def synthetic_labs(rng, band, gender):
+    """{marker: value} with each marker below, inside or above its range for this band and gender"""
+    labs = {}
+    for marker in lab_ranges.REFERENCE_MARKERS:
+        low, high = reference_range(marker, band, gender)
+        if rng.random() < CUTOFF_SHARE:
+            value = rng.choice((low, high))
+        else:
+            value = rng.choice((
+                lambda: rng.uniform(0, low),
+                lambda: rng.uniform(low, high),
+                lambda: rng.uniform(high, high * 2.5),
+            ))()
+        labs[marker] = round(value, 1)
+    return labs
+
+
+def synthetic_patient(rng):
+    band = rng.choice(list(AGE_SPANS))
+    age = rng.choice([a for a in AGE_EDGES if AGE_SPANS[band][0] <= a <= AGE_SPANS[band][1]]) \
+        if rng.random() < CUTOFF_SHARE else rng.randint(*AGE_SPANS[band])
+    gender = rng.choice(('male', 'female'))
+    return {'age': age, 'band': band, 'gender': gender, **synthetic_labs(rng, band, gender)}
+
+
+def follow_up(rng, patient, months):
+    """The same patient `months` later, biomarkers drifted"""
+    later = dict(patient, age=round(patient['age'] + months / 12, 1))
+    for marker in lab_ranges.REFERENCE_MARKERS:
+        later[marker] = round(max(0.0, patient[marker] * rng.lognormvariate(0, 0.35)), 1)
+    return later
+
+
+def prediction_body(patient):
+    return {'age': patient['age'], 'gender': patient['gender'],
+            'erythrocyteSedimentationRate': patient['ESR'], 'cReactiveProtein': patient['CRP'],
+            'rheumatoidFactor': patient['RF'], 'antiCCP': patient['Anti-CCP']}
+
+
+def visit_body(patient):
+    return {'age': patient['age'], 'gender': patient['gender'], 'ESR': patient['ESR'],
+            'CRP': patient['CRP'], 'RF': patient['RF'], 'AntiCCP': patient['Anti-CCP']}
+
+
+def request_body(rng, kind):
+    patient = synthetic_patient(rng)
+    if kind == 'predict':
+        return prediction_body(patient)
+    if kind == 'batch':
+        return {'records': [prediction_body(patient)] + [prediction_body(synthetic_patient(rng)) for _ in range(rng.randint(4, 49))]}
+    if kind == 'compare':
+        months = rng.choice((3, 6, 12))
+        current = follow_up(rng, patient, months)
+        body = {'monthsSinceLastTest': months}
+        for prefix, visit in (('previous', patient), ('current', current)):
+            body.update({f'{prefix}{key[0].upper()}{key[1:]}': value for key, value in visit_body(visit).items()})
+        return body
+    if kind == 'trajectory':
+        visits = [visit_body(patient)]
+        for _ in range(rng.randint(2, 6)):
+            months = rng.choice((3, 6, 12))
+            patient = follow_up(rng, patient, months)
+            visits.append({'monthsSincePrevious': months, **visit_body(patient)})
+        return {'visits': visits}
+    body = {**visit_body(patient), 'age': int(patient['age']),
+            'smokingStatus': rng.choice(('Never', 'Former', 'Current')),
+            'drinkingStatus': rng.choice(('Never', 'Moderate', 'Regular')),
+            'rheumatoidArthritis': rng.randint(0, 1),
+            'vegetarian': rng.random() < 0.3}
+    if rng.random() < 0.8:
+        body['weight'] = rng.randint(40, 120)
+    return body
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(','):
+        kind, _, weight = part.partition('=')
+        kind = kind.strip()
+        if kind not in ENDPOINTS:
+            raise ValueError(f"unknown request kind {kind!r} (use {', '.join(ENDPOINTS)})")
+        mix[kind] = float(weight or 1)
+    if not mix or sum(mix.values()) <= 0:
+        raise ValueError('the mix needs at least one positive weight')
+    return mix
+
+
+def build_workload(seed, rate, duration, mix, arrivals):
+    """[(offset seconds, kind, JSON body bytes)], identical for identical arguments"""
+    rng = random.Random(seed)
+    kinds, weights = list(mix), list(mix.values())
+    workload, offset = [], 0.0
+    while True:
+        offset += rng.expovariate(rate) if arrivals == 'poisson' else 1 / rate
+        if offset >= duration:
+            return workload
+        kind = rng.choices(kinds, weights)[0]
+        workload.append((offset, kind, json.dumps(request_body(rng, kind)).encode()))
+
+
+def workload_digest(workload):
+    digest = hashlib.sha256()
+    for offset, kind, body in workload:
+        digest.update(f'{offset:.6f} {kind} '.encode())
+        digest.update(body)
+    return digest.hexdigest()[:16]
+
+
+# ------------------------------------------------------------
+# 🚦 Open-loop replay
+# ------------------------------------------------------------
+def replay(host, port, start_at, requests, connections):
+    """Send (offset, kind, body) at start_at + offset from `connections` keep-alive connections.
+
+    Returns [(kind, status or None, seconds from schedule to response, seconds on the wire)].
+    """
+    pending = queue.Queue()
+    for item in requests:
+        pending.put(item)
+    results = []
+
+    def connection():
+        conn = http.client.HTTPConnection(host, port, timeout=60)
+        while True:
+            try:
+                offset, kind, body = pending.get_nowait()
+            except queue.Empty:
+                return
+            scheduled = start_at + offset
+            delay = scheduled - time.time()
+            if delay > 0:
+                time.sleep(delay)
+            sent = time.time()
+            try:
+                conn.request('POST', ENDPOINTS[kind], body, {'Content-Type': 'application/json'})
+                response = conn.getresponse()
+                response.read()
+                status = response.status
+            except (OSError, http.client.HTTPException):
+                status = None
+                conn.close()
+                conn = http.client.HTTPConnection(host, port, timeout=60)
+            done = time.time()
+            results.append((kind, status, done - scheduled, done - sent))
+
+    threads = [threading.Thread(target=connection) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def percentiles(values, points=(50, 90, 99)):
+    ordered = sorted(values)
+    if not ordered:
+        return {f'p{p}': None for p in points} | {'max': None}
+    return {f'p{p}': ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))] * 1000 for p in points} | \
+        {'max': ordered[-1] * 1000}
+
+
+def summarize(results, elapsed, duration):
+    report = {}
+    for kind in ['all'] + sorted({kind for kind, *_ in results}):
+        rows = [r for r in results if kind == 'all' or r[0] == kind]
+        ok = [latency for _, status, latency, _ in rows if status == 200]
+        report[kind] = {
+            'requests': len(rows),
+            'errors': sum(1 for _, status, _, _ in rows if status != 200),
+            'error_rate': sum(1 for _, status, _, _ in rows if status != 200) / len(rows) if rows else 0.0,
+            'throughput': len(ok) / max(elapsed, duration),
+            'latency_ms': percentiles(ok),
+            'service_ms': percentiles([service for _, status, _, service in rows if status == 200]),
+        }
+    return report
+
+
+def start_server(args):
+    port = free_port()
+    env = dict(os.environ, PORT=str(port), SERVER_MODE=args.mode, WEB_CONCURRENCY=str(args.workers),
+               GUNICORN_THREADS=str(args.threads), GUNICORN_LOG_LEVEL='warning', LOG_LEVEL='WARNING',
+               WARMUP_ENABLED='1')
+    for setting in args.server_env:
+        name, _, value = setting.partition('=')
+        env[name] = value
+    server = subprocess.Popen([sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', SERVER_APPS[args.mode]],
+                              cwd=HERE, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+    except Exception:
+        server.terminate()
+        raise
+    return server, port
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--rate', type=float, default=50.0, help='target requests per second')
+    parser.add_argument('--duration', type=float, default=30.0, help='seconds of traffic')
+    parser.add_argument('--mix', default=DEFAULT_MIX, help=f"weighted request kinds, from: {', '.join(ENDPOINTS)}")
+    parser.add_argument('--arrivals', choices=('poisson', 'uniform'), default='poisson')
+    parser.add_argument('--clients', type=int, default=max(2, os.cpu_count() or 1), help='client processes')
+    parser.add_argument('--connections', type=int, default=16, help='keep-alive connections per client process')
+    parser.add_argument('--url', help='target an already running server instead of starting one')
+    parser.add_argument('--mode', choices=list(SERVER_APPS), default='sync', help='server started for the run')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--server-env', action='append', default=[], metavar='NAME=VALUE',
+                        help='extra environment for the started server (repeatable)')
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.rate <= 0 or args.duration <= 0:
+        parser.error('--rate and --duration must be positive')
+
+    workload = build_workload(args.seed, args.rate, args.duration, mix, args.arrivals)
+    digest = workload_digest(workload)
+    print(f"🧪 {len(workload)} requests over {args.duration:g}s at {args.rate:g} req/s ({args.arrivals}), "
+          f"mix {args.mix}, seed {args.seed}, workload {digest}")
+
+    server = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        server, port = start_server(args)
+        host = '127.0.0.1'
+        print(f"🚀 {args.mode} server on port {port}: {args.workers} worker(s) x {args.threads} thread(s)")
+
+    try:
+        # Deal requests round-robin so every client process sees the same arrival pattern
+        shards = [workload[i::args.clients] for i in range(args.clients)]
+        start_at = time.time() + 1.0
+        with multiprocessing.Pool(args.clients) as pool:
+            parts = pool.starmap(replay, [(host, port, start_at, shard, args.connections) for shard in shards])
+        elapsed = time.time() - start_at
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(30)
+
+    results = [row for part in parts for row in part]
+    report = summarize(results, elapsed, args.duration)
+    print(f"\n{'endpoint':<12} {'requests':>9} {'req/s':>8} {'errors':>7} {'p50 ms':>9} {'p90 ms':>9} "
+          f"{'p99 ms':>9} {'max ms':>9}")
+    for kind, row in report.items():
+        latency = row['latency_ms']
+        cells = ''.join(f" {latency[k]:>9.2f}" if latency[k] is not None else f" {'-':>9}"
+                        for k in ('p50', 'p90', 'p99', 'max'))
+        print(f"{kind:<12} {row['requests']:>9} {row['throughput']:>8.1f} {row['error_rate']:>6.1%}{cells}")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({
+                'config': {'seed': args.seed, 'rate': args.rate, 'duration': args.duration, 'mix': mix,
+                           'arrivals': args.arrivals, 'workload': digest, 'url': args.url,
+                           'server': None if args.url else {'mode': args.mode, 'workers': args.workers,
+                                                            'threads': args.threads, 'env': args.server_env}},
+                'elapsed': elapsed,
+                'report': report
+            }, f, indent=2)
+            f.write('\n')
+        print(f"\n💾 Report saved to {args.json}")
+    return 1 if report['all']['errors'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
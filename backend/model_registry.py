@@ -0,0 +1,118 @@
+"""
+Manage the versioned model registry (MODEL_REGISTRY_PATH, default models/registry next to app.py).
+
+Each version is a directory holding RA_model.pkl, scaler.pkl and, when
+exported, the RA_model.mmap fast-start artifact; manifest.json lists the
+versions and which one is active. Running servers poll the manifest and hot
+reload when the active version changes (or use POST /api/admin/reload):
+
+    python model_registry.py list
+    python model_registry.py publish path/to/RA_model.pkl path/to/scaler.pkl --version v2 --notes "retrained"
+    python model_registry.py activate v2
+
+A version is validated (loaded, warmed up through every endpoint, artifact
+exported) before it is added to the manifest. The first published version
+creates the registry and becomes active; after that the app loads from the
+registry instead of the unversioned models/RA_model.pkl.
+"""
+import argparse
+import os
+import re
+import shutil
+import sys
+import time
+
+# Validation loads the pickles directly
+os.environ['STARTUP_MODE'] = 'eager'
+
+import app
+
+
+def list_versions(args):
+    registry = app.read_registry()
+    if registry is None:
+        print(f"No model registry at {app.MODEL_REGISTRY_PATH} (serving {app.active_bundle.version})")
+        return 0
+    for entry in registry['versions']:
+        marker = '*' if entry['version'] == registry['active'] else ' '
+        print(f"{marker} {entry['version']:<16} {entry['fingerprint']}  {entry.get('published_at', '')}  {entry.get('notes', '')}")
+    return 0
+
+
+def publish(args):
+    if not re.fullmatch(r'[A-Za-z0-9][A-Za-z0-9._-]*', args.version):
+        print(f"❌ invalid version name {args.version!r} (letters, digits, '.', '_', '-')")
+        return 1
+    registry = app.read_registry() or {'active': None, 'versions': []}
+    if any(entry['version'] == args.version for entry in registry['versions']):
+        print(f"❌ version {args.version} already exists")
+        return 1
+
+    version_dir = os.path.join(app.MODEL_REGISTRY_PATH, args.version)
+    os.makedirs(version_dir)
+    try:
+        model_path = shutil.copy2(args.model, os.path.join(version_dir, 'RA_model.pkl'))
+        scaler_path = shutil.copy2(args.scaler, os.path.join(version_dir, 'scaler.pkl'))
+        fingerprint = app.model_fingerprint_of(model_path, scaler_path)
+
+        bundle = app.load_bundle(app.ModelBundle(args.version, model_path, scaler_path,
+                                                 os.path.join(version_dir, app.MODEL_ARTIFACT_NAME), fingerprint))
+        if not app.warm_up(bundle):
+            raise RuntimeError(f"warm-up failed: {bundle.warmup_error}")
+        if not args.no_artifact:
+            app.export_model_artifact(bundle)
+    except Exception as e:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        print(f"❌ {args.version} rejected: {e}")
+        return 1
+
+    registry['versions'].append({
+        'version': args.version,
+        'model': os.path.join(args.version, 'RA_model.pkl'),
+        'scaler': os.path.join(args.version, 'scaler.pkl'),
+        'fingerprint': fingerprint,
+        'published_at': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'notes': args.notes
+    })
+    if args.activate or registry['active'] is None:
+        registry['active'] = args.version
+    app.write_registry(registry)
+    print(f"✅ published {args.version} ({fingerprint}){' and activated' if registry['active'] == args.version else ''}")
+    return 0
+
+
+def activate(args):
+    try:
+        app.set_active_version(args.version)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {args.version} is active; running servers pick it up within {app.MODEL_REGISTRY_POLL_SECONDS:g}s")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    commands.add_parser('list', help='show versions (* = active)').set_defaults(run=list_versions)
+
+    publish_cmd = commands.add_parser('publish', help='validate and add a model + scaler as a new version')
+    publish_cmd.add_argument('model')
+    publish_cmd.add_argument('scaler')
+    publish_cmd.add_argument('--version', required=True)
+    publish_cmd.add_argument('--notes', default='')
+    publish_cmd.add_argument('--activate', action='store_true', help='make it the active version')
+    publish_cmd.add_argument('--no-artifact', action='store_true', help='skip the fast-start artifact')
+    publish_cmd.set_defaults(run=publish)
+
+    activate_cmd = commands.add_parser('activate', help='make an existing version the active one')
+    activate_cmd.add_argument('version')
+    activate_cmd.set_defaults(run=activate)
+
+    args = parser.parse_args()
+    return args.run(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
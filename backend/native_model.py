@@ -0,0 +1,260 @@
+"""
+Native evaluation of the XGBoost risk model, and its memory-mapped artifact.
+
+NativeTreeEnsemble exports every tree of the (optionally sigmoid-calibrated)
+XGBoost model into flat NumPy node arrays and scores rows from them, without
+DMatrix or sklearn. The artifact is a directory of .npy arrays plus
+manifest.json; read_artifact() maps it with np.load(mmap_mode='r'), so a
+fast start unpickles nothing and preforked workers share the pages.
+
+Nothing here imports sklearn or xgboost: the model objects passed in are only
+inspected. app.py decides when to use the engine (export_native_model,
+NATIVE_ENGINE_MAX_ROWS) and what goes into the artifact.
+"""
+import json
+import math
+import os
+import shutil
+
+import numpy as np
+
+NATIVE_PARITY_TOLERANCE = 1e-6
+
+
+# ------------------------------------------------------------
+# 🌲 Native Tree Engine (XGBoost trees as flat NumPy arrays)
+# ------------------------------------------------------------
+class NativeTreeEnsemble:
+    """XGBoost (optionally sigmoid-calibrated) ensemble evaluated straight from NumPy arrays.
+
+    Every tree of every booster is exported once into shared flat node
+    arrays (feature index, threshold, left/right child, default direction,
+    leaf value). Prediction walks all trees for a block of rows at once,
+    one depth level per step, so there is no DMatrix, no sklearn wrapper
+    and no per-tree Python loop. Arithmetic follows XGBoost: float32
+    features and thresholds, `x < threshold` goes left, NaN takes the
+    default branch, leaves are summed in tree order in float32.
+    """
+
+    ROW_BLOCK = 4096
+
+    def __init__(self, members):
+        feature, threshold, left, right, default_left, value = [], [], [], [], [], []
+        roots, tree_member = [], []
+        self.base_margins = []
+        self.calibrators = []
+        self.max_depth = 0
+        offset = 0
+
+        for member_idx, (trees, base_margin, calibrator) in enumerate(members):
+            self.base_margins.append(base_margin)
+            self.calibrators.append(calibrator)
+            for tree in trees:
+                lc = np.asarray(tree['left_children'], dtype=np.int64)
+                rc = np.asarray(tree['right_children'], dtype=np.int64)
+                leaf = lc == -1
+                nodes = np.arange(len(lc))
+
+                # Leaves point at themselves so extra traversal steps are no-ops
+                left.append(np.where(leaf, nodes, lc) + offset)
+                right.append(np.where(leaf, nodes, rc) + offset)
+                feature.append(np.where(leaf, 0, tree['split_indices']))
+                threshold.append(np.where(leaf, 0.0, tree['split_conditions']))
+                value.append(np.where(leaf, tree['split_conditions'], 0.0))
+                default_left.append(np.asarray(tree['default_left'], dtype=bool))
+                roots.append(offset)
+                tree_member.append(member_idx)
+                self.max_depth = max(self.max_depth, _tree_depth(lc, rc))
+                offset += len(lc)
+
+        self.feature = np.concatenate(feature).astype(np.intp)
+        self.threshold = np.concatenate(threshold).astype(np.float32)
+        self.left = np.concatenate(left).astype(np.intp)
+        self.right = np.concatenate(right).astype(np.intp)
+        self.default_left = np.concatenate(default_left)
+        self.value = np.concatenate(value).astype(np.float32)
+        self.roots = np.asarray(roots, dtype=np.intp)
+
+        # Column range of each member's trees in the (rows, trees) leaf matrix
+        tree_member = np.asarray(tree_member)
+        self.member_slices = [slice(int(np.searchsorted(tree_member, k)), int(np.searchsorted(tree_member, k, side='right')))
+                              for k in range(len(members))]
+        self.n_trees = len(roots)
+        self.n_nodes = offset
+
+    # Node/tree arrays shared with the memory-mapped artifact (see write_artifact)
+    FLAT_FIELDS = ('feature', 'threshold', 'left', 'right', 'default_left', 'value', 'roots')
+
+    def to_arrays(self):
+        """Everything from_arrays() needs, as plain NumPy arrays"""
+        arrays = {f'native_{name}': getattr(self, name) for name in self.FLAT_FIELDS}
+        arrays['native_member_bounds'] = np.array([[m.start, m.stop] for m in self.member_slices], dtype=np.int64)
+        arrays['native_base_margins'] = np.array(self.base_margins, dtype=np.float32)
+        arrays['native_calibrators'] = np.array([c if c is not None else (np.nan, np.nan) for c in self.calibrators], dtype=np.float64)
+        arrays['native_max_depth'] = np.array([self.max_depth], dtype=np.int64)
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Rebuild an engine from to_arrays() output (e.g. read-only memory-mapped arrays)"""
+        engine = cls.__new__(cls)
+        for name in cls.FLAT_FIELDS:
+            setattr(engine, name, arrays[f'native_{name}'])
+        engine.member_slices = [slice(int(start), int(stop)) for start, stop in arrays['native_member_bounds']]
+        engine.base_margins = [np.float32(m) for m in arrays['native_base_margins']]
+        engine.calibrators = [None if np.isnan(a) else (float(a), float(b)) for a, b in arrays['native_calibrators']]
+        engine.max_depth = int(arrays['native_max_depth'][0])
+        engine.n_trees = len(engine.roots)
+        engine.n_nodes = len(engine.feature)
+        return engine
+
+    def leaf_values(self, X32):
+        """(rows, trees) float32 leaf value reached by every row in every tree"""
+        rows = np.arange(X32.shape[0])[:, None]
+        node = np.broadcast_to(self.roots, (X32.shape[0], self.n_trees))
+        for _ in range(self.max_depth):
+            x = X32[rows, self.feature[node]]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(go_left, self.left[node], self.right[node])
+        return self.value[node]
+
+    def predict_positive(self, X):
+        """P(positive class) for every row, matching model.predict_proba(X)[:, 1]"""
+        X32 = np.ascontiguousarray(X, dtype=np.float32)
+        out = np.empty(X32.shape[0], dtype=np.float64)
+        for start in range(0, X32.shape[0], self.ROW_BLOCK):
+            block = X32[start:start + self.ROW_BLOCK]
+            leaves = self.leaf_values(block)
+            proba = np.zeros(block.shape[0], dtype=np.float64)
+            for member, base_margin, calibrator in zip(self.member_slices, self.base_margins, self.calibrators):
+                # Sequential float32 sum in tree order, starting from the base margin
+                margin = np.cumsum(np.column_stack([np.full(block.shape[0], base_margin, dtype=np.float32), leaves[:, member]]),
+                                   axis=1, dtype=np.float32)[:, -1]
+                # float32 sigmoid; exp is taken in float64 and rounded, which tracks expf closest
+                e = np.exp(np.minimum(-margin, np.float32(88.7)).astype(np.float64)).astype(np.float32)
+                p = np.float32(1.0) / (e + np.float32(1.0))
+                if calibrator is not None:
+                    a, b = calibrator
+                    p = _expit(-(a * p.astype(np.float64) + b))
+                proba += p
+            out[start:start + block.shape[0]] = proba / len(self.member_slices)
+        return out
+
+
+def _expit(z):
+    """scipy.special.expit without importing scipy; libm exp per value (np.exp's SIMD exp can differ by an ulp)"""
+    return np.array([1.0 / (1.0 + math.exp(-v)) if v > -709.0 else 0.0 for v in z.tolist()])
+
+
+def _tree_depth(left_children, right_children):
+    depth, frontier = 0, [0]
+    while True:
+        frontier = [c for n in frontier for c in (left_children[n], right_children[n]) if c != -1]
+        if not frontier:
+            return depth
+        depth += 1
+
+
+def _export_booster(estimator):
+    """XGBClassifier -> (trees, float32 base margin) for binary:logistic gbtree models"""
+    booster = estimator.get_booster()
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+
+    objective = learner['objective']['name']
+    if objective != 'binary:logistic':
+        raise ValueError(f"unsupported objective {objective}")
+    gbm = learner['gradient_booster']
+    if gbm['name'] != 'gbtree':
+        raise ValueError(f"unsupported booster {gbm['name']}")
+    if any(group != 0 for group in gbm['model']['tree_info']):
+        raise ValueError("multi-output boosters are not supported")
+
+    trees = gbm['model']['trees']
+    if any(any(t['split_type']) for t in trees):
+        raise ValueError("categorical splits are not supported")
+
+    # predict_proba honours early stopping through best_iteration
+    best_iteration = getattr(estimator, 'best_iteration', None) if booster.attr('best_iteration') is not None else None
+    if best_iteration is not None:
+        trees = trees[:int(gbm['model']['iteration_indptr'][best_iteration + 1])]
+
+    base_score = np.float32(float(learner['learner_model_param']['base_score'].strip('[]')))
+    base_margin = -np.log(np.float32(1.0) / base_score - np.float32(1.0))
+    return trees, np.float32(base_margin)
+
+
+def _native_members(m):
+    """Unwrap the loaded model into (trees, base_margin, calibrator) members"""
+    if type(m).__name__ == 'XGBClassifier':
+        trees, base_margin = _export_booster(m)
+        return [(trees, base_margin, None)]
+
+    if type(m).__name__ == 'CalibratedClassifierCV':
+        if len(m.classes_) != 2:
+            raise ValueError("only binary calibrated models are supported")
+        members = []
+        for calibrated in m.calibrated_classifiers_:
+            if type(calibrated.estimator).__name__ != 'XGBClassifier':
+                raise ValueError(f"unsupported calibrated estimator {type(calibrated.estimator).__name__}")
+            if calibrated.method != 'sigmoid':
+                raise ValueError(f"unsupported calibration method {calibrated.method}")
+            calibrator = calibrated.calibrators[0]
+            trees, base_margin = _export_booster(calibrated.estimator)
+            members.append((trees, base_margin, (float(calibrator.a_), float(calibrator.b_))))
+        return members
+
+    raise ValueError(f"unsupported model type {type(m).__name__}")
+
+
+def native_parity(engine, model, X_scaled):
+    """Largest |native - model.predict_proba| over the rows of X_scaled"""
+    return float(np.max(np.abs(engine.predict_positive(X_scaled) - model.predict_proba(X_scaled)[:, 1])))
+
+
+def checked_native_engine(model, n_features):
+    """Native engine for an unpickled model, parity-checked against it on synthetic scaled inputs"""
+    engine = NativeTreeEnsemble(_native_members(model))
+    rng = np.random.default_rng(0)
+    diff = native_parity(engine, model, rng.normal(0.0, 1.5, size=(256, n_features)))
+    if diff > NATIVE_PARITY_TOLERANCE:
+        raise ValueError(f"parity self-check failed (max diff {diff:.2e})")
+    return engine
+
+
+# ------------------------------------------------------------
+# 💾 Model Artifact (memory-mapped fast-start format)
+# ------------------------------------------------------------
+ARTIFACT_VERSION = 1
+
+
+def write_artifact(path, arrays, manifest):
+    """Write {name: array} plus manifest.json as the artifact directory `path`, replacing it atomically"""
+    manifest = {'version': ARTIFACT_VERSION, **manifest, 'arrays': sorted(arrays)}
+
+    # Write next to the target, then swap directories
+    staging = f"{path}.tmp-{os.getpid()}"
+    os.makedirs(staging)
+    for name, values in arrays.items():
+        np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(values))
+    with open(os.path.join(staging, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    if os.path.exists(path):
+        retired = f"{path}.old-{os.getpid()}"
+        os.rename(path, retired)
+        os.rename(staging, path)
+        shutil.rmtree(retired)
+    else:
+        os.rename(staging, path)
+    return manifest
+
+
+def read_artifact(path):
+    """(manifest, {name: read-only memory-mapped array}) for an artifact directory"""
+    with open(os.path.join(path, 'manifest.json')) as f:
+        manifest = json.load(f)
+    if manifest.get('version') != ARTIFACT_VERSION:
+        raise ValueError(f"artifact version {manifest.get('version')}, expected {ARTIFACT_VERSION}")
+    arrays = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r').view(np.ndarray)
+              for name in manifest['arrays']}
+    return manifest, arrays
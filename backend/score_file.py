@@ -0,0 +1,291 @@
+"""
+Offline bulk scoring of lab exports with the serving model and feature code.
+
+Reads a CSV, Excel (.xlsx) or Parquet file --chunk-size rows at a time,
+scores the chunks on a pool of worker processes through
+app.score_lab_records (the same feature pass and single model evaluation
+the endpoints use) and appends every input row, plus its scores, to a CSV or
+Parquet file in input order. At most --workers x 2 chunks are in flight, so
+memory stays flat however large the file is:
+
+    python score_file.py models/riskprediction.xlsx scored.csv
+    python score_file.py labs.csv scored.parquet --workers 4 --chunk-size 50000
+    python score_file.py labs.csv scored.csv --version v2     # a registry version
+
+Lab columns are found by name, ignoring case and punctuation: Age, Gender,
+ESR, CRP, RF, Anti-CCP as in the training spreadsheet, or the API field
+names (erythrocyteSedimentationRate, cReactiveProtein, rheumatoidFactor,
+antiCCP). Empty lab cells are scored as missing values, like the binary
+batch format; rows with text or infinite lab values, or no gender, are
+written with empty scores and counted as skipped. Parquet needs pyarrow.
+"""
+import argparse
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Historical rows rarely repeat and there is nothing to warm or hot reload here
+os.environ.setdefault('PREDICTION_CACHE_SIZE', '0')
+os.environ.setdefault('WARMUP_ENABLED', '0')
+os.environ.setdefault('MODEL_REGISTRY_POLL_SECONDS', '0')
+
+import app
+
+LAB_COLUMNS = ['Age', 'Gender', 'ESR', 'CRP', 'RF', 'Anti-CCP']
+COLUMN_ALIASES = {
+    'age': 'Age',
+    'gender': 'Gender',
+    'esr': 'ESR', 'erythrocytesedimentationrate': 'ESR',
+    'crp': 'CRP', 'creactiveprotein': 'CRP',
+    'rf': 'RF', 'rheumatoidfactor': 'RF',
+    'anticcp': 'Anti-CCP'
+}
+SCORE_COLUMNS = ['risk_probability', 'risk_score', 'risk_level', 'binary_prediction']
+
+
+# ------------------------------------------------------------
+# 📥 Chunked readers (DataFrames of at most chunk_size rows)
+# ------------------------------------------------------------
+def read_csv_chunks(path, chunk_size):
+    yield from pd.read_csv(path, chunksize=chunk_size)
+
+
+def read_excel_chunks(path, chunk_size):
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(name) for name in next(rows, ())]
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) == chunk_size:
+                yield pd.DataFrame(chunk, columns=header)
+                chunk = []
+        if chunk:
+            yield pd.DataFrame(chunk, columns=header)
+    finally:
+        workbook.close()
+
+
+def read_parquet_chunks(path, chunk_size):
+    import pyarrow.parquet as pq
+    for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+        yield batch.to_pandas()
+
+
+READERS = {'.csv': read_csv_chunks, '.xlsx': read_excel_chunks, '.xlsm': read_excel_chunks,
+           '.parquet': read_parquet_chunks, '.pq': read_parquet_chunks}
+
+
+# ------------------------------------------------------------
+# 📤 Incremental writers (header / schema taken from the first chunk)
+# ------------------------------------------------------------
+class CsvWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='')
+        self.header = True
+
+    def write(self, frame):
+        frame.to_csv(self.file, header=self.header, index=False)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetWriter:
+    def __init__(self, path):
+        import pyarrow  # noqa: F401  (fail before any scoring when pyarrow is missing)
+        self.path = path
+        self.writer = None
+
+    def write(self, frame):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if self.writer is None:
+            table = pa.Table.from_pandas(frame, preserve_index=False)
+            self.writer = pq.ParquetWriter(self.path, table.schema)
+        else:
+            # Later chunks may infer narrower types (e.g. no NaN yet); keep the first chunk's schema
+            table = pa.Table.from_pandas(frame, schema=self.writer.schema, preserve_index=False)
+        self.writer.write_table(table)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+WRITERS = {'.csv': CsvWriter, '.parquet': ParquetWriter, '.pq': ParquetWriter}
+
+
+def _extension(path, table, kind):
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in table:
+        raise SystemExit(f"❌ unsupported {kind} file {path!r} (use {', '.join(sorted(table))})")
+    return extension
+
+
+# ------------------------------------------------------------
+# 🧮 Scoring
+# ------------------------------------------------------------
+def resolve_columns(names):
+    """{lab column: input column name} for a chunk's header"""
+    found = {}
+    for name in names:
+        lab = COLUMN_ALIASES.get(re.sub(r'[^a-z0-9]', '', str(name).lower()))
+        if lab is not None and lab not in found:
+            found[lab] = name
+    missing = [lab for lab in LAB_COLUMNS if lab not in found]
+    if missing:
+        raise SystemExit(f"❌ input has no column for {', '.join(missing)} (columns: {', '.join(map(str, names))})")
+    return found
+
+
+def lab_columns(frame, columns):
+    """(6, N) float64 lab matrix with gender as 0/1, and the mask of rows that can be scored.
+
+    Empty cells stay NaN and reach the model as missing values, as in the
+    columnar binary batch format; text that is not a number, infinite values
+    and a missing gender make the row unscoreable.
+    """
+    labs = np.empty((len(LAB_COLUMNS), len(frame)), dtype=np.float64)
+    valid = np.ones(len(frame), dtype=bool)
+    for i, lab in enumerate(LAB_COLUMNS):
+        values = frame[columns[lab]]
+        present = values.notna().to_numpy()
+        if lab == 'Gender':
+            if pd.api.types.is_numeric_dtype(values):
+                labs[i] = values == 1
+            else:
+                labs[i] = values.astype(str).str.strip().str.lower().isin(app.GENDER_VALUES)
+            valid &= present
+        else:
+            labs[i] = pd.to_numeric(values, errors='coerce').to_numpy(dtype=np.float64, na_value=np.nan)
+            valid &= ~np.isinf(labs[i]) & ~(present & np.isnan(labs[i]))
+    return labs, valid
+
+
+def score_columns(labs):
+    """(P(RA), 0/1 labels) for the scoreable rows of a lab matrix; runs in the worker processes"""
+    if labs.shape[1] == 0:
+        return np.empty(0), np.empty(0, dtype=np.int64)
+    probs, labels = app.score_lab_records(*labs)
+    return probs, labels.astype(np.int64)
+
+
+def scored_frame(frame, valid, probs, labels):
+    """The input chunk with SCORE_COLUMNS appended (empty for skipped rows)"""
+    n = len(frame)
+    probability = np.full(n, np.nan)
+    probability[valid] = probs
+    prediction = np.zeros(n, dtype=np.int64)
+    prediction[valid] = labels
+    risk_level = np.full(n, None, dtype=object)
+    risk_level[valid] = [app.risk_level_of(p)[0] for p in probs.tolist()]
+    risk_score = np.full(n, np.nan)
+    risk_score[valid] = [round(p * 100, 2) for p in probs.tolist()]
+
+    result = frame.copy()
+    result['risk_probability'] = probability
+    result['risk_score'] = risk_score
+    result['risk_level'] = risk_level
+    result['binary_prediction'] = pd.arrays.IntegerArray(prediction, ~valid)
+    return result
+
+
+def _init_worker(version):
+    # Forked workers inherit the parent's model; spawned ones load the requested version themselves
+    if version and app.active_bundle.version != version:
+        app.activate_bundle(app.load_bundle(app.locate_model(version)))
+    app.set_model_threads(1)
+
+
+def score_file(source, destination, chunk_size, workers, version=None, progress=True):
+    """Stream `source` into `destination`; returns (rows, scored, seconds)"""
+    reader = READERS[_extension(source, READERS, 'input')]
+    writer = WRITERS[_extension(destination, WRITERS, 'output')](destination)
+    if version:
+        app.activate_bundle(app.load_bundle(app.locate_model(version)))
+    # Chunks are larger than NATIVE_ENGINE_MAX_ROWS, so they score on the full model: load it once, before forking
+    app.active_bundle.full_model()
+
+    rows = scored = 0
+    started = time.perf_counter()
+
+    def finish(frame, valid, probs, labels):
+        nonlocal rows, scored
+        writer.write(scored_frame(frame, valid, probs, labels))
+        rows += len(frame)
+        scored += int(valid.sum())
+        if progress:
+            elapsed = time.perf_counter() - started
+            print(f"\r  {rows:>12,} rows  {rows / elapsed:>10,.0f} rows/s", end='', file=sys.stderr, flush=True)
+
+    def parsed_chunks():
+        """(input chunk, lab matrix of its complete rows, mask of those rows)"""
+        columns = None
+        for frame in reader(source, chunk_size):
+            columns = columns or resolve_columns(frame.columns)
+            labs, valid = lab_columns(frame, columns)
+            yield frame, labs[:, valid], valid
+
+    try:
+        if workers <= 1:
+            app.set_model_threads(1)
+            for frame, labs, valid in parsed_chunks():
+                finish(frame, valid, *score_columns(labs))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(version,)) as pool:
+                pending = deque()
+                for frame, labs, valid in parsed_chunks():
+                    # Workers get the lab matrix only; the chunk itself stays here for writing
+                    pending.append((frame, valid, pool.submit(score_columns, labs)))
+                    # Bounded read-ahead: write the oldest chunk before reading more
+                    while len(pending) >= workers * 2:
+                        frame, valid, future = pending.popleft()
+                        finish(frame, valid, *future.result())
+                while pending:
+                    frame, valid, future = pending.popleft()
+                    finish(frame, valid, *future.result())
+    finally:
+        writer.close()
+        if progress and rows:
+            print(file=sys.stderr)
+
+    return rows, scored, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help='lab export (.csv, .xlsx, .parquet)')
+    parser.add_argument('output', help='scored rows (.csv, .parquet)')
+    parser.add_argument('--chunk-size', type=int, default=20_000, help='rows read and scored at a time')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='scoring processes (1 = in process)')
+    parser.add_argument('--version', help='registry version to score with (default: the active model)')
+    parser.add_argument('--allow-fallback', action='store_true',
+                        help='score with the untrained fallback model if the trained one cannot be loaded')
+    parser.add_argument('--quiet', action='store_true', help='no progress line')
+    args = parser.parse_args()
+
+    if args.chunk_size < 1:
+        parser.error('--chunk-size must be at least 1')
+    # The fallback is a randomly fitted stand-in: its scores mean nothing unless asked for (e.g. a smoke test)
+    if app.active_bundle.is_fallback and not args.version and not args.allow_fallback:
+        parser.exit(1, f"❌ Trained model could not be loaded (looked in {app.MODELS_DIR}); refusing to score "
+                       f"with the fallback model (pass --allow-fallback to do it anyway)\n")
+    rows, scored, seconds = score_file(args.input, args.output, args.chunk_size, args.workers,
+                                       args.version, progress=not args.quiet)
+    print(f"✅ {args.output}: {rows:,} rows ({scored:,} scored, {rows - scored:,} skipped) with model "
+          f"{app.active_bundle.version} in {seconds:.2f}s, {rows / seconds if seconds else 0:,.0f} rows/s")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,510 @@
+"""
+Parity checks for the optimized inference code in app.py, plus a smoke
+request to every route.
+
+Each parity check compares a fast path against the original reference code;
+any mismatch or server error exits non-zero, so it can gate a deploy:
+
+    python verify_inference.py            # run every check
+    python verify_inference.py features   # run one check
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import app
+import native_model
+
+
+def random_lab_grid(n, seed=0):
+    """Randomized raw records concentrated on the age bands and marker cutoffs"""
+    rng = np.random.default_rng(seed)
+
+    # Exact band edges, values a hair either side, and a spread of ordinary ages
+    ages = np.concatenate([
+        [0, 17, 17.999, 18, 18.001, 45, 59.999, 60, 60.001, 61, 90, np.nan],
+        rng.uniform(0, 100, 64).round(1)
+    ])
+    cutoffs = np.array([5, 6, 10, 14, 15, 20, 30, 40, 50], dtype=np.float64)
+    edges = np.concatenate([cutoffs, np.nextafter(cutoffs, -np.inf), np.nextafter(cutoffs, np.inf)])
+
+    def marker(size, high):
+        values = rng.uniform(0, high, size).round(1)
+        on_edge = rng.random(size) < 0.3
+        values[on_edge] = rng.choice(edges, on_edge.sum())
+        values[rng.random(size) < 0.002] = np.nan
+        return values
+
+    return {
+        'Age': rng.choice(ages, n),
+        'Gender': rng.integers(0, 2, n),
+        'ESR': marker(n, 80),
+        'CRP': marker(n, 50),
+        'RF': marker(n, 60),
+        'Anti-CCP': marker(n, 60)
+    }
+
+
+def training_adjust_by_age_gender(row):
+    """adjust_by_age_gender as written for training, before REFERENCE_RANGES - kept frozen as the oracle"""
+    age = row['Age']
+    gender = row['Gender']
+    ESR = row['ESR']
+    CRP = row['CRP']
+    RF = row['RF']
+    Anti_CCP = row['Anti-CCP']
+
+    # --- ESR Adjustment ---
+    if age < 18:
+        esr_adj = 0 if ESR < 10 else (1 if ESR <= 20 else 2)
+    elif age <= 60:
+        if gender == 1:  # Male
+            esr_adj = 0 if ESR < 15 else (1 if ESR <= 30 else 2)
+        else:            # Female
+            esr_adj = 0 if ESR < 20 else (1 if ESR <= 40 else 2)
+    else:
+        esr_adj = 0 if ESR < 30 else (1 if ESR <= 50 else 2)
+
+    # --- CRP Adjustment ---
+    if age < 18:
+        crp_adj = 0 if CRP < 5 else (1 if CRP <= 10 else 2)
+    elif age <= 60:
+        crp_adj = 0 if CRP < 6 else (1 if CRP <= 20 else 2)
+    else:
+        crp_adj = 0 if CRP < 10 else (1 if CRP <= 30 else 2)
+
+    # --- RF Adjustment ---
+    if age < 18:
+        rf_adj = 0 if RF < 10 else (1 if RF <= 20 else 2)
+    elif age <= 60:
+        rf_adj = 0 if RF < 14 else (1 if RF <= 30 else 2)
+    else:
+        rf_adj = 0 if RF < 20 else (1 if RF <= 40 else 2)
+
+    # --- Anti-CCP Adjustment (all ages) ---
+    anticcp_adj = 0 if Anti_CCP < 20 else (1 if Anti_CCP < 40 else 2)
+
+    row['ESR_adj'] = esr_adj
+    row['CRP_adj'] = crp_adj
+    row['RF_adj'] = rf_adj
+    row['AntiCCP_adj'] = anticcp_adj
+    return row
+
+
+def recommendations_biomarker_flag(age, gender_num, ESR, CRP, RF, Anti_CCP):
+    """biomarker_flag as written in recommendations.py, before REFERENCE_RANGES - kept frozen as the oracle"""
+    # ESR
+    if age < 18:
+        esr_flag = 0 if ESR < 10 else (1 if ESR <= 20 else 2)
+    elif age <= 60:
+        if gender_num == 1:  # male
+            esr_flag = 0 if ESR < 15 else (1 if ESR <= 30 else 2)
+        else:
+            esr_flag = 0 if ESR < 20 else (1 if ESR <= 40 else 2)
+    else:
+        esr_flag = 0 if ESR < 30 else (1 if ESR <= 50 else 2)
+
+    # CRP
+    if age < 18:
+        crp_flag = 0 if CRP < 5 else (1 if CRP <= 10 else 2)
+    elif age <= 60:
+        crp_flag = 0 if CRP < 6 else (1 if CRP <= 20 else 2)
+    else:
+        crp_flag = 0 if CRP < 10 else (1 if CRP <= 30 else 2)
+
+    # RF
+    if age < 18:
+        rf_flag = 0 if RF < 10 else (1 if RF <= 20 else 2)
+    elif age <= 60:
+        rf_flag = 0 if RF < 14 else (1 if RF <= 30 else 2)
+    else:
+        rf_flag = 0 if RF < 20 else (1 if RF <= 40 else 2)
+
+    # Anti-CCP
+    accp_flag = 0 if Anti_CCP < 20 else (1 if Anti_CCP < 40 else 2)
+
+    return {'ESR_flag': esr_flag, 'CRP_flag': crp_flag, 'RF_flag': rf_flag, 'AntiCCP_flag': accp_flag}
+
+
+def check_ranges(n, seed):
+    """The REFERENCE_RANGES engine must reproduce both original if/else ladders, batch and single-record"""
+    ok = True
+    for name, records in [('holdout', load_holdout()), ('random grid', random_lab_grid(n, seed))]:
+        columns = _columns(records)
+        rows = list(zip(*[c.tolist() for c in columns]))
+
+        expected_adj = np.array([
+            [adj[f] for f in ('ESR_adj', 'CRP_adj', 'RF_adj', 'AntiCCP_adj')]
+            for adj in (training_adjust_by_age_gender(dict(zip(('Age', 'Gender', 'ESR', 'CRP', 'RF', 'Anti-CCP'), r)))
+                        for r in rows)
+        ])
+        expected_flags = np.array([list(recommendations_biomarker_flag(*r).values()) for r in rows])
+
+        batch = np.column_stack(app.feature_levels(*app._as_float_columns(*columns)))
+        flags = app.biomarker_flags(*columns)
+        batch_flags = np.column_stack([flags[f] for f in app.BIOMARKER_FLAGS])
+        single = np.array([app.reference_ranges.level_row(*r) for r in rows])
+        single_flags = np.array([list(app.biomarker_flag(*r).values()) for r in rows])
+
+        mismatches = {
+            'features': int((batch != expected_adj).any(axis=1).sum()),
+            'flags': int((batch_flags != expected_flags).any(axis=1).sum()),
+            'single features': int((single != expected_adj).any(axis=1).sum()),
+            'single flags': int((single_flags != expected_flags).any(axis=1).sum()),
+        }
+        print(f"ranges ({name}): {len(rows)} records, " + ', '.join(f"{v} {k} mismatches" for k, v in mismatches.items()))
+        ok = ok and not any(mismatches.values())
+    return ok
+
+
+def check_features(n, seed):
+    """build_feature_matrix must be bit-identical to DataFrame.apply(adjust_by_age_gender) from training"""
+    grid = random_lab_grid(n, seed)
+
+    expected = pd.DataFrame(grid).apply(training_adjust_by_age_gender, axis=1)[app.MODEL_FEATURES].to_numpy(dtype=np.float64)
+    actual = app.build_feature_matrix(grid['Age'], grid['Gender'], grid['ESR'], grid['CRP'], grid['RF'], grid['Anti-CCP'])
+
+    mismatched = np.flatnonzero((expected.view(np.int64) != actual.view(np.int64)).any(axis=1))
+    print(f"features: {n} records, {len(mismatched)} mismatched rows")
+    for i in mismatched[:10]:
+        print(f"  row {i}: expected {expected[i].tolist()} got {actual[i].tolist()}")
+    return len(mismatched) == 0
+
+
+HOLDOUT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'models', 'riskprediction.xlsx')
+
+
+def load_holdout(path=HOLDOUT_PATH):
+    """Raw model columns from the labelled spreadsheet (Gender 'Male'/'Female' -> 1/0)"""
+    data = pd.read_excel(path)
+    gender = data['Gender'].astype(str).str.strip().str.upper().isin(['M', 'MALE', '1']).astype(np.int64)
+    return {
+        'Age': data['Age'].to_numpy(dtype=np.float64),
+        'Gender': gender.to_numpy(),
+        'ESR': data['ESR'].to_numpy(dtype=np.float64),
+        'CRP': data['CRP'].to_numpy(dtype=np.float64),
+        'RF': data['RF'].to_numpy(dtype=np.float64),
+        'Anti-CCP': data['Anti-CCP'].to_numpy(dtype=np.float64)
+    }
+
+
+def _columns(records):
+    return [records[c] for c in ('Age', 'Gender', 'ESR', 'CRP', 'RF', 'Anti-CCP')]
+
+
+def check_compiled(n, seed):
+    """The compiled scorer must give the same probabilities as the two-step scaler.transform path"""
+    if app.active_bundle.compiled_scorer is None:
+        print("compiled: no compiled scorer loaded")
+        return False
+
+    def model_proba(X_scaled):
+        # Same model call for both paths, whatever INFERENCE_ENGINE is
+        return app.active_bundle.full_model().predict_proba(X_scaled)[:, 1]
+
+    ok = True
+    for name, records in [('holdout', load_holdout()), ('random grid', random_lab_grid(n, seed))]:
+        columns = _columns(records)
+        two_step = model_proba(app.scale_features(app.build_feature_matrix(*columns)))
+        compiled = model_proba(app.active_bundle.compiled_scorer.features(*columns))
+        batch_mismatches = int((two_step != compiled).sum())
+
+        # Single-record path on a sample of rows
+        rows = range(0, len(two_step), max(1, len(two_step) // 500))
+        row_mismatches = sum(
+            model_proba(app.active_bundle.compiled_scorer.feature_row(*[c[i] for c in columns]))[0] != two_step[i]
+            for i in rows
+        )
+        print(f"compiled ({name}): {len(two_step)} records, {batch_mismatches} batch mismatches, "
+              f"{row_mismatches}/{len(rows)} single-record mismatches")
+        ok = ok and batch_mismatches == 0 and row_mismatches == 0
+    return ok
+
+
+def check_native(n, seed):
+    """The native tree engine must match model.predict_proba within NATIVE_PARITY_TOLERANCE"""
+    if app.active_bundle.native_model is None:
+        print("native: native tree engine not loaded")
+        return False
+
+    ok = True
+    for name, records in [('holdout', load_holdout()), ('random grid', random_lab_grid(n, seed))]:
+        X_scaled = app.scale_features(app.build_feature_matrix(*_columns(records)))
+        native = app.active_bundle.native_model.predict_positive(X_scaled)
+        reference = app.active_bundle.full_model().predict_proba(X_scaled)[:, 1]
+        diff = np.abs(native - reference)
+        print(f"native ({name}): {len(native)} records, max |diff| {diff.max():.2e}, "
+              f"{int((diff == 0).sum())} bit-identical")
+        ok = ok and diff.max() <= native_model.NATIVE_PARITY_TOLERANCE
+    return ok
+
+
+def check_labels(n, seed):
+    """Labels derived from P(RA) must match a separate model.predict call"""
+    ok = True
+    for name, records in [('holdout', load_holdout()), ('random grid', random_lab_grid(n, seed))]:
+        X_scaled = app.scale_features(app.build_feature_matrix(*_columns(records)))
+        _, labels = app.evaluate_model(X_scaled)
+        mismatches = int((labels != app.active_bundle.full_model().predict(X_scaled)).sum())
+        print(f"labels ({name}): {len(labels)} records, {mismatches} mismatches")
+        ok = ok and mismatches == 0
+    return ok
+
+
+def check_templates(n, seed):
+    """Precomputed recommendation plans must equal the get_*_recommendations output, as dicts and as JSON"""
+    rng = np.random.default_rng(seed)
+    mismatches = 0
+    for _ in range(n):
+        flags = dict(zip(app.BIOMARKER_FLAGS, rng.integers(0, 3, 4).tolist()))
+        age = int(rng.integers(10, 90))
+        severity = str(rng.choice(app.SEVERITY_LEVELS))
+        smoke = int(rng.integers(0, 3))
+        drink_cat = str(rng.choice(['Almost non-drinker', 'Occasional drinker', 'Frequent drinker']))
+        vegetarian = bool(rng.integers(0, 2))
+        weight_kg = [None, 0, int(rng.integers(30, 130)), float(rng.uniform(30, 130))][rng.integers(0, 4)]
+
+        expected = {
+            'diet': app.get_diet_recommendations(age, 0, flags, smoke, drink_cat, 0, vegetarian),
+            'exercise': app.get_exercise_recommendations(age, severity, flags, smoke),
+            'lifestyle': app.get_lifestyle_recommendations(age, severity, smoke, drink_cat, weight_kg),
+            'mentalWellness': app.get_mental_wellness_recommendations(severity, age)
+        }
+        key = app.recommendation_templates.key(age, severity, flags, smoke, drink_cat, vegetarian, weight_kg)
+        plans = app.recommendation_templates.plans_for(key, weight_kg)
+        fragment = app.recommendation_templates.fragment_for(key, weight_kg)
+        mismatches += plans != expected or fragment != app.compact_json(expected)
+
+    print(f"templates: {n} patients, {len(app.recommendation_templates.plans)} variants, {mismatches} mismatches")
+    return mismatches == 0
+
+
+# Spellings each endpoint has always read as male (everything else is female)
+MALE_SPELLINGS = {
+    '/api/predict-ra-risk': {'male', 'm', '1'},
+    '/api/compare-ra-risk': {'m'},
+    '/api/generate-recommendations': {'male', 'm'},
+}
+
+
+def check_gender(n, seed):
+    """Every endpoint must keep its own gender spellings, as before the shared request schemas"""
+    client = app.app.test_client()
+    requests = {path: body for path, body in app.warmup_requests() if path in MALE_SPELLINGS}
+    mismatches = 0
+    for spelling in ('M', 'm', 'Male', 'MALE', 'male', '1', 'F', 'female', '0', 'x'):
+        body = dict(requests['/api/predict-ra-risk'], gender=spelling)
+        got = {'/api/predict-ra-risk': client.post('/api/predict-ra-risk', json=body).get_json()['factors_analyzed']['gender']}
+        body = dict(requests['/api/compare-ra-risk'], previousGender=spelling, currentGender=spelling)
+        analysis = client.post('/api/compare-ra-risk', json=body).get_json()['detailedAnalysis']
+        got['/api/compare-ra-risk'] = analysis['previousTest']['gender']
+        body = dict(requests['/api/generate-recommendations'], gender=spelling)
+        got['/api/generate-recommendations'] = client.post(
+            '/api/generate-recommendations', json=body).get_json()['patientSummary']['gender']
+        for path, gender in got.items():
+            expected = 'Male' if spelling.lower() in MALE_SPELLINGS[path] else 'Female'
+            if gender != expected:
+                print(f"  ❌ {path} gender {spelling!r}: {gender}, expected {expected}")
+                mismatches += 1
+
+    print(f"gender: {len(MALE_SPELLINGS)} endpoints, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def check_wire(n, seed):
+    """The columnar binary batch format must score exactly like the JSON batch format"""
+    records = load_holdout()
+    columns = _columns(records)
+    finite = np.all([np.isfinite(c) for c in columns], axis=0)   # JSON bodies cannot carry NaN
+    columns = [c[finite][:app.MAX_BATCH_SIZE] for c in columns]
+
+    client = app.app.test_client()
+    payload = [
+        {'age': age, 'gender': 'male' if gender == 1 else 'female', 'erythrocyteSedimentationRate': esr,
+         'cReactiveProtein': crp, 'rheumatoidFactor': rf, 'antiCCP': anti_ccp}
+        for age, gender, esr, crp, rf, anti_ccp in zip(*[c.tolist() for c in columns])
+    ]
+    expected = client.post('/api/predict-ra-risk/batch', json={'records': payload}).get_json()['results']
+
+    body = app.encode_lab_columns(*columns)
+    as_json = client.post('/api/predict-ra-risk/batch', data=body,
+                          content_type=app.LAB_COLUMNS_MEDIA_TYPE).get_json()['results']
+    as_binary = app.decode_prediction_columns(client.post(
+        '/api/predict-ra-risk/batch', data=body, content_type=app.LAB_COLUMNS_MEDIA_TYPE,
+        headers={'Accept': app.LAB_COLUMNS_MEDIA_TYPE}).get_data())
+
+    json_mismatches = sum(a != b for a, b in zip(expected, as_json))
+    label_mismatches = int((as_binary['prediction'] != [r['binary_prediction'] for r in expected]).sum())
+    score_mismatches = int((np.round(as_binary['probability'] * 100, 2) != [r['risk_score'] for r in expected]).sum())
+    print(f"wire: {len(expected)} records, {json_mismatches} JSON-response mismatches, "
+          f"{label_mismatches} binary label / {score_mismatches} binary score mismatches")
+    return json_mismatches == 0 and label_mismatches == 0 and score_mismatches == 0
+
+
+def check_precision(n, seed):
+    """A record must get the same P(RA) on the row path, in a small (cached) batch and in a large uncached one"""
+    rng = np.random.default_rng(seed)
+    size = app.PREDICTION_CACHE_MAX_BATCH + 1
+    columns = [rng.uniform(10, 90, size).round(4), rng.integers(0, 2, size).astype(np.float64),
+               rng.uniform(0, 80, size).round(4), rng.uniform(0, 40, size).round(4),
+               rng.uniform(0, 60, size).round(4), rng.uniform(0, 60, size).round(4)]
+
+    large, _ = app.score_lab_records(*columns)
+    small = np.concatenate([app.score_lab_records(*[c[i:i + 50] for c in columns])[0] for i in range(0, size, 50)])
+    rows = np.array([app.score_lab_record(*values)[0] for values in zip(*[c.tolist() for c in columns])])
+
+    mismatches = {'small batch': int((small != large).sum()), 'row path': int((rows != large).sum())}
+    print(f"precision: {size} records, " + ', '.join(f"{v} {k} mismatches" for k, v in mismatches.items()))
+    return not any(mismatches.values())
+
+
+async def _asgi_request(asgi_app, method, path, body, content_type, piece):
+    """Drive one request through the ASGI app, uploading `piece` bytes at a time and reading slowly"""
+    pieces = [body[i:i + piece] for i in range(0, len(body), piece)] or [b'']
+    messages = [{'type': 'http.request', 'body': p, 'more_body': i < len(pieces) - 1} for i, p in enumerate(pieces)]
+    headers = [(b'host', b'localhost'), (b'content-length', str(len(body)).encode())]
+    if content_type:
+        headers.append((b'content-type', content_type.encode()))
+    scope = {'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1', 'method': method,
+             'scheme': 'http', 'path': path, 'query_string': b'', 'root_path': '', 'headers': headers,
+             'client': ('127.0.0.1', 50000), 'server': ('localhost', 80)}
+    response = {'body': []}
+
+    async def receive():
+        await asyncio.sleep(0)
+        return messages.pop(0) if messages else {'type': 'http.disconnect'}
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            response['status'] = message['status']
+            response['headers'] = sorted((k.decode(), v.decode()) for k, v in message['headers'])
+        else:
+            response['body'].append(message.get('body', b''))
+            await asyncio.sleep(0.001)
+
+    await asgi_app(scope, receive, send)
+    return response['status'], response['headers'], b''.join(response['body'])
+
+
+def check_asgi(n, seed):
+    """The ASGI adapter must return exactly what the Flask app returns, for slow uploads and slow readers"""
+    import asgi
+
+    calls = [('POST', path, json.dumps(body).encode(), 'application/json')
+             for path, body in app.warmup_requests()]
+    patients = [body for path, body in app.warmup_requests() if path == '/api/generate-recommendations']
+    roster = (patients * 10 + [{'age': 'old'}, []])
+    calls += [
+        ('POST', '/api/generate-recommendations/batch',
+         ''.join(json.dumps(p) + '\n' for p in roster).encode(), 'application/x-ndjson'),
+        ('POST', '/api/predict-ra-risk', b'{"age": "abc", "gender": "male"}', 'application/json'),
+        ('POST', '/api/compare-ra-risk', b'{"monthsSinceLastTest": 6}', 'application/json'),
+        ('OPTIONS', '/api/generate-recommendations', b'', None),
+        ('GET', '/api/recommendations-health', b'', None)
+    ]
+
+    client = app.app.test_client()
+    asgi_app = asgi.AsgiApp(threads=2)
+    # Small chunks, so the bulk stream outruns the reader and has to wait for it
+    chunk_size, app.RECOMMENDATIONS_CHUNK_SIZE = app.RECOMMENDATIONS_CHUNK_SIZE, 2
+    mismatches = 0
+    try:
+        for method, path, body, content_type in calls:
+            expected = client.open(path, method=method, data=body, content_type=content_type)
+            expected_headers = sorted((k.lower(), v) for k, v in expected.headers.items())
+            status, headers, data = asyncio.run(_asgi_request(asgi_app, method, path, body, content_type, 7))
+            if (status, headers, data) != (expected.status_code, expected_headers, expected.get_data()):
+                print(f"  ❌ {method} {path}: {status} vs {expected.status_code}")
+                mismatches += 1
+    finally:
+        app.RECOMMENDATIONS_CHUNK_SIZE = chunk_size
+        asgi_app.executor.shutdown()
+
+    print(f"asgi: {len(calls)} requests, {mismatches} mismatches")
+    return mismatches == 0
+
+
+def check_routes(n, seed):
+    """Every registered route must answer without a server error (parity checks never call the GET routes)"""
+    calls = [('POST', path, body) for path, body in app.warmup_requests()]
+    calls += [('GET', rule.rule, None) for rule in app.app.url_map.iter_rules()
+              if 'GET' in rule.methods and rule.endpoint != 'static']
+    calls.append(('POST', '/api/admin/reload', {}))
+
+    client = app.app.test_client()
+    failures = 0
+    for method, path, body in calls:
+        response = client.open(path, method=method, json=body)
+        response.get_data()
+        # /api/ready reports 503 by design while the fallback model is serving
+        allowed_503 = path == '/api/ready' and not app.is_ready()
+        if response.status_code >= 500 and not (allowed_503 and response.status_code == 503):
+            print(f"  ❌ {method} {path}: {response.status_code} {response.get_data(as_text=True)[:200]}")
+            failures += 1
+
+    # Bad input is the client's error: a malformed JSON body must get a 400, never a 500
+    for path in sorted({path for method, path, _ in calls if method == 'POST' and path != '/api/admin/reload'}):
+        response = client.post(path, data='{"age": 4', content_type='application/json')
+        if response.status_code != 400:
+            print(f"  ❌ POST {path} (malformed JSON): {response.status_code}")
+            failures += 1
+    # ...and must not start a reload on the admin endpoint
+    admin_token, app.ADMIN_TOKEN = app.ADMIN_TOKEN, 'verify'
+    try:
+        for body in ('{"version": "v', '["v1"]'):
+            response = client.post('/api/admin/reload', data=body, content_type='application/json',
+                                   headers={'X-Admin-Token': 'verify'})
+            if response.status_code != 400 or app._reload_lock.locked():
+                print(f"  ❌ POST /api/admin/reload ({body!r}): {response.status_code}")
+                failures += 1
+    finally:
+        app.ADMIN_TOKEN = admin_token
+
+    called = {path for _, path, _ in calls}
+    missed = [rule.rule for rule in app.app.url_map.iter_rules()
+              if rule.endpoint != 'static' and rule.rule not in called]
+    for path in missed:
+        print(f"  ❌ {path}: no smoke request")
+    print(f"routes: {len(calls)} requests, {failures} server errors, {len(missed)} routes not called")
+    return failures == 0 and not missed
+
+
+CHECKS = {
+    'ranges': check_ranges,
+    'features': check_features,
+    'compiled': check_compiled,
+    'native': check_native,
+    'labels': check_labels,
+    'templates': check_templates,
+    'gender': check_gender,
+    'wire': check_wire,
+    'precision': check_precision,
+    'asgi': check_asgi,
+    'routes': check_routes,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('checks', nargs='*', metavar='check', help=f"checks to run: {', '.join(CHECKS)} (default: all)")
+    parser.add_argument('-n', type=int, default=20_000, help='randomized records per check')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    unknown = [name for name in args.checks if name not in CHECKS]
+    if unknown:
+        parser.error(f"unknown check(s): {', '.join(unknown)}")
+
+    results = {name: CHECKS[name](args.n, args.seed) for name in (args.checks or CHECKS)}
+    for name, ok in results.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    return 0 if all(results.values()) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2 @@
+"""WSGI entry point for production serving:  gunicorn -c gunicorn.conf.py wsgi:app"""
+from app import app  # noqa: F401  (loads the model at import, before gunicorn forks)
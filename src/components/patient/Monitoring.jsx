@@ -41,6 +41,9 @@ ChartJS.register(
   Filler
 );
 
+// The batch endpoint accepts at most this many records per request (MAX_BATCH_SIZE in backend/app.py)
+const BATCH_CHUNK_SIZE = 1000;
+
 const Monitoring = () => {
   const [predictionHistory, setPredictionHistory] = useState([]);
   const [loading, setLoading] = useState(true);
@@ -81,68 +84,79 @@ const Monitoring = () => {
       }
 
       const history = [];
-      
-      // Process each lab entry with actual prediction
-      for (const doc of snapshot.docs) {
+
+      // Prepare payloads with all 6 factors for every lab entry
+      const entries = snapshot.docs.map((doc) => {
         const labData = doc.data();
-        
-        try {
-          // Prepare payload with all 6 factors
-          const payload = {
+        return {
+          doc,
+          labData,
+          payload: {
             age: parseFloat(labData.userAge),
             gender: labData.userGender,
             rheumatoidFactor: parseFloat(labData.rheumatoidFactor),
             antiCCP: parseFloat(labData.antiCCP),
             cReactiveProtein: parseFloat(labData.cReactiveProtein),
             erythrocyteSedimentationRate: parseFloat(labData.erythrocyteSedimentationRate)
-          };
-
-          console.log("🚀 Sending prediction request for:", payload);
-
-          const backendURL = import.meta.env.VITE_BACKEND_URL;
-          const response = await fetch(`${backendURL}/api/predict-ra-risk`, {
-            method: 'POST',
-            headers: { 'Content-Type': 'application/json' },
-            body: JSON.stringify(payload)
-          });
-
-          if (response.ok) {
-            const prediction = await response.json();
-            
-            history.push({
-              id: doc.id,
-              date: new Date(labData.createdAt).toLocaleDateString('en-US', {
-                year: 'numeric',
-                month: 'short',
-                day: 'numeric'
-              }),
-              timestamp: new Date(labData.createdAt),
-              risk_score: prediction.risk_score,
-              risk_level: prediction.risk_level,
-              risk_probability: prediction.risk_probability,
-              binary_prediction: prediction.binary_prediction,
-              // All 6 factors used for prediction
-              factors: {
-                age: payload.age,
-                gender: payload.gender,
-                rheumatoidFactor: payload.rheumatoidFactor,
-                antiCCP: payload.antiCCP,
-                cReactiveProtein: payload.cReactiveProtein,
-                erythrocyteSedimentationRate: payload.erythrocyteSedimentationRate
-              },
-              recommendations: prediction.recommendations,
-              full_prediction: prediction
-            });
-
-            console.log("✅ Prediction added to history:", prediction.risk_score);
-          } else {
-            console.error("❌ Prediction failed for lab entry:", doc.id);
           }
-        } catch (error) {
-          console.error("❌ Error processing lab entry:", error);
+        };
+      });
+
+      console.log("🚀 Sending batch prediction request for", entries.length, "lab entries");
+
+      // Score the history in as few requests as the batch limit allows, results kept in entry order
+      const backendURL = import.meta.env.VITE_BACKEND_URL;
+      const results = [];
+      for (let start = 0; start < entries.length; start += BATCH_CHUNK_SIZE) {
+        const chunk = entries.slice(start, start + BATCH_CHUNK_SIZE);
+        const response = await fetch(`${backendURL}/api/predict-ra-risk/batch`, {
+          method: 'POST',
+          headers: { 'Content-Type': 'application/json' },
+          body: JSON.stringify({ records: chunk.map((entry) => entry.payload) })
+        });
+
+        if (!response.ok) {
+          throw new Error(`Batch prediction failed with status ${response.status}`);
         }
+
+        const data = await response.json();
+        results.push(...data.results);
       }
 
+      entries.forEach(({ doc, labData, payload }, index) => {
+        const prediction = results[index];
+
+        if (!prediction || prediction.error) {
+          console.error("❌ Prediction failed for lab entry:", doc.id, prediction?.error);
+          return;
+        }
+
+        history.push({
+          id: doc.id,
+          date: new Date(labData.createdAt).toLocaleDateString('en-US', {
+            year: 'numeric',
+            month: 'short',
+            day: 'numeric'
+          }),
+          timestamp: new Date(labData.createdAt),
+          risk_score: prediction.risk_score,
+          risk_level: prediction.risk_level,
+          risk_probability: prediction.risk_probability,
+          binary_prediction: prediction.binary_prediction,
+          // All 6 factors used for prediction
+          factors: {
+            age: payload.age,
+            gender: payload.gender,
+            rheumatoidFactor: payload.rheumatoidFactor,
+            antiCCP: payload.antiCCP,
+            cReactiveProtein: payload.cReactiveProtein,
+            erythrocyteSedimentationRate: payload.erythrocyteSedimentationRate
+          },
+          recommendations: prediction.recommendations,
+          full_prediction: prediction
+        });
+      });
+
       console.log("✅ Final prediction history:", history);
       setPredictionHistory(history);
     } catch (error) {